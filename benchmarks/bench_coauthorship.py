@@ -0,0 +1,55 @@
+"""
+Builds the co-authorship graph of mecip.coauthorship over a synthetic corpus of parsed CVs, whose
+publications have authors drawn from a pool of professors and external researchers, and times the graph
+queries.
+
+    python -m benchmarks.bench_coauthorship
+"""
+import random
+import time
+
+from mecip.coauthorship import coauthorship_graph
+
+PROFESSORS = 20000
+
+EXTERNAL_AUTHORS = 30000
+
+PUBLICATIONS = 20
+
+
+def synthetic_corpus(seed=1):
+    rnd = random.Random(seed)
+
+    names = ['Professor {}'.format(i) for i in range(PROFESSORS)]
+    external = ['Pesquisador, {}'.format(i) for i in range(EXTERNAL_AUTHORS)]
+
+    cvs = []
+
+    for i, name in enumerate(names):
+        papers = [{'title': 'Artigo {} de {}'.format(j, name), 'year': rnd.randint(2000, 2025),
+                   'journal': 'Revista', 'areas': [],
+                   'authors': [name] + rnd.sample(names, rnd.randint(0, 3)) + rnd.sample(external, rnd.randint(0, 3))}
+                  for j in range(PUBLICATIONS)]
+        cvs.append({'name': name, 'lattes_url': 'http://lattes.cnpq.br/{:016d}'.format(i),
+                    'publications': {'journal_papers': papers}})
+
+    return cvs
+
+
+if __name__ == '__main__':
+
+    cvs = synthetic_corpus()
+
+    start = time.perf_counter()
+    graph = coauthorship_graph(cvs)
+    print('{} authors, {} edge positions: built in {:.4f} s'.format(len(graph), len(graph.indices),
+                                                                     time.perf_counter() - start))
+
+    for label, query in [('collaborators of one author', lambda: graph.collaborators(0, 2020, 2025)),
+                         ('adjacency', lambda: graph.adjacency()),
+                         ('collaboration counts 2020-2025', lambda: graph.collaboration_counts(2020, 2025)),
+                         ('connected components', lambda: graph.components()),
+                         ('connected components 2024-2025', lambda: graph.components(2024, 2025))]:
+        start = time.perf_counter()
+        query()
+        print('{:>32} {:.4f} s'.format(label, time.perf_counter() - start))
@@ -0,0 +1,34 @@
+"""
+Compares extract_information (one absolute XPath query per section and one relative query per field)
+with dispatch_information (single walk, attributes read from element.attrib) on synthetic CVs.
+
+    python -m benchmarks.bench_dispatcher
+"""
+import timeit
+
+from lxml import html
+
+from benchmarks.lattes_factory import synthetic_cv
+from mecip.xml_dispatcher import dispatch_information
+from mecip.xml_parser import LATTES_ENCODING
+from mecip.xml_parser import extract_information
+
+if __name__ == '__main__':
+
+    parser = html.HTMLParser(encoding=LATTES_ENCODING)
+
+    print('{:>12} {:>12} {:>12} {:>10}'.format('publications', 'xpath (s)', 'dispatch (s)', 'speedup'))
+
+    for publications in [10, 100, 1000, 5000]:
+
+        tree = html.fromstring(synthetic_cv(publications=publications, experiences=10, technical=publications // 10),
+                               parser=parser)
+
+        assert extract_information(tree) == dispatch_information(tree)
+
+        repeat = max(1, 2000 // publications)
+
+        xpath = min(timeit.repeat(lambda: extract_information(tree), number=repeat, repeat=3)) / repeat
+        dispatch = min(timeit.repeat(lambda: dispatch_information(tree), number=repeat, repeat=3)) / repeat
+
+        print('{:>12} {:>12.4f} {:>12.4f} {:>9.1f}x'.format(publications, xpath, dispatch, xpath / dispatch))
@@ -0,0 +1,70 @@
+"""
+Compares the higher education experience computed with pd.date_range and a set of "%Y%m" strings (the
+former implementation of ProfessorIndexExtractor) with the integer interval union of mecip.intervals,
+per professor and in batch over the teaching table of a columnar corpus.
+
+    python -m benchmarks.bench_intervals
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+from lxml import html
+
+from benchmarks.lattes_factory import synthetic_cv
+from mecip.corpus import corpus_tables
+from mecip.intervals import batch_covered_months
+from mecip.intervals import covered_months
+from mecip.intervals import month_ordinal
+from mecip.intervals import month_ordinals
+from mecip.xml_parser import LATTES_ENCODING
+from mecip.xml_parser import extract_information
+
+
+def teaching_periods(cv):
+    return [(t['start'], t['end']) for e in cv['professional_experience'] for t in e['teaching']
+            if t['level'] == 'GRADUACAO']
+
+
+def date_range_months(cv):
+    months = set()
+
+    for start, end in teaching_periods(cv):
+        months.update(pd.date_range('{1}-{0}-01'.format(*start.split('/')), '{1}-{0}-01'.format(*end.split('/')),
+                                    freq='MS').strftime("%Y%m").tolist())
+
+    return len(months)
+
+
+def interval_months(cv):
+    return covered_months([(month_ordinal(s), month_ordinal(e)) for s, e in teaching_periods(cv)])
+
+
+def batch_months(teaching, lattes_ids):
+    teaching = teaching[teaching['level'] == 'GRADUACAO']
+    owners = pd.Index(lattes_ids).get_indexer(teaching['lattes_id'])
+    return batch_covered_months(owners, month_ordinals(teaching['start'].tolist()),
+                                month_ordinals(teaching['end'].tolist()), len(lattes_ids))
+
+
+if __name__ == '__main__':
+
+    parser = html.HTMLParser(encoding=LATTES_ENCODING)
+
+    cvs = [extract_information(html.fromstring(synthetic_cv(i, publications=1, experiences=10, technical=0),
+                                               parser=parser)) for i in range(1000)]
+
+    tables = corpus_tables(cvs, tables=['curricula', 'teaching'])
+    lattes_ids = tables['curricula']['lattes_id'].tolist()
+
+    expected = [date_range_months(cv) for cv in cvs]
+
+    assert expected == [interval_months(cv) for cv in cvs]
+    assert np.array_equal(expected, batch_months(tables['teaching'], lattes_ids))
+
+    print('{:>22} {:>10}'.format('1000 professors', 'time (s)'))
+
+    for label, function in [('pd.date_range', lambda: [date_range_months(cv) for cv in cvs]),
+                            ('interval union', lambda: [interval_months(cv) for cv in cvs]),
+                            ('batch (NumPy)', lambda: batch_months(tables['teaching'], lattes_ids))]:
+        print('{:>22} {:>10.4f}'.format(label, min(timeit.repeat(function, number=1, repeat=3))))
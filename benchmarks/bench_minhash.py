@@ -0,0 +1,82 @@
+"""
+Compares the near-duplicate titles found by LSH banding (mecip.minhash.NearDuplicateDetector) with an
+exhaustive comparison of the MinHash signatures of every pair of titles. The titles are random sequences
+of pseudo-words, a fifth of them copied with changed case, accents removed or the end truncated, as the
+same paper is often listed by different CVs.
+
+    python -m benchmarks.bench_minhash
+"""
+import random
+import time
+import unicodedata
+
+import numpy as np
+
+from mecip.minhash import NearDuplicateDetector
+
+SYLLABLES = ['ca', 'de', 'li', 'mo', 'nu', 'pa', 're', 'si', 'to', 'va', 'ção', 'ên', 'pro', 'tra', 'gra', 'men',
+             'tal', 'ris', 'cos', 'dis']
+
+
+def synthetic_titles(size, seed=1):
+    rnd = random.Random(seed)
+
+    words = [''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 5))) for _ in range(5000)]
+
+    titles = [' '.join(rnd.choice(words) for _ in range(rnd.randint(5, 12))) for _ in range(size * 4 // 5)]
+
+    while len(titles) < size:
+        title = rnd.choice(titles)
+        change = rnd.randrange(3)
+        if change == 0:
+            title = title.upper()
+        elif change == 1:
+            title = ''.join(c for c in unicodedata.normalize('NFKD', title) if not unicodedata.combining(c))
+        else:
+            title = title[:max(10, len(title) * 4 // 5)]
+        titles.append(title)
+
+    return titles
+
+
+def exhaustive_pairs(detector, titles):
+    signatures, valid = detector.hasher.signatures(titles)
+
+    found = set()
+
+    for i in range(len(titles)):
+        similarity = (signatures[i + 1:] == signatures[i]).mean(axis=1)
+        found.update((i, i + 1 + j) for j in np.flatnonzero(similarity >= detector.threshold))
+
+    return found
+
+
+if __name__ == '__main__':
+
+    detector = NearDuplicateDetector()
+
+    print('threshold {}, {} bands of {} rows'.format(detector.threshold, detector.bands, detector.rows))
+
+    titles = synthetic_titles(5000)
+
+    start = time.perf_counter()
+    expected = exhaustive_pairs(detector, titles)
+    exhaustive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs, _ = detector.similar_pairs(titles)
+    banded = time.perf_counter() - start
+
+    found = set(map(tuple, pairs.tolist()))
+
+    print('5000 titles: exhaustive {:.4f} s, LSH {:.4f} s, recall {:.3f}, {} pairs not in the exhaustive set'.format(
+        exhaustive, banded, len(found & expected) / max(1, len(expected)), len(found - expected)))
+
+    for size in [50000, 200000]:
+
+        titles = synthetic_titles(size)
+
+        start = time.perf_counter()
+        clusters = detector.clusters(titles)
+
+        print('{} titles: LSH {:.4f} s, {} clusters'.format(size, time.perf_counter() - start, len(clusters)))
@@ -0,0 +1,51 @@
+"""
+Compares the memory retained by a parsed corpus held as nested dictionaries and as mecip.records
+instances (slotted records with interned author names, venues and knowledge areas).
+
+    python -m benchmarks.bench_records
+"""
+import gc
+import tracemalloc
+
+from lxml import html
+
+from benchmarks.lattes_factory import synthetic_cv
+from mecip.records import as_records
+from mecip.xml_parser import LATTES_ENCODING
+from mecip.xml_parser import extract_information
+
+
+def corpus(size, publications, records):
+    parser = html.HTMLParser(encoding=LATTES_ENCODING)
+
+    result = []
+
+    for i in range(size):
+        cv = extract_information(html.fromstring(synthetic_cv(i, publications=publications), parser=parser))
+        result.append(as_records(cv) if records else cv)
+
+    return result
+
+
+def retained(size, publications, records):
+    gc.collect()
+    tracemalloc.start()
+    value = corpus(size, publications, records)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return current
+
+
+if __name__ == '__main__':
+
+    print('{:>6} {:>12} {:>12} {:>12} {:>8}'.format('CVs', 'items/CV', 'dicts (MB)', 'records (MB)', 'ratio'))
+
+    for size, publications in [(50, 100), (50, 500), (200, 200)]:
+
+        dicts = retained(size, publications, False)
+        records = retained(size, publications, True)
+
+        print('{:>6} {:>12} {:>12.1f} {:>12.1f} {:>7.2f}x'.format(
+            size, 3 * publications, dicts / 2 ** 20, records / 2 ** 20, dicts / records))
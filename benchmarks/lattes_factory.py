@@ -0,0 +1,145 @@
+"""
+Synthetic Lattes CVs for benchmarks. The documents follow the layout of the CNPq XML export closely
+enough for every extractor in mecip, and their size is controlled by the number of records per section.
+"""
+import io
+import random
+import zipfile
+
+HEADER = '<?xml version="1.0" encoding="ISO-8859-1" standalone="no" ?>\n'
+
+AREA = ('<AREAS-DO-CONHECIMENTO><AREA-DO-CONHECIMENTO-1 NOME-GRANDE-AREA-DO-CONHECIMENTO="CIENCIAS_EXATAS_E_DA_TERRA" '
+        'NOME-DA-AREA-DO-CONHECIMENTO="{area}" NOME-DA-SUB-AREA-DO-CONHECIMENTO="" NOME-DA-ESPECIALIDADE=""/>'
+        '</AREAS-DO-CONHECIMENTO>')
+
+AUTHORS = ''.join('<AUTORES NOME-COMPLETO-DO-AUTOR="{}" NOME-PARA-CITACAO="" ORDEM-DE-AUTORIA="{}"/>'.format(a, i + 1)
+                  for i, a in enumerate(['Maria da Conceição Araújo', 'Silva, José Carlos', 'Pereira, Ana Beatriz']))
+
+JOURNAL_PAPER = (
+    '<ARTIGO-PUBLICADO SEQUENCIA-PRODUCAO="{i}"><DADOS-BASICOS-DO-ARTIGO NATUREZA="COMPLETO" '
+    'TITULO-DO-ARTIGO="Artigo número {i} sobre computação" ANO-DO-ARTIGO="{year}" IDIOMA="Português" DOI="{doi}"/>'
+    '<DETALHAMENTO-DO-ARTIGO TITULO-DO-PERIODICO-OU-REVISTA="Revista {j}" ISSN="01046500" VOLUME="{j}" '
+    'PAGINA-INICIAL="1" PAGINA-FINAL="10"/>' + AUTHORS + AREA + '</ARTIGO-PUBLICADO>')
+
+CONFERENCE_PAPER = (
+    '<TRABALHO-EM-EVENTOS SEQUENCIA-PRODUCAO="{i}"><DADOS-BASICOS-DO-TRABALHO NATUREZA="{nature}" '
+    'TITULO-DO-TRABALHO="Trabalho número {i} em evento" ANO-DO-TRABALHO="{year}" PAIS-DO-EVENTO="Brasil"/>'
+    '<DETALHAMENTO-DO-TRABALHO NOME-DO-EVENTO="Simpósio {j}" VOLUME="1" PAIS-DO-EVENTO="Brasil"/>'
+    + AUTHORS + AREA + '</TRABALHO-EM-EVENTOS>')
+
+CHAPTER = (
+    '<CAPITULO-DE-LIVRO-PUBLICADO SEQUENCIA-PRODUCAO="{i}"><DADOS-BASICOS-DO-CAPITULO TIPO="Capítulo de livro publicado" '
+    'TITULO-DO-CAPITULO-DO-LIVRO="Capítulo {i}" ANO="{year}" DOI=""/><DETALHAMENTO-DO-CAPITULO '
+    'TITULO-DO-LIVRO="Livro {j}" NUMERO-DE-VOLUMES="1" PAGINA-INICIAL="1" PAGINA-FINAL="20" NOME-DA-EDITORA="Editora"/>'
+    + AUTHORS + AREA + '</CAPITULO-DE-LIVRO-PUBLICADO>')
+
+EXPERIENCE = (
+    '<ATUACAO-PROFISSIONAL CODIGO-INSTITUICAO="{code}" NOME-INSTITUICAO="{institution}" SEQUENCIA-IMPORTANCIA="{i}">'
+    '<VINCULOS CARGA-HORARIA-SEMANAL="40" FLAG-DEDICACAO-EXCLUSIVA="SIM" MES-INICIO="02" ANO-INICIO="{start}" '
+    'MES-FIM="{end_month}" ANO-FIM="{end}" OUTRO-ENQUADRAMENTO-FUNCIONAL-INFORMADO="Professor"/>'
+    '<ATIVIDADES-DE-ENSINO>{teaching}</ATIVIDADES-DE-ENSINO>'
+    '<ATIVIDADES-DE-PESQUISA-E-DESENVOLVIMENTO><PESQUISA-E-DESENVOLVIMENTO MES-INICIO="03" ANO-INICIO="{start}" '
+    'MES-FIM="" ANO-FIM="" CODIGO-ORGAO="O{i}" NOME-ORGAO="Campus {i}"><LINHA-DE-PESQUISA '
+    'TITULO-DA-LINHA-DE-PESQUISA="Linha {i}"/></PESQUISA-E-DESENVOLVIMENTO></ATIVIDADES-DE-PESQUISA-E-DESENVOLVIMENTO>'
+    '</ATUACAO-PROFISSIONAL>')
+
+TEACHING = (
+    '<ENSINO MES-INICIO="02" ANO-INICIO="{start}" MES-FIM="12" ANO-FIM="{end}" TIPO-ENSINO="{level}" '
+    'NOME-CURSO="Tecnologia em Análise e Desenvolvimento de Sistemas"><DISCIPLINA>Disciplina {k}</DISCIPLINA>'
+    '<DISCIPLINA>Laboratório {k}</DISCIPLINA></ENSINO>')
+
+TECHNICAL = (
+    '<SOFTWARE SEQUENCIA-PRODUCAO="{i}"><DADOS-BASICOS-DO-SOFTWARE TITULO-DO-SOFTWARE="Software {i}" ANO="{year}"/>'
+    '<DETALHAMENTO-DO-SOFTWARE/>' + AUTHORS + '</SOFTWARE>'
+    '<PATENTE SEQUENCIA-PRODUCAO="{i}"><DADOS-BASICOS-DA-PATENTE TITULO="Patente {i}" ANO-DESENVOLVIMENTO="{year}" '
+    'PAIS="Brasil"/><DETALHAMENTO-DA-PATENTE INSTITUICAO-FINANCIADORA=""/></PATENTE>')
+
+OTHER_TECHNICAL = (
+    '<ORGANIZACAO-DE-EVENTO><DADOS-BASICOS-DA-ORGANIZACAO-DE-EVENTO TITULO="Evento {i}" ANO="{year}"/>'
+    + AUTHORS + '</ORGANIZACAO-DE-EVENTO>'
+    '<RELATORIO-DE-PESQUISA><DADOS-BASICOS-DO-RELATORIO-DE-PESQUISA TITULO="Relatório {i}" ANO="{year}"/>'
+    '<DETALHAMENTO-DO-RELATORIO-DE-PESQUISA NOME-DO-PROJETO="Projeto {i}"/>' + AUTHORS + '</RELATORIO-DE-PESQUISA>'
+    '<DESENVOLVIMENTO-DE-MATERIAL-DIDATICO-OU-INSTRUCIONAL><DADOS-BASICOS-DO-MATERIAL-DIDATICO-OU-INSTRUCIONAL '
+    'NATUREZA="TEXTO" TITULO="Apostila {i}" ANO="{year}" HOME-PAGE-DO-TRABALHO=""/>'
+    + AUTHORS + '</DESENVOLVIMENTO-DE-MATERIAL-DIDATICO-OU-INSTRUCIONAL>')
+
+INSTITUTIONS = ['Instituto Federal de Educação, Ciência e Tecnologia de São Paulo', 'Universidade de São Paulo',
+                'Empresa de Software Ltda', 'Universidade Estadual de Campinas']
+
+AREAS = ['Ciência da Computação', 'Educação', 'Matemática']
+
+
+def synthetic_cv(lattes_id=1, publications=100, experiences=5, technical=10, seed=None):
+    """
+    Builds a synthetic Lattes CV.
+    :param lattes_id: value of NUMERO-IDENTIFICADOR
+    :param publications: number of records in each publication section (journal, conference, chapters)
+    :param experiences: number of professional experiences, each with a few teaching entries
+    :param technical: number of records in each technical production section
+    :param seed: seed of the random generator
+    :return: the document encoded in ISO-8859-1
+    """
+    rnd = random.Random(lattes_id if seed is None else seed)
+
+    def year():
+        return rnd.randint(1995, 2025)
+
+    parts = [HEADER, '<CURRICULO-VITAE NUMERO-IDENTIFICADOR="{:016d}" DATA-ATUALIZACAO="{:02d}{:02d}{}">'.format(
+        lattes_id, rnd.randint(1, 28), rnd.randint(1, 12), rnd.randint(2018, 2025))]
+
+    parts.append('<DADOS-GERAIS NOME-COMPLETO="Professor Sintético {}"><FORMACAO-ACADEMICA-TITULACAO>'.format(lattes_id))
+
+    for level, tag in [(1, 'GRADUACAO'), (3, 'MESTRADO'), (4, 'DOUTORADO')]:
+        start = 1990 + 4 * level
+        parts.append('<{0} NIVEL="{1}" NOME-INSTITUICAO="Universidade de São Paulo" NOME-CURSO="Ciência da Computação" '
+                     'STATUS-DO-CURSO="CONCLUIDO" ANO-DE-INICIO="{2}" ANO-DE-CONCLUSAO="{3}"/>'.format(
+                         tag, level, start, start + 3))
+
+    parts.append('</FORMACAO-ACADEMICA-TITULACAO><ATUACOES-PROFISSIONAIS>')
+
+    for i in range(experiences):
+        start = rnd.randint(1995, 2020)
+        teaching = ''.join(TEACHING.format(start=start + k, end=start + k + 1, k=k,
+                                           level=rnd.choice(['GRADUACAO', 'ENSINO-MEDIO'])) for k in range(4))
+        parts.append(EXPERIENCE.format(i=i + 1, code='I{}'.format(i), institution=INSTITUTIONS[i % len(INSTITUTIONS)],
+                                       start=start, end='' if i == 0 else start + 5, end_month='' if i == 0 else '12',
+                                       teaching=teaching))
+
+    parts.append('</ATUACOES-PROFISSIONAIS></DADOS-GERAIS><PRODUCAO-BIBLIOGRAFICA><TRABALHOS-EM-EVENTOS>')
+
+    parts.extend(CONFERENCE_PAPER.format(i=i, j=i % 50, year=year(), nature=rnd.choice(['COMPLETO', 'RESUMO']),
+                                         area=rnd.choice(AREAS)) for i in range(publications))
+
+    parts.append('</TRABALHOS-EM-EVENTOS><ARTIGOS-PUBLICADOS>')
+
+    parts.extend(JOURNAL_PAPER.format(i=i, j=i % 50, year=year(), doi='10.1000/{}.{}'.format(lattes_id, i),
+                                      area=rnd.choice(AREAS)) for i in range(publications))
+
+    parts.append('</ARTIGOS-PUBLICADOS><LIVROS-E-CAPITULOS><CAPITULOS-DE-LIVROS-PUBLICADOS>')
+
+    parts.extend(CHAPTER.format(i=i, j=i % 50, year=year(), area=rnd.choice(AREAS))
+                 for i in range(publications))
+
+    parts.append('</CAPITULOS-DE-LIVROS-PUBLICADOS></LIVROS-E-CAPITULOS></PRODUCAO-BIBLIOGRAFICA><PRODUCAO-TECNICA>')
+
+    parts.extend(TECHNICAL.format(i=i, year=year()) for i in range(technical))
+
+    parts.append('<DEMAIS-TIPOS-DE-PRODUCAO-TECNICA>')
+
+    parts.extend(OTHER_TECHNICAL.format(i=i, year=year()) for i in range(technical))
+
+    parts.append('</DEMAIS-TIPOS-DE-PRODUCAO-TECNICA></PRODUCAO-TECNICA></CURRICULO-VITAE>')
+
+    return ''.join(parts).encode('iso-8859-1')
+
+
+def synthetic_archive(cv):
+    """
+    Packs a CV as the curriculo.xml member of a zip archive, as exported by the Lattes platform.
+    """
+    buffer = io.BytesIO()
+
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('curriculo.xml', cv)
+
+    return buffer.getvalue()
@@ -1,49 +1,110 @@
+import argparse
 import os
-import pandas as pd
 import shutil
 
+from datetime import datetime
+
+import pandas as pd
 
-from mecip import ProfessorIndexExtractor
-from mecip import process_file
+from mecip.cache import ParsedCVCache
+from mecip.incremental import IndexStateStore
+from mecip.index_extractor import ProfessorIndexExtractor
+from mecip.output import CsvChunkWriter
+from mecip.xml_dispatcher import dispatch_information
+from mecip.xml_parser import extract_information
+from mecip.xml_parser import iterate_directory
+
+# engines parsing the CVs: whether the document is streamed, and the function building the CV from the tree
+ENGINES = {
+    'dispatch': (False, dispatch_information),
+    'xpath': (False, extract_information),
+    'streaming': (True, extract_information),
+}
 
 if __name__ == '__main__':
 
-    extractor = ProfessorIndexExtractor()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='number of processes used to parse the CVs')
+    parser.add_argument('--index-workers', type=int, default=1,
+                        help='number of processes used to compute the indices')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='dispatch',
+                        help='engine used to parse the CVs: a single walk of the tree (dispatch), one XPath query '
+                             'per field (xpath) or a streaming parse holding one record at a time (streaming)')
+    parser.add_argument('--cache', default=None, help='directory of the parsed CVs cache (disabled when omitted)')
+    parser.add_argument('--indicators', nargs='+', default=None, help='output columns (all of them when omitted)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='number of rows written to the output at a time')
+    parser.add_argument('--state', default=None,
+                        help='directory of the state of the previous run; only new or updated CVs are recomputed, '
+                             'besides all of them in a new reference year, or in a new month when ultima_atualizacao '
+                             'or xp_profissional are computed')
+    parser.add_argument('--reference-date', type=lambda d: datetime.strptime(d, '%Y-%m-%d').date(), default=None,
+                        help='date the indices refer to, as YYYY-MM-DD (today when omitted)')
+    parser.add_argument('--window-years', type=int, default=3,
+                        help='number of years before the reference year whose productions are counted')
+    parser.add_argument('--series', type=int, nargs='+', default=None,
+                        help='reference years of the window indicators written to series.csv')
+    parser.add_argument('--run-rows', type=int, default=100000,
+                        help='number of rows sorted in memory before the output is sorted by an external merge')
+    args = parser.parse_args()
+
+    extractor = ProfessorIndexExtractor(reference_date=args.reference_date, window_years=args.window_years)
+
+    # the output is sorted by nome, so it is always computed
+    indicators = args.indicators if args.indicators is None or 'nome' in args.indicators else \
+        ['nome'] + args.indicators
 
     INPUT_PATH, OUTPUT_PATH = './lattes', './output'
 
     if os.path.exists(OUTPUT_PATH):
         shutil.rmtree(OUTPUT_PATH)
 
-    raw_data = [process_file(os.path.join(INPUT_PATH, filename)) for filename in os.listdir(INPUT_PATH)]
+    cache = ParsedCVCache(args.cache) if args.cache is not None else None
 
-    pd.set_option('display.max_columns', None)
-    pd.set_option('display.width', 1024)
+    streaming, engine = ENGINES[args.engine]
 
-    output = extractor.compute_index(raw_data)
+    fields = extractor.fields(indicators)
 
-    os.mkdir(OUTPUT_PATH)
+    if args.state is not None:
+        # the incremental mode keys the stored rows by lattes id and data-atualizacao
+        fields = tuple(sorted(set(fields) | {'lattes_url', 'last_update'}))
 
-    output.sort_values('nome', inplace=True)
-    output.to_csv(os.path.join(OUTPUT_PATH, 'indices.csv'), sep=',', header=True, encoding='iso-8859-1', index=False)
+    if args.series is not None:
+        fields = tuple(sorted(set(fields) | set(extractor.SERIES_FIELDS)))
 
-    for k, v in {'log': extractor.logging, 'errors': extractor.inconsistencies}.items():
+    def parsed_cvs():
+        for file_path, cv, error in iterate_directory(INPUT_PATH, workers=args.workers, streaming=streaming,
+                                                      cache=cache, fields=fields, engine=engine):
+            if error is None:
+                yield cv
+            else:
+                print('Could not parse {}: {}'.format(file_path, error))
 
-        for key, items in v.items():
+    os.mkdir(OUTPUT_PATH)
 
-            directory_path = os.path.join(OUTPUT_PATH, key)
+    if args.state is None:
+        result = extractor.new_result(indicators)
 
-            if not os.path.exists(directory_path):
-                os.makedirs(directory_path)
+        with CsvChunkWriter(os.path.join(OUTPUT_PATH, 'indices.csv'), sort_by='nome',
+                            run_rows=args.run_rows) as writer:
+            for chunk in extractor.iterate_index(parsed_cvs(), indicators=indicators, chunk_size=args.chunk_size,
+                                                workers=args.index_workers, result=result):
+                writer.write(chunk)
+    else:
+        result, delta, recomputed = IndexStateStore(args.state).update(extractor, parsed_cvs(), indicators=indicators,
+                                                                       workers=args.index_workers)
 
-            with open(os.path.join(directory_path, k + '.txt'), mode='w+', encoding='iso-8859-1') as file:
-                for group, value in items.items():
-                    file.write(group + '\n')
-                    for _v_ in value:
-                        for line in _v_.split('\n'):
-                            file.write('   ' + line + '\n')
-                    file.write('\n')
+        print('{} of {} CVs recomputed'.format(recomputed, len(result.rows)))
 
+        with CsvChunkWriter(os.path.join(OUTPUT_PATH, 'indices.csv'), sort_by='nome',
+                            run_rows=args.run_rows) as writer:
+            writer.write(pd.DataFrame(result.rows, columns=result.columns, dtype=object))
 
+        delta.to_csv(os.path.join(OUTPUT_PATH, 'delta.csv'), index=False, encoding='iso-8859-1')
 
+    if args.series is not None:
+        # a second reading of the CVs, cheap with --cache; the years are computed in a single pass
+        extractor.compute_series(parsed_cvs(), args.series).to_csv(
+            os.path.join(OUTPUT_PATH, 'series.csv'), index=False, encoding='iso-8859-1')
 
+    for k, v in {'log': result.logging, 'errors': result.inconsistencies}.items():
+        v.write_text(OUTPUT_PATH, k + '.txt')
@@ -0,0 +1,262 @@
+import csv
+import re
+import unicodedata
+
+# CNPq table of knowledge areas: grandes áreas, their áreas and the subáreas used by the indicators; the
+# complete table can be read with load_taxonomy
+CNPQ_AREAS = [
+    ('Ciências Exatas e da Terra', [
+        ('Matemática', ['Álgebra', 'Análise', 'Geometria e Topologia', 'Matemática Aplicada']),
+        ('Probabilidade e Estatística', ['Probabilidade', 'Estatística',
+                                         'Probabilidade e Estatística Aplicadas']),
+        ('Ciência da Computação', ['Teoria da Computação', 'Matemática da Computação',
+                                   'Metodologia e Técnicas da Computação', 'Sistemas de Computação']),
+        ('Astronomia', []),
+        ('Física', []),
+        ('Química', []),
+        ('Geociências', []),
+        ('Oceanografia', []),
+    ]),
+    ('Ciências Biológicas', [
+        ('Biologia Geral', []), ('Genética', []), ('Botânica', []), ('Zoologia', []), ('Ecologia', []),
+        ('Morfologia', []), ('Fisiologia', []), ('Bioquímica', []), ('Biofísica', []), ('Farmacologia', []),
+        ('Imunologia', []), ('Microbiologia', []), ('Parasitologia', []),
+    ]),
+    ('Engenharias', [
+        ('Engenharia Civil', []), ('Engenharia de Minas', []), ('Engenharia de Materiais e Metalúrgica', []),
+        ('Engenharia Elétrica', ['Materiais Elétricos',
+                                 'Medidas Elétricas, Magnéticas e Eletrônicas; Instrumentação',
+                                 'Circuitos Elétricos, Magnéticos e Eletrônicos', 'Sistemas Elétricos de Potência',
+                                 'Eletrônica Industrial, Sistemas e Controles Eletrônicos', 'Telecomunicações']),
+        ('Engenharia Mecânica', []), ('Engenharia Química', []), ('Engenharia Sanitária', []),
+        ('Engenharia de Produção', []), ('Engenharia Nuclear', []), ('Engenharia de Transportes', []),
+        ('Engenharia Naval e Oceânica', []), ('Engenharia Aeroespacial', []), ('Engenharia Biomédica', []),
+    ]),
+    ('Ciências da Saúde', [
+        ('Medicina', []), ('Odontologia', []), ('Farmácia', []), ('Enfermagem', []), ('Nutrição', []),
+        ('Saúde Coletiva', []), ('Fonoaudiologia', []), ('Fisioterapia e Terapia Ocupacional', []),
+        ('Educação Física', []),
+    ]),
+    ('Ciências Agrárias', [
+        ('Agronomia', []), ('Recursos Florestais e Engenharia Florestal', []), ('Engenharia Agrícola', []),
+        ('Zootecnia', []), ('Medicina Veterinária', []), ('Recursos Pesqueiros e Engenharia de Pesca', []),
+        ('Ciência e Tecnologia de Alimentos', []),
+    ]),
+    ('Ciências Sociais Aplicadas', [
+        ('Direito', []), ('Administração', []), ('Economia', []), ('Arquitetura e Urbanismo', []),
+        ('Planejamento Urbano e Regional', []), ('Demografia', []), ('Ciência da Informação', []),
+        ('Museologia', []), ('Comunicação', []), ('Serviço Social', []), ('Economia Doméstica', []),
+        ('Desenho Industrial', []), ('Turismo', []),
+    ]),
+    ('Ciências Humanas', [
+        ('Filosofia', []), ('Sociologia', []), ('Antropologia', []), ('Arqueologia', []), ('História', []),
+        ('Geografia', []), ('Psicologia', []),
+        ('Educação', ['Fundamentos da Educação', 'Administração Educacional',
+                      'Planejamento e Avaliação Educacional', 'Ensino-Aprendizagem', 'Currículo',
+                      'Orientação e Aconselhamento', 'Tópicos Específicos de Educação']),
+        ('Ciência Política', []), ('Teologia', []),
+    ]),
+    ('Lingüística, Letras e Artes', [
+        ('Lingüística', []), ('Letras', []), ('Artes', []),
+    ]),
+    ('Outros', [
+        ('Bioética', []), ('Ciências Ambientais', []), ('Defesa', []), ('Divulgação Científica', []),
+        ('Microeletrônica', []), ('Robótica, Mecatrônica e Automação', []), ('Biotecnologia', []),
+    ]),
+]
+
+
+NON_ALPHANUMERIC = re.compile(r'[\W_]+')
+
+
+def normalize_area(name):
+    """
+    Comparison key of an area name: without accents, lowercased and with every run of characters other than
+    letters and digits turned into a space, so the codes of the Lattes files (CIENCIAS_EXATAS_E_DA_TERRA)
+    and the names of the CNPq table (Ciências Exatas e da Terra) give the same key.
+    """
+    if name is None:
+        return ''
+
+    name = str(name)
+
+    if not name.isascii():
+        name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+
+    return NON_ALPHANUMERIC.sub(' ', name.lower()).strip()
+
+
+class AreaNode(object):
+    """
+    Node of the area taxonomy. The key is the path of normalized names from the grande área; ancestors
+    holds the keys of the node and of all the nodes above it, so subtree membership is a set lookup.
+    """
+
+    __slots__ = ('name', 'key', 'parent', 'ancestors')
+
+    def __init__(self, name, key, parent):
+        self.name = name
+        self.key = key
+        self.parent = parent
+        self.ancestors = frozenset([key]) | (parent.ancestors if parent is not None else frozenset())
+
+    def __repr__(self):
+        return 'AreaNode({!r})'.format(self.name)
+
+
+class AreaTaxonomy(object):
+    """
+    Indexed tree of knowledge areas (grande área, área, subárea). Nodes are indexed by the normalized path
+    and, when unambiguous, by the normalized name alone, and the areas of the publications, tuples of the
+    form (big_area, area, sub_area) as given by xml_parser.extract_publication_areas, are resolved to the
+    deepest known node. Resolutions are memoized by the raw tuple, so every distinct tuple is normalized
+    once however many publications carry it.
+    """
+
+    def __init__(self, paths):
+        """
+        :param paths: iterable of (grande área, área, subárea) tuples; shorter tuples and empty trailing
+        names add the upper levels only
+        """
+        self.nodes = {}
+        self.names = {}
+        self.resolved = {}
+
+        ambiguous = set()
+
+        for path in paths:
+
+            parent = None
+
+            for name in path:
+
+                if name is None or str(name).strip() == '':
+                    break
+
+                key = (parent.key if parent is not None else ()) + (normalize_area(name),)
+
+                if key not in self.nodes:
+                    self.nodes[key] = AreaNode(str(name).strip(), key, parent)
+
+                    if key[-1] in self.names:
+                        ambiguous.add(key[-1])
+                    self.names[key[-1]] = self.nodes[key]
+
+                parent = self.nodes[key]
+
+        for name in ambiguous:
+            del self.names[name]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def find(self, area):
+        """
+        Node of an area given by name or by path (grande área, área, subárea).
+        :raise ValueError: if the area is not in the taxonomy
+        """
+        if isinstance(area, (tuple, list)):
+            node = self.nodes.get(tuple(normalize_area(a) for a in area if a))
+        else:
+            node = self.names.get(normalize_area(area))
+
+        if node is None:
+            raise ValueError('Unknown knowledge area: {}'.format(area))
+
+        return node
+
+    def resolve(self, area):
+        """
+        Deepest node of the taxonomy matching an area tuple (big_area, area, sub_area). Names missing from
+        the taxonomy leave the node at the level above; an área or subárea is also found by its name alone
+        when the levels above it do not match.
+        :return: the AreaNode, or None if no level matches
+        """
+        try:
+            return self.resolved[area]
+        except KeyError:
+            pass
+
+        names = [normalize_area(name) for name in area][:3]
+        names += [''] * (3 - len(names))
+
+        node = self.nodes.get((names[0],))
+
+        for name in names[1:]:
+
+            if name == '':
+                break
+
+            child = self.nodes.get(node.key + (name,)) if node is not None else None
+
+            if child is None and (node is None or len(node.key) == 1):
+                child = self.names.get(name)
+
+            if child is None:
+                break
+
+            node = child
+
+        self.resolved[area] = node
+
+        return node
+
+
+class AreaClassifier(object):
+    """
+    Tells whether the areas of a publication fall in the subtree of any of the target areas, from the
+    ancestor sets of the taxonomy. Answers are memoized by area tuple.
+    """
+
+    def __init__(self, taxonomy, targets):
+        """
+        :param taxonomy: the AreaTaxonomy
+        :param targets: target areas, by name or by path (see AreaTaxonomy.find)
+        """
+        self.taxonomy = taxonomy
+        self.targets = frozenset(taxonomy.find(target).key for target in targets)
+        self.answers = {}
+
+    def matches(self, area):
+        try:
+            return self.answers[area]
+        except KeyError:
+            pass
+
+        node = self.taxonomy.resolve(area)
+
+        answer = node is not None and not node.ancestors.isdisjoint(self.targets)
+
+        self.answers[area] = answer
+
+        return answer
+
+    def any_matches(self, areas):
+        """
+        Whether any of the area tuples of a publication is in the target subtrees.
+        """
+        for area in areas:
+            if self.matches(tuple(area)):
+                return True
+        return False
+
+
+def load_taxonomy(file_path, delimiter=';', encoding='utf-8'):
+    """
+    Reads a taxonomy from a CSV file with one (grande área, área, subárea) path per line and no header,
+    e.g. the complete CNPq table.
+    """
+    with open(file_path, mode='r', encoding=encoding, newline='') as file:
+        return AreaTaxonomy([tuple(line) for line in csv.reader(file, delimiter=delimiter) if len(line) > 0])
+
+
+def default_paths():
+    for big_area, areas in CNPQ_AREAS:
+        yield (big_area,)
+        for area, sub_areas in areas:
+            yield big_area, area
+            for sub_area in sub_areas:
+                yield big_area, area, sub_area
+
+
+CNPQ_TAXONOMY = AreaTaxonomy(default_paths())
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+
+from datetime import datetime
+
+from mecip.xml_parser import SCHEMA_VERSION
+from mecip.xml_parser import diff_month
+from mecip.xml_parser import extract_information
+from mecip.xml_parser import process_file
+from mecip.xml_parser import projection
+
+
+class ParsedCVCache(object):
+    """
+    On-disk cache of parsed CVs keyed by the content of the Lattes file. Entries hold the output of
+    extract_information as a compressed pickle, one file per entry, and the least recently used
+    entries are evicted once the cache grows beyond max_bytes. The parser SCHEMA_VERSION is part of
+    every key, so entries written by an older parser are never read and age out of the cache. So is the
+    field projection, so projected and complete CVs are stored as separate entries.
+    """
+
+    EXTENSION = '.cv'
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, content, fields=None):
+        digest = hashlib.blake2b(content, digest_size=20)
+        digest.update(str(SCHEMA_VERSION).encode())
+        if fields is not None:
+            digest.update(','.join(projection(fields)).encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.EXTENSION)
+
+    def get(self, key):
+
+        path = self.path(key)
+
+        try:
+            with open(path, mode='rb') as file:
+                value = pickle.loads(zlib.decompress(file.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            return None
+
+        # refreshes the access time used by the LRU eviction
+        os.utime(path)
+
+        return value
+
+    def put(self, key, value):
+
+        content = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+        # written to a temporary file first, so concurrent readers never see a partial entry
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+
+        with os.fdopen(descriptor, mode='wb') as file:
+            file.write(content)
+
+        try:
+            replaced = os.stat(self.path(key)).st_size
+        except OSError:
+            replaced = 0
+
+        os.replace(temporary_path, self.path(key))
+
+        if self.size is None:
+            self.size = self.disk_usage()
+        else:
+            self.size += len(content) - replaced
+
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        result = []
+
+        for filename in os.listdir(self.directory):
+            if filename.endswith(self.EXTENSION):
+                try:
+                    stat = os.stat(os.path.join(self.directory, filename))
+                    result.append((stat.st_mtime, stat.st_size, filename))
+                except OSError:
+                    pass
+
+        return result
+
+    def disk_usage(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = sorted(self.entries())
+
+        size = sum(size for _, size, _ in entries)
+
+        for _, entry_size, filename in entries:
+
+            if size <= self.max_bytes:
+                break
+
+            try:
+                os.remove(os.path.join(self.directory, filename))
+                size -= entry_size
+            except OSError:
+                pass
+
+        self.size = size
+
+    def process_file(self, file_path, streaming=False, fields=None, engine=extract_information):
+        """
+        Cached counterpart of xml_parser.process_file.
+        """
+        with open(file_path, mode='rb') as file:
+            key = self.key(file.read(), fields=fields)
+
+        value = self.get(key)
+
+        if value is None:
+            value = process_file(file_path, streaming=streaming, fields=fields, engine=engine)
+            self.put(key, value)
+
+        elif 'last_update' in value:
+            value['months_from_last_update'] = diff_month(datetime.now(), value['last_update'])
+
+        return value
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+from mecip.areas import normalize_area
+from mecip.corpus import table_items
+from mecip.dedup import VENUE_FIELDS
+from mecip.dedup import publication_key
+from mecip.index_extractor import format_personal_name
+
+# year of the publications without one; they are only counted by queries without a time window
+UNKNOWN_YEAR = 0
+
+COLLABORATION_COLUMNS = ['name', 'professor', 'publications', 'collaborators']
+
+COLLABORATOR_COLUMNS = ['author', 'name', 'professor', 'publications']
+
+
+def author_key(name):
+    """
+    Comparison key of a personal name, in citation form (Silva, José Carlos) or not (José Carlos Silva):
+    the name as given by format_personal_name, without accents, case and punctuation.
+    """
+    return normalize_area(format_personal_name(str(name)))
+
+
+class CoauthorshipGraph(object):
+    """
+    Co-authorship graph of a corpus in compressed sparse row form: the joint publications of author i are
+    the positions indptr[i]:indptr[i + 1] of indices (the co-author), publications (the publication) and
+    years (its year), sorted by co-author. No Python object is kept per edge, and the arrays of adjacency
+    are those of a scipy.sparse.csr_matrix((weights, indices, indptr)).
+
+    Nodes 0 to professors - 1 are the CVs of the corpus, in input order; the other nodes are the authors
+    that could not be resolved to a professor.
+    """
+
+    def __init__(self, names, professors, indptr, indices, publications, years):
+        self.names = names
+        self.professors = professors
+        self.indptr = indptr
+        self.indices = indices
+        self.publications = publications
+        self.years = years
+
+    def __len__(self):
+        return len(self.names)
+
+    def sources(self):
+        """
+        Author of every position of the edge arrays.
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+
+    def window(self, start=None, end=None, first=0, last=None):
+        """
+        Mask of the positions first:last of the edge arrays whose publication is in the years start to end,
+        both inclusive; None leaves a side of the window open.
+        """
+        years = self.years[first:last]
+
+        mask = np.ones(len(years), dtype=bool)
+
+        if start is not None:
+            mask &= years >= start
+        if end is not None:
+            mask &= (years <= end) & (years != UNKNOWN_YEAR)
+
+        return mask
+
+    def collaborators(self, author, start=None, end=None):
+        """
+        Co-authors of an author, with the number of their joint publications in the time window.
+        :param author: node of the author
+        :return: a DataFrame with the COLLABORATOR_COLUMNS, one row per co-author
+        """
+        first, last = self.indptr[author], self.indptr[author + 1]
+
+        selected = self.window(start, end, first, last)
+
+        authors, counts = np.unique(self.indices[first:last][selected], return_counts=True)
+
+        return pd.DataFrame({'author': authors, 'name': [self.names[a] for a in authors],
+                             'professor': authors < self.professors, 'publications': counts},
+                            columns=COLLABORATOR_COLUMNS)
+
+    def adjacency(self, start=None, end=None):
+        """
+        Weighted adjacency of the authors in the time window, where the weight of a pair is its number of
+        joint publications.
+        :return: a tuple (indptr, indices, weights) in compressed sparse row form
+        """
+        selected = self.window(start, end)
+
+        # the positions of each author are sorted by co-author, so equal pairs are contiguous
+        pairs = self.sources()[selected] * len(self) + self.indices[selected]
+
+        pairs, weights = np.unique(pairs, return_counts=True)
+
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs // len(self), minlength=len(self)), out=indptr[1:])
+
+        return indptr, pairs % len(self), weights
+
+    def collaboration_counts(self, start=None, end=None):
+        """
+        Collaboration of every author in the time window: the number of its publications with at least one
+        co-author and the number of distinct co-authors.
+        :return: a DataFrame indexed by node with the COLLABORATION_COLUMNS
+        """
+        selected = self.window(start, end)
+
+        size = self.publications.max(initial=0) + 1
+
+        # distinct (author, publication) pairs
+        publications = np.unique(self.sources()[selected] * size + self.publications[selected])
+
+        indptr, _, _ = self.adjacency(start, end)
+
+        return pd.DataFrame({'name': self.names,
+                             'professor': np.arange(len(self)) < self.professors,
+                             'publications': np.bincount(publications // size, minlength=len(self)),
+                             'collaborators': np.diff(indptr)}, columns=COLLABORATION_COLUMNS)
+
+    def components(self, start=None, end=None):
+        """
+        Connected components of the co-authorship in the time window, by label propagation over the edge
+        arrays: every author takes the smallest label of its co-authors, and labels are followed to their own
+        label (pointer jumping) until none changes.
+        :return: an array with the component of every node, numbered by its smallest node
+        """
+        selected = self.window(start, end)
+
+        sources, targets = self.sources()[selected], self.indices[selected]
+
+        labels = np.arange(len(self), dtype=np.int64)
+
+        while True:
+
+            propagated = labels.copy()
+            np.minimum.at(propagated, sources, labels[targets])
+
+            propagated = propagated[propagated]
+
+            if np.array_equal(propagated, labels):
+                return labels
+
+            labels = propagated
+
+
+def coauthorship_graph(cvs):
+    """
+    Builds the co-authorship graph of a corpus. The authors of every publication (see dedup.VENUE_FIELDS)
+    are resolved to the professors of the corpus by author_key, the owner of the CV being always one of
+    them; professors sharing a key are left unresolved. A publication listed by several CVs, as identified
+    by dedup.publication_key, is counted once.
+    :param cvs: parsed CVs, either dictionaries or mecip.records.Curriculum instances
+    :return: the CoauthorshipGraph
+    """
+    cvs = list(cvs)
+
+    names = [cv.get('name') for cv in cvs]
+
+    nodes = {}
+
+    for professor, name in enumerate(names):
+        key = author_key(name) if name else None
+        nodes[key] = None if key in nodes else professor
+
+    nodes = {key: node for key, node in nodes.items() if key is not None and node is not None}
+
+    keys = {}
+
+    def node(author):
+        try:
+            key = keys[author]
+        except KeyError:
+            key = keys[author] = author_key(author)
+
+        if key not in nodes:
+            nodes[key] = len(names)
+            names.append(format_personal_name(str(author)))
+
+        return nodes[key]
+
+    publications, authors, years, seen = [], [], [], set()
+
+    for professor, cv in enumerate(cvs):
+        for section in VENUE_FIELDS:
+            for _, publication in table_items(cv, section):
+
+                key = publication_key(section, publication)
+
+                if key is not None and key in seen:
+                    continue
+
+                seen.add(key)
+
+                ids = [professor] + [node(a) for a in publication.get('authors') or []]
+
+                publications.extend([len(years)] * len(ids))
+                authors.extend(ids)
+                years.append(publication.get('year') or UNKNOWN_YEAR)
+
+    # one (publication, author) pair per author of every publication, sorted by publication
+    pairs = np.unique(np.array(publications, dtype=np.int64) * len(names) + np.array(authors, dtype=np.int64))
+    publications, authors = pairs // len(names), pairs % len(names)
+
+    sources, targets, edge_publications = [], [], []
+
+    # the authors of a publication are contiguous, so its pairs are the rows at distances 1, 2, ... with the
+    # same publication, up to its number of authors
+    for distance in range(1, len(publications)):
+
+        same = publications[distance:] == publications[:-distance]
+
+        if not same.any():
+            break
+
+        first, second = authors[:-distance][same], authors[distance:][same]
+
+        sources.extend([first, second])
+        targets.extend([second, first])
+        edge_publications.extend([publications[distance:][same]] * 2)
+
+    sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+    targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+    edge_publications = np.concatenate(edge_publications) if edge_publications else np.zeros(0, dtype=np.int64)
+
+    order = np.lexsort((edge_publications, targets, sources))
+
+    indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(names)), out=indptr[1:])
+
+    return CoauthorshipGraph(names, len(cvs), indptr, targets[order], edge_publications[order],
+                             np.array(years, dtype=np.int64)[edge_publications[order]])
@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+INTEGER = 'Int64'
+
+FLAG = 'boolean'
+
+DATE = 'datetime64[ns]'
+
+TEXT = 'object'
+
+# column type of every table of the corpus; lattes_id comes first in all of them
+TABLES = {
+    'curricula': [
+        ('lattes_id', TEXT), ('name', TEXT), ('lattes_url', TEXT), ('last_update', DATE),
+        ('months_from_last_update', INTEGER)],
+    'professional_experience': [
+        ('lattes_id', TEXT), ('experience', INTEGER), ('company_code', TEXT), ('company_name', TEXT),
+        ('position', TEXT), ('weekly_workload', INTEGER), ('exclusive_dedication', FLAG), ('order', INTEGER),
+        ('start', TEXT), ('end', TEXT)],
+    'teaching': [
+        ('lattes_id', TEXT), ('experience', INTEGER), ('level', TEXT), ('course', TEXT), ('start', TEXT),
+        ('end', TEXT), ('classes', TEXT)],
+    'research_and_development': [
+        ('lattes_id', TEXT), ('experience', INTEGER), ('company_code', TEXT), ('company_name', TEXT),
+        ('start', TEXT), ('end', TEXT), ('research_lines', TEXT)],
+    'education': [
+        ('lattes_id', TEXT), ('level_code', TEXT), ('level', TEXT), ('start', INTEGER), ('end', INTEGER),
+        ('completed', FLAG), ('course', TEXT), ('institution', TEXT)],
+    'journal_papers': [
+        ('lattes_id', TEXT), ('title', TEXT), ('year', INTEGER), ('journal', TEXT), ('start_page', TEXT),
+        ('end_page', TEXT), ('volume', TEXT), ('issn', TEXT), ('doi', TEXT), ('authors', TEXT), ('areas', TEXT)],
+    'books_and_chapters': [
+        ('lattes_id', TEXT), ('type', TEXT), ('title', TEXT), ('year', INTEGER), ('book', TEXT), ('publisher', TEXT),
+        ('volume', INTEGER), ('pages', INTEGER), ('start_page', TEXT), ('end_page', TEXT), ('doi', TEXT),
+        ('authors', TEXT), ('areas', TEXT)],
+    'conference_papers': [
+        ('lattes_id', TEXT), ('type', TEXT), ('title', TEXT), ('year', INTEGER), ('conference', TEXT),
+        ('volume', TEXT), ('country', TEXT), ('authors', TEXT), ('areas', TEXT)],
+    'translations': [
+        ('lattes_id', TEXT), ('title', TEXT), ('year', INTEGER), ('authors', TEXT), ('areas', TEXT)],
+    'patents': [
+        ('lattes_id', TEXT), ('title', TEXT), ('year', INTEGER), ('country', TEXT), ('sponsor', TEXT)],
+    'software': [
+        ('lattes_id', TEXT), ('title', TEXT), ('year', INTEGER), ('registered', FLAG), ('authors', TEXT)],
+    'event_organization': [
+        ('lattes_id', TEXT), ('title', TEXT), ('year', INTEGER), ('authors', TEXT)],
+    'scientific_reports': [
+        ('lattes_id', TEXT), ('title', TEXT), ('year', INTEGER), ('project', TEXT), ('authors', TEXT)],
+    'courseware': [
+        ('lattes_id', TEXT), ('type', TEXT), ('title', TEXT), ('year', INTEGER), ('link', TEXT), ('authors', TEXT)],
+}
+
+
+def lattes_id_from_url(url):
+    return None if url is None else str(url).rstrip('/').rsplit('/', 1)[-1]
+
+
+def experience_items(cv, key):
+    """
+    Items nested in the professional experiences (teaching, research_and_development), each paired with
+    the position of its experience, which is the experience column of the professional_experience table.
+    """
+    return [(i, item) for i, e in enumerate(cv.get('professional_experience') or []) for item in e[key]]
+
+
+def table_items(cv, table):
+    """
+    Rows of a table contributed by a CV, as (position of the experience or None, item) tuples.
+    """
+    if table == 'curricula':
+        return [(None, cv)]
+
+    if table == 'professional_experience':
+        return list(enumerate(cv.get('professional_experience') or []))
+
+    if table in ('teaching', 'research_and_development'):
+        return experience_items(cv, table)
+
+    if table in ('journal_papers', 'books_and_chapters', 'conference_papers', 'translations'):
+        return [(None, item) for item in (cv.get('publications') or {}).get(table, [])]
+
+    return [(None, item) for item in cv.get(table) or []]
+
+
+class ColumnBuffer(object):
+    """
+    Pre-sized buffer of a column. Integer and flag columns are filled into NumPy arrays with a missing
+    value mask and become pandas nullable arrays without any conversion pass.
+    """
+
+    def __init__(self, dtype, size):
+        self.dtype = dtype
+
+        if dtype == INTEGER:
+            self.values = np.zeros(size, dtype=np.int64)
+        elif dtype == FLAG:
+            self.values = np.zeros(size, dtype=bool)
+        else:
+            self.values = np.empty(size, dtype=object)
+
+        self.mask = np.zeros(size, dtype=bool)
+
+    def __setitem__(self, i, value):
+        if value is None:
+            self.mask[i] = True
+        elif self.dtype in (INTEGER, FLAG) and not isinstance(value, (int, bool)):
+            raise TypeError('{!r} is not a valid {} value'.format(value, self.dtype))
+        else:
+            self.values[i] = value
+
+    def array(self):
+        if self.dtype == INTEGER:
+            return pd.arrays.IntegerArray(self.values, self.mask)
+
+        if self.dtype == FLAG:
+            return pd.arrays.BooleanArray(self.values, self.mask)
+
+        if self.dtype == DATE:
+            return pd.to_datetime(self.values).astype(DATE)
+
+        return self.values
+
+
+def corpus_tables(cvs, tables=None):
+    """
+    Builds a columnar corpus: one DataFrame per section of the parsed CVs, where each row is a record of
+    a CV keyed by its lattes_id. Rows nested in a professional experience (teaching and research and
+    development) also carry the experience column, which joins them to the professional_experience table.
+    The rows of each table are counted first, so every column is filled into a buffer of its final size.
+    :param cvs: parsed CVs, either dictionaries or mecip.records.Curriculum instances
+    :param tables: names of the tables to build (see TABLES); None builds all of them
+    :return: a dictionary of DataFrames keyed by table name
+    """
+    cvs = list(cvs)
+
+    result = {}
+
+    for table in TABLES if tables is None else tables:
+
+        columns = TABLES[table]
+
+        items = [(lattes_id_from_url(cv.get('lattes_url')), table_items(cv, table)) for cv in cvs]
+
+        size = sum(len(i) for _, i in items)
+
+        buffers = [(column, ColumnBuffer(dtype, size)) for column, dtype in columns]
+
+        row = 0
+
+        for lattes_id, cv_items in items:
+            for experience, item in cv_items:
+                for column, buffer in buffers:
+                    if column == 'lattes_id':
+                        buffer[row] = lattes_id
+                    elif column == 'experience':
+                        buffer[row] = experience
+                    else:
+                        buffer[row] = item.get(column)
+                row += 1
+
+        result[table] = pd.DataFrame({column: buffer.array() for column, buffer in buffers})
+
+    return result
+
+
+def save_corpus(tables, directory):
+    """
+    Stores the tables of a columnar corpus in a directory, one compressed pickle per table, keeping the
+    column types.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    for table, df in tables.items():
+        df.to_pickle(os.path.join(directory, table + '.pkl.gz'))
+
+
+def load_corpus(directory):
+    """
+    Reads the tables stored by save_corpus.
+    """
+    suffix = '.pkl.gz'
+
+    return {
+        filename[:-len(suffix)]: pd.read_pickle(os.path.join(directory, filename))
+        for filename in sorted(os.listdir(directory)) if filename.endswith(suffix)}
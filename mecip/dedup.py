@@ -0,0 +1,281 @@
+import re
+
+import pandas as pd
+
+from mecip.areas import normalize_area
+from mecip.corpus import table_items
+from mecip.incremental import cv_version
+from mecip.incremental import read_state
+from mecip.incremental import write_state
+from mecip.productions import COLUMN_RULES
+
+# sections of the parsed CVs holding the publications, with the fields naming their venue, in order of
+# preference (the book of a chapter, the publisher of a book)
+VENUE_FIELDS = {
+    'journal_papers': ('journal',),
+    'books_and_chapters': ('book', 'publisher'),
+    'conference_papers': ('conference',),
+    'translations': (),
+}
+
+DOI_PREFIX = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+
+COUNT_COLUMNS = ['listed', 'distinct']
+
+
+def normalize_doi(doi):
+    """
+    Comparison key of a DOI: lowercased and without the resolver or doi: prefix.
+    :return: the key, or None if the field does not hold a DOI (they all start with 10.)
+    """
+    if doi is None:
+        return None
+
+    doi = DOI_PREFIX.sub('', str(doi).strip()).lower()
+
+    return doi if doi.startswith('10.') else None
+
+
+def publication_key(section, publication):
+    """
+    Key identifying a publication across CVs: its DOI or, without one, the title, year and venue, compared
+    without accents, case and punctuation (see areas.normalize_area).
+    :return: a tuple ('doi', doi) or ('title', title, year, venue), or None for publications without a title
+    """
+    doi = normalize_doi(publication.get('doi'))
+
+    if doi is not None:
+        return 'doi', doi
+
+    title = normalize_area(publication.get('title'))
+
+    if title == '':
+        return None
+
+    venue = next((publication.get(f) for f in VENUE_FIELDS[section] if publication.get(f)), None)
+
+    return 'title', title, publication.get('year'), normalize_area(venue)
+
+
+class PublicationEntry(object):
+    """
+    A distinct publication of the corpus. Section, year, type and areas are those of its most recent
+    listing; listings counts how many times each CV, by lattes id, lists it.
+    """
+
+    __slots__ = ('key', 'section', 'year', 'type', 'areas', 'listings')
+
+    def __init__(self, key, section):
+        self.key = key
+        self.section = section
+        self.year = None
+        self.type = None
+        self.areas = []
+        self.listings = {}
+
+    def __repr__(self):
+        return 'PublicationEntry({!r})'.format(self.key)
+
+
+class PublicationIndex(object):
+    """
+    Hash index of the publications of a corpus of CVs by publication_key, so a paper listed by several
+    co-authors, or twice in the same CV, is counted once. Every CV is indexed in a single pass over its
+    publications; update re-indexes only the CVs that are new or whose data-atualizacao changed, and drops
+    those no longer in the corpus, so a refresh does not rebuild the index.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.keys = {}
+        self.versions = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, cv):
+        """
+        Indexes the publications of a CV, replacing those of a previous version of it.
+        :raise ValueError: if the CV has no lattes id
+        """
+        lattes_id, version = cv_version(cv)
+
+        if lattes_id is None:
+            raise ValueError('The CV of {} has no lattes id'.format(cv.get('name')))
+
+        self.remove(lattes_id)
+
+        keys = []
+
+        for section in VENUE_FIELDS:
+            for position, (_, publication) in enumerate(table_items(cv, section)):
+
+                # publications without a title cannot be matched, so each one is kept on its own
+                key = publication_key(section, publication) or ('untitled', lattes_id, section, position)
+
+                entry = self.entries.get(key)
+
+                if entry is None:
+                    entry = self.entries[key] = PublicationEntry(key, section)
+                    keys.append(key)
+                elif lattes_id not in entry.listings:
+                    keys.append(key)
+
+                entry.section = section
+                entry.year = publication.get('year')
+                entry.type = publication.get('type')
+                entry.areas = publication.get('areas') or []
+                entry.listings[lattes_id] = entry.listings.get(lattes_id, 0) + 1
+
+        self.keys[lattes_id] = keys
+        self.versions[lattes_id] = version
+
+    def remove(self, lattes_id):
+        """
+        Drops the publications of a CV; entries no other CV lists are removed.
+        """
+        for key in self.keys.pop(lattes_id, []):
+
+            entry = self.entries[key]
+
+            del entry.listings[lattes_id]
+
+            if len(entry.listings) == 0:
+                del self.entries[key]
+
+        self.versions.pop(lattes_id, None)
+
+    def update(self, cvs):
+        """
+        Brings the index up to date with a corpus: new CVs and CVs with a new data-atualizacao are
+        re-indexed and CVs missing from the corpus are removed.
+        :return: a tuple (lattes ids of the added CVs, of the changed CVs, of the removed CVs)
+        """
+        added, changed, seen = [], [], set()
+
+        for cv in cvs:
+
+            lattes_id, version = cv_version(cv)
+
+            seen.add(lattes_id)
+
+            if lattes_id not in self.versions:
+                added.append(lattes_id)
+            elif self.versions[lattes_id] != version:
+                changed.append(lattes_id)
+            else:
+                continue
+
+            self.add(cv)
+
+        removed = [lattes_id for lattes_id in self.versions if lattes_id not in seen]
+
+        for lattes_id in removed:
+            self.remove(lattes_id)
+
+        return added, changed, removed
+
+    def selected(self, select=None):
+        return self.entries.values() if select is None else [e for e in self.entries.values() if select(e)]
+
+    def professor_counts(self, select=None):
+        """
+        Publications of every CV: listed counts every listing, as the indicators of compute_index do, and
+        distinct counts the listings of the same publication once.
+        :param select: function telling whether an entry is counted (see column_selector); None counts all
+        :return: a DataFrame indexed by lattes id with the COUNT_COLUMNS
+        """
+        counts = {lattes_id: [0, 0] for lattes_id in self.keys}
+
+        for entry in self.selected(select):
+            for lattes_id, listings in entry.listings.items():
+                counts[lattes_id][0] += listings
+                counts[lattes_id][1] += 1
+
+        return pd.DataFrame.from_dict(counts, orient='index', columns=COUNT_COLUMNS).rename_axis('lattes_id')
+
+    def group_counts(self, groups, select=None):
+        """
+        Publications of groups of CVs, e.g. departments: listed sums the listings of every member, and
+        distinct counts once a publication listed by several members or several times by the same one.
+        :param groups: dictionary of the lattes ids of the members keyed by group name
+        :param select: function telling whether an entry is counted (see column_selector); None counts all
+        :return: a DataFrame indexed by group with the COUNT_COLUMNS
+        """
+        members = {}
+
+        for group, lattes_ids in groups.items():
+            for lattes_id in lattes_ids:
+                members.setdefault(lattes_id, []).append(group)
+
+        counts = {group: [0, 0] for group in groups}
+
+        for entry in self.selected(select):
+
+            found = set()
+
+            for lattes_id, listings in entry.listings.items():
+                for group in members.get(lattes_id, ()):
+                    counts[group][0] += listings
+                    found.add(group)
+
+            for group in found:
+                counts[group][1] += 1
+
+        return pd.DataFrame.from_dict(counts, orient='index', columns=COUNT_COLUMNS).rename_axis('group')
+
+    def duplicates(self):
+        """
+        Entries listed more than once, by one or several CVs.
+        """
+        return [entry for entry in self.entries.values() if sum(entry.listings.values()) > 1]
+
+    def save(self, file_path):
+        write_state(file_path, self)
+
+    @staticmethod
+    def load(file_path):
+        """
+        Reads an index stored by save, or an empty one if there is none or it cannot be read.
+        """
+        index = read_state(file_path)
+
+        return index if isinstance(index, PublicationIndex) else PublicationIndex()
+
+
+def build_index(cvs):
+    """
+    Builds the publication index of a corpus in a single pass.
+    """
+    index = PublicationIndex()
+
+    for cv in cvs:
+        index.add(cv)
+
+    return index
+
+
+def column_selector(extractor, column):
+    """
+    Selects the entries counted by a window indicator of ProfessorIndexExtractor over publications
+    (artigo_periodico_areas, livro_capitulo_outras, anais_completo, traducao, ...), following the rules of
+    productions.COLUMN_RULES and the evaluation window and areas of the extractor.
+    """
+    reference_year = extractor.config.reference().year
+    window_years = extractor.config.window_years
+
+    def select(entry):
+
+        flag, when_set, otherwise = COLUMN_RULES[entry.section]
+
+        if flag == 'in_area':
+            selected = when_set if extractor.area_classifier.any_matches(entry.areas) else otherwise
+        elif flag == 'full':
+            selected = when_set if entry.type == 'full' else otherwise
+        else:
+            selected = when_set
+
+        return selected == column and entry.year is not None and \
+            reference_year - window_years <= entry.year <= reference_year
+
+    return select
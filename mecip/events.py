@@ -0,0 +1,161 @@
+import json
+import os
+
+from collections import Counter
+
+import pandas as pd
+
+
+class Event(object):
+    """
+    Structured log entry: the professor it refers to (by identifier, the lattes id, and by name, used for
+    display), the group it is reported under, a message code and the arguments of the message. The message
+    text is only rendered when it is read or exported.
+    """
+
+    __slots__ = ('professor', 'group', 'code', 'arguments', 'name')
+
+    def __init__(self, professor, group, code, arguments=(), name=None):
+        self.professor = professor
+        self.group = group
+        self.code = code
+        self.arguments = tuple(arguments)
+        self.name = name if name is not None else professor
+
+    def __repr__(self):
+        return 'Event({!r}, {!r}, {!r}, {!r})'.format(self.professor, self.group, self.code, self.arguments)
+
+
+def argument_key(argument):
+    """
+    Hashable key of a message argument. Records and mappings (such as the publications cited in the logs)
+    are keyed by their items and lists by their elements, so equal arguments give equal keys and a
+    publication listed twice in a CV is logged once.
+    """
+    if hasattr(argument, 'items'):
+        return 'items', tuple(sorted((key, argument_key(value)) for key, value in argument.items()))
+
+    if isinstance(argument, (list, tuple)):
+        return tuple(argument_key(a) for a in argument)
+
+    return argument
+
+
+class EventStore(object):
+    """
+    Insertion-ordered store of events, deduplicated by (professor, group, code, arguments) through a hash
+    lookup. Professors are keyed by identifier, so two professors with the same name are kept apart.
+    Reading the store by professor gives the rendered messages grouped as in the former nested dictionaries
+    ({professor: {group: [message]}}), so the store can be used wherever those were.
+    """
+
+    def __init__(self, render):
+        """
+        :param render: function turning an Event into its message text
+        """
+        self.render = render
+        self.keys_seen = set()
+        self.events = {}
+        self.names = {}
+
+    def add(self, professor, group, code, *arguments, name=None):
+        """
+        Records an event, unless an equal one has already been recorded.
+        :param professor: identifier of the professor
+        :param name: name of the professor, for display; the identifier when omitted
+        :return: whether the event was recorded
+        """
+        key = (professor, group, code, tuple(argument_key(a) for a in arguments))
+
+        if key in self.keys_seen:
+            return False
+
+        self.keys_seen.add(key)
+
+        event = Event(professor, group, code, arguments, name)
+
+        self.names.setdefault(professor, event.name)
+
+        groups = self.events.setdefault(professor, {})
+        groups.setdefault(group, []).append(event)
+
+        return True
+
+    def merge(self, events):
+        """
+        Records the given events in order, skipping the ones already recorded. Merging the events of the
+        stores filled by consecutive partitions of the CVs, in partition order, gives the same store as
+        recording them all in a single one.
+        :param events: iterable of Event, such as the iterate() of another store
+        """
+        for e in events:
+            self.add(e.professor, e.group, e.code, *e.arguments, name=e.name)
+
+    def __len__(self):
+        return len(self.keys_seen)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __contains__(self, professor):
+        return professor in self.events
+
+    def __getitem__(self, professor):
+        return {group: [self.render(e) for e in events] for group, events in self.events[professor].items()}
+
+    def keys(self):
+        return list(self.events)
+
+    def items(self):
+        return [(professor, self[professor]) for professor in self.events]
+
+    def iterate(self):
+        """
+        Iterates over the events in insertion order, grouped by professor and group.
+        """
+        for groups in self.events.values():
+            for events in groups.values():
+                yield from events
+
+    def to_frame(self):
+        """
+        Renders every event into a DataFrame with the professor, name, group, code and message columns.
+        """
+        return pd.DataFrame(
+            [(e.professor, e.name, e.group, e.code, self.render(e)) for e in self.iterate()],
+            columns=['professor', 'name', 'group', 'code', 'message'])
+
+    def write_jsonl(self, file_path, encoding='utf-8'):
+        """
+        Writes one JSON object per event (professor, name, group, code and message).
+        """
+        with open(file_path, mode='w', encoding=encoding) as file:
+            for e in self.iterate():
+                file.write(json.dumps({'professor': e.professor, 'name': e.name, 'group': e.group, 'code': e.code,
+                                       'message': self.render(e)}, ensure_ascii=False) + '\n')
+
+    def write_text(self, directory, filename, encoding='iso-8859-1'):
+        """
+        Writes the text layout read by the coordinators: one directory per professor, named after the
+        professor (followed by the identifier when several professors share the name), with a file listing
+        the messages of each group, indented below the group name.
+        """
+        shared = Counter(self.names.values())
+
+        for professor, groups in self.items():
+
+            name = self.names[professor]
+
+            directory_path = os.path.join(directory, name if shared[name] == 1 else
+                                          '{} {}'.format(name, professor))
+
+            if not os.path.exists(directory_path):
+                os.makedirs(directory_path)
+
+            with open(os.path.join(directory_path, filename), mode='w+', encoding=encoding) as file:
+                for group, messages in groups.items():
+                    file.write(group + '\n')
+                    for message in messages:
+                        for line in message.split('\n'):
+                            file.write('   ' + line + '\n')
+                    file.write('\n')
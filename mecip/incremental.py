@@ -0,0 +1,220 @@
+import os
+import pickle
+import tempfile
+import zlib
+
+import pandas as pd
+
+from mecip.corpus import lattes_id_from_url
+from mecip.index_extractor import LAST_UPDATE
+from mecip.index_extractor import NAME
+
+ADDED = 'novo'
+
+CHANGED = 'alterado'
+
+REMOVED = 'removido'
+
+DELTA_COLUMNS = ['lattes_id', 'nome', 'situacao', 'coluna', 'anterior', 'atual']
+
+# output columns depending on the month of the reference date (the months since the last update and the end
+# of the open experiences); the other indicators only read its year
+MONTHLY_COLUMNS = {LAST_UPDATE, 'xp_profissional'}
+
+
+def cv_version(cv):
+    """
+    Key of a version of a CV: its lattes id and the date of its last update (data-atualizacao).
+    """
+    return lattes_id_from_url(cv.get('lattes_url')), cv.get('last_update')
+
+
+def read_state(file_path):
+    """
+    Reads an object stored by write_state.
+    :return: the object, or None if there is none or it cannot be read
+    """
+    try:
+        with open(file_path, mode='rb') as file:
+            return pickle.loads(zlib.decompress(file.read()))
+    except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def write_state(file_path, state):
+    """
+    Stores an object as a compressed pickle. It is written to a temporary file first, so an interrupted run
+    keeps the previous state.
+    """
+    content = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)))
+
+    with os.fdopen(descriptor, mode='wb') as file:
+        file.write(content)
+
+    os.replace(temporary_path, file_path)
+
+
+def evaluation_epoch(extractor, indicators=None):
+    """
+    Everything besides the CV a stored row depends on: the execution plan (the computed columns and the
+    registry entries computing them), the configuration of the extractor, including the area taxonomy, and
+    the part of the reference date the plan reads. The year moves the evaluation windows and the current
+    teaching; the month is only part of the epoch when one of the MONTHLY_COLUMNS is computed, so those
+    columns make every CV be recomputed once a month, while the other ones only once a year.
+    """
+    config = extractor.config
+    plan = tuple((indicator.name, indicator.method, indicator.requires, indicator.fields, output)
+                 for indicator, output in extractor.plan(indicators))
+    institution = config.institution
+
+    reference = config.reference()
+    monthly = any(output and name in MONTHLY_COLUMNS for name, _, _, _, output in plan)
+    period = (reference.year, reference.month) if monthly else (reference.year,)
+
+    return (type(extractor).__module__, type(extractor).__qualname__, plan, period, config.window_years,
+            tuple(sorted(map(repr, config.areas))), tuple(sorted(config.taxonomy.nodes)), institution.acronym,
+            institution.keywords, tuple(sorted(institution.codes)))
+
+
+class IndexState(object):
+    """
+    Index rows and events of the CVs of a previous run, as stored by IndexStateStore. Every CV is kept as
+    a PartialIndex with its single row, keyed by lattes id, along with the version of the CV it was computed
+    from.
+    """
+
+    def __init__(self, epoch=None):
+        self.epoch = epoch
+        self.versions = {}
+        self.entries = {}
+
+
+class IndexStateStore(object):
+    """
+    Incremental computation of the indices. The store keeps the row and events of every CV of the last
+    run on disk; the next run only recomputes the CVs that are new or whose data-atualizacao changed, and
+    recomputes all of them when the epoch (see evaluation_epoch) changed, e.g. when the reference date
+    moved to another year, or to another month for the MONTHLY_COLUMNS.
+    """
+
+    FILENAME = 'state.pkl'
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self):
+        return os.path.join(self.directory, self.FILENAME)
+
+    def load(self):
+        """
+        Reads the stored state, or an empty one if there is none or it cannot be read.
+        """
+        state = read_state(self.path())
+
+        return state if state is not None else IndexState()
+
+    def save(self, state):
+        write_state(self.path(), state)
+
+    def update(self, extractor, raw_data, indicators=None, workers=1):
+        """
+        Computes the indices of the given CVs, reusing the stored rows and events of the unchanged ones,
+        and stores the new state. CVs without a lattes id are always recomputed and are not stored.
+        :param extractor: the ProfessorIndexExtractor
+        :param raw_data: parsed CVs of this run (with the lattes_url, last_update and months_from_last_update
+        sections besides those of the indicators)
+        :param indicators: names of the output columns (see INDICATORS); None computes all of them
+        :param workers: number of worker processes computing the changed CVs
+        :return: a tuple (IndexResult of every CV, in input order, as a full run would give; delta report, see
+        delta_report; number of recomputed CVs)
+        """
+        previous = self.load()
+
+        epoch = evaluation_epoch(extractor, indicators)
+
+        reuse = previous.epoch == epoch
+
+        state = IndexState(epoch)
+
+        raw_data = list(raw_data)
+
+        keys = [cv_version(cv) for cv in raw_data]
+
+        stale = [i for i, (lattes_id, version) in enumerate(keys)
+                 if not reuse or lattes_id is None or previous.versions.get(lattes_id) != version]
+
+        result = extractor.new_result(indicators)
+
+        computed = self.compute(extractor, [raw_data[i] for i in stale], indicators, result.reference_date, workers)
+
+        partials = dict(zip(stale, computed))
+
+        for i, (lattes_id, version) in enumerate(keys):
+
+            partial = partials[i] if i in partials else previous.entries[lattes_id]
+
+            result.merge(partial)
+
+            if lattes_id is not None:
+                state.versions[lattes_id] = version
+                state.entries[lattes_id] = partial
+
+        delta = delta_report(previous, state, {keys[i][0] for i in stale})
+
+        self.save(state)
+
+        return result, delta, len(stale)
+
+    @staticmethod
+    def compute(extractor, raw_data, indicators, reference_date, workers):
+        """
+        Computes every CV as a separate PartialIndex, so its row and events can be stored on their own.
+        """
+        if workers == 1:
+            return [extractor.partial_index([cv], indicators, reference_date) for cv in raw_data]
+
+        return list(extractor.iterate_partials(raw_data, indicators, reference_date, workers, partition_size=1))
+
+
+def delta_report(previous, state, recomputed):
+    """
+    Report of what changed since the previous run: one row per new CV, per removed CV and per changed
+    column of each recomputed CV, plus a row without a column for the updated CVs whose columns did not
+    change.
+    :param previous: IndexState of the previous run
+    :param state: IndexState of this run
+    :param recomputed: lattes ids of the CVs recomputed in this run
+    :return: a DataFrame with the DELTA_COLUMNS columns
+    """
+    report = []
+
+    for lattes_id, entry in state.entries.items():
+
+        if lattes_id not in recomputed:
+            continue
+
+        row = entry.rows[0]
+
+        if lattes_id not in previous.entries:
+            report.append((lattes_id, row.get(NAME), ADDED, None, None, None))
+            continue
+
+        old = previous.entries[lattes_id].rows[0]
+
+        changes = [(lattes_id, row.get(NAME), CHANGED, column, old.get(column), value)
+                   for column, value in row.items() if old.get(column) != value]
+
+        if len(changes) == 0 and previous.versions[lattes_id] != state.versions[lattes_id]:
+            changes.append((lattes_id, row.get(NAME), CHANGED, None, None, None))
+
+        report.extend(changes)
+
+    for lattes_id, entry in previous.entries.items():
+        if lattes_id not in state.entries:
+            report.append((lattes_id, entry.rows[0].get(NAME), REMOVED, None, None, None))
+
+    return pd.DataFrame(report, columns=DELTA_COLUMNS)
@@ -1,7 +1,17 @@
+import numpy as np
 import pandas as pd
 import re
 
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from mecip.areas import AreaClassifier
+from mecip.areas import CNPQ_TAXONOMY
+from mecip.corpus import lattes_id_from_url
+from mecip.events import EventStore
+from mecip.intervals import covered_months
+from mecip.intervals import month_ordinal
 
 DEGREE = "titulacao"
 
@@ -23,6 +33,10 @@ NAME = "nome"
 
 LATTES_URL = "lattes_url"
 
+REFERENCE_YEAR = "ano_referencia"
+
+COMPUTER_SCIENCE = 'ciência da computação'
+
 
 def format_personal_name(personal_name):
 
@@ -35,7 +49,7 @@ def format_personal_name(personal_name):
 
 def publication_to_str(publication):
 
-    result = ', '.join(format_personal_name(a) for a in publication['authors']) + '. '
+    result = ', '.join(format_personal_name(a) for a in publication.get('authors') or []) + '. '
     result += re.sub(' +', ' ', publication['title'].title()) + '. '
 
     if 'journal' in publication:
@@ -53,12 +67,317 @@ def publication_to_str(publication):
     return result
 
 
+class Institution(object):
+    """
+    Institution whose professors are evaluated, recognized in the professional experiences by the
+    institution code or by keywords that must all occur in the institution name (case-insensitive).
+    """
+
+    def __init__(self, acronym, keywords=(), codes=()):
+        self.acronym = acronym
+        self.keywords = tuple(k.lower() for k in keywords)
+        self.codes = frozenset(codes)
+
+    def matches(self, experience):
+
+        if experience['company_code'] in self.codes:
+            return True
+
+        company = str(experience['company_name']).lower()
+
+        return len(self.keywords) > 0 and all(k in company for k in self.keywords)
+
+
+IFSP = Institution('IFSP', keywords=('instituto', 'federal', 'paulo', 'de'))
+
+
+class ProfessorContext(object):
+    """
+    Intermediate values of a parsed CV shared by several indicators (see INTERMEDIATES), such as the
+    experience at the evaluated institution. Each value is computed on first use and kept for the row, so
+    the inconsistencies found along the way are reported once. Item access reads the CV, so every indicator
+    accepts either a CV or its context. The context also links the row to the IndexResult of the call
+    computing it, which receives its events and gives the reference date.
+    """
+
+    def __init__(self, row, extractor, result):
+        self.row = row
+        self.extractor = extractor
+        self.result = result
+        self.values = {}
+
+    @property
+    def reference_date(self):
+        return self.result.reference_date
+
+    def __getitem__(self, key):
+        return self.row[key]
+
+    def __contains__(self, key):
+        return key in self.row
+
+    def get(self, key, default=None):
+        return self.row.get(key, default)
+
+    def value(self, name):
+        if name not in self.values:
+            self.values[name] = getattr(self.extractor, self.extractor.intermediates[name].method)(self)
+        return self.values[name]
+
+
+class Indicator(object):
+    """
+    Entry of the indicator registry: an output column of compute_index or an intermediate value shared by
+    several columns.
+    :param name: name of the column or of the intermediate
+    :param method: name of the extractor method computing the value from a CV (or its context)
+    :param requires: intermediates read by the method, computed before it
+    :param fields: sections of the CV read by the method (see xml_parser.SECTIONS)
+    """
+
+    def __init__(self, name, method, requires=(), fields=()):
+        self.name = name
+        self.method = method
+        self.requires = tuple(requires)
+        self.fields = tuple(fields)
+
+    def __repr__(self):
+        return 'Indicator({!r}, {!r})'.format(self.name, self.method)
+
+
+INTERMEDIATES = [
+    Indicator('sorted_experiences', 'sort_experiences', fields=['professional_experience']),
+    Indicator('home_institution', 'resolve_home_institution', requires=['sorted_experiences']),
+    Indicator('current_teaching', 'teaching_of_current_year', requires=['home_institution']),
+    Indicator('publication_counts', 'classify_publications', fields=['publications']),
+]
+
+INDICATORS = [
+    Indicator(NAME, 'get_name'),
+    Indicator(LATTES_URL, 'get_lattes_url', fields=['lattes_url']),
+    Indicator(DEGREE, 'get_higher_degree', fields=['education']),
+    Indicator(LAST_UPDATE, 'get_last_update', fields=['months_from_last_update']),
+    Indicator(WORK_REGIME, 'get_work_regime', requires=['home_institution']),
+    Indicator(ADMISSION_DATE, 'get_admission_date', requires=['home_institution']),
+    Indicator(SUBJECTS_TAUGHT, 'get_taught_subjects', requires=['current_teaching']),
+    Indicator(EXTRA_ROOM_ACTIVITIES, 'get_extra_activities'),
+    Indicator(SUBJECTS_IN_OTHER_COURSES, 'get_classes_in_other_courses', requires=['current_teaching']),
+    Indicator("xp_docencia_superior", 'get_experience_in_higher_education', fields=['professional_experience']),
+    Indicator("xp_docencia_basica", 'get_experience_in_primary_education', fields=['professional_experience']),
+    Indicator("xp_profissional", 'get_professional_experience', fields=['professional_experience']),
+    Indicator("ch_semanal", 'get_weekly_workload', requires=['home_institution']),
+    Indicator("qtd_disciplinas", 'get_number_of_disciplines', requires=['current_teaching']),
+    Indicator("artigo_periodico_areas", 'get_full_papers', requires=['publication_counts']),
+    Indicator("artigo_periodico_outras", 'get_full_papers_in_other_areas', requires=['publication_counts']),
+    Indicator("livro_capitulo_area", 'get_chapters', requires=['publication_counts']),
+    Indicator("livro_capitulo_outras", 'get_chapters_in_other_areas', requires=['publication_counts']),
+    Indicator("anais_completo", 'get_full_paper_in_conference_proceedings', requires=['publication_counts']),
+    Indicator("anais_resumo", 'get_abstracts_in_conference_proceedings', requires=['publication_counts']),
+    Indicator("traducao", 'get_translations', fields=['publications']),
+    Indicator("propriedade_depositada", 'get_deposited_property', fields=['patents']),
+    Indicator("propriedade_registrada", 'get_registered_property', fields=['software']),
+    Indicator("relatorio_pesquisa", 'get_scientific_reports', fields=['scientific_reports']),
+    Indicator("producao_tecnica", 'get_technical_productions', fields=['software', 'event_organization']),
+    Indicator("producao_didatica", 'get_didactic_production', fields=['courseware']),
+]
+
+
+def execution_plan(indicators, intermediates, requested=None):
+    """
+    Orders the computations of the requested indicators by a depth-first walk of their dependencies:
+    each intermediate comes right before the first entry requiring it and appears once.
+    :param indicators: registry of output columns, as INDICATORS
+    :param intermediates: registry of intermediates, as INTERMEDIATES
+    :param requested: names of the requested columns; None requests every column, in registry order
+    :return: list of (Indicator, whether it is an output column) in execution order
+    """
+    indicators = {i.name: i for i in indicators}
+    intermediates = {i.name: i for i in intermediates}
+
+    requested = list(indicators) if requested is None else list(requested)
+
+    unknown = [name for name in requested if name not in indicators]
+
+    if len(unknown) > 0:
+        raise ValueError('Unknown indicators: {}'.format(', '.join(unknown)))
+
+    result, done, visiting = [], set(), []
+
+    def visit(name):
+        if name in done:
+            return
+
+        if name in visiting:
+            raise ValueError('Circular dependency between intermediates: {}'.format(' -> '.join(visiting + [name])))
+
+        if name not in intermediates:
+            raise ValueError('Unknown intermediate: {}'.format(name))
+
+        visiting.append(name)
+
+        for requirement in intermediates[name].requires:
+            visit(requirement)
+
+        visiting.pop()
+        done.add(name)
+        result.append((intermediates[name], False))
+
+    for name in requested:
+        for requirement in indicators[name].requires:
+            visit(requirement)
+        result.append((indicators[name], True))
+
+    return result
+
+
+def plan_fields(plan):
+    """
+    Sections of the CV read by an execution plan; the lattes URL and the name are always read, as they key
+    the logs.
+    """
+    fields = {'lattes_url', 'name'}
+
+    for indicator, _ in plan:
+        fields.update(indicator.fields)
+
+    return tuple(sorted(fields))
+
+
+class ExtractorConfig(object):
+    """
+    Immutable configuration of a ProfessorIndexExtractor. Changed copies are made with replace.
+    :param institution: the evaluated institution (see Institution), whose experience of each professor
+    provides the work regime, admission date, weekly workload and taught subjects
+    :param reference_date: date the indicators are computed at (the current year, the open experiences and
+    the evaluation window refer to it); None uses the date of each call
+    :param window_years: the productions of the reference year and of the window_years previous years are
+    counted
+    :param areas: knowledge areas, by name or by path in the taxonomy (see AreaTaxonomy.find), whose
+    journal papers, books and chapters, including those of their sub-areas, are counted as in the area
+    :param taxonomy: the knowledge area taxonomy (see mecip.areas) the areas of the publications are
+    resolved in
+    :param indicators: registry of output columns (see Indicator); new columns are added by extending
+    INDICATORS with entries naming methods of a subclass
+    :param intermediates: registry of the intermediate values shared by the indicators
+    """
+
+    __slots__ = ('institution', 'reference_date', 'window_years', 'areas', 'taxonomy', 'indicators',
+                 'intermediates')
+
+    def __init__(self, institution=IFSP, reference_date=None, window_years=3, areas=(COMPUTER_SCIENCE,),
+                 taxonomy=CNPQ_TAXONOMY, indicators=INDICATORS, intermediates=INTERMEDIATES):
+        values = {'institution': institution,
+                  'reference_date': reference_date,
+                  'window_years': window_years,
+                  'areas': tuple(tuple(a) if isinstance(a, (tuple, list)) else a for a in areas),
+                  'taxonomy': taxonomy,
+                  'indicators': tuple(indicators),
+                  'intermediates': tuple(intermediates)}
+
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ExtractorConfig is immutable, use replace')
+
+    def __delattr__(self, name):
+        raise AttributeError('ExtractorConfig is immutable, use replace')
+
+    def __reduce__(self):
+        return ExtractorConfig, tuple(getattr(self, name) for name in self.__slots__)
+
+    def replace(self, **changes):
+        """
+        Copy of the configuration with the given settings changed.
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return ExtractorConfig(**values)
+
+    def reference(self):
+        """
+        The reference date, resolved to today when it is not set.
+        """
+        return self.reference_date if self.reference_date is not None else date.today()
+
+
+DEFAULT_CONFIG = ExtractorConfig()
+
+
+class IndexResult(object):
+    """
+    Self-contained result of a ProfessorIndexExtractor call: the output rows, the inconsistency and log
+    events reported while computing them, and the reference date they were computed at.
+    """
+
+    def __init__(self, columns, render, reference_date):
+        self.columns = list(columns)
+        self.rows = []
+        self.inconsistencies = EventStore(render)
+        self.logging = EventStore(render)
+        self.reference_date = reference_date
+
+    @property
+    def index(self):
+        """
+        DataFrame with one row per CV and the computed columns, in the requested order.
+        """
+        return pd.DataFrame({column: [row[column] for row in self.rows] for column in self.columns})
+
+    def merge(self, partial):
+        """
+        Adds the rows and events of a PartialIndex. Merging the partial results of consecutive partitions
+        in partition order gives the same rows, inconsistencies and logs as computing all the CVs at once.
+        """
+        self.inconsistencies.merge(partial.inconsistencies)
+        self.logging.merge(partial.logging)
+        self.rows.extend(partial.rows)
+
+
+class PartialIndex(object):
+    """
+    Result of computing the indicators of a partition of the CVs: the output rows, in input order, and the
+    inconsistency and log events reported for them, in a picklable form. Partial results are combined with
+    IndexResult.merge.
+    """
+
+    __slots__ = ('rows', 'inconsistencies', 'logging')
+
+    def __init__(self, rows, inconsistencies, logging):
+        self.rows = rows
+        self.inconsistencies = inconsistencies
+        self.logging = logging
+
+
+def partitions(raw_data, size):
+    """
+    Splits an iterable into consecutive lists of up to size items, reading it lazily.
+    """
+    partition = []
+
+    for row in raw_data:
+        partition.append(row)
+
+        if len(partition) == size:
+            yield partition
+            partition = []
+
+    if len(partition) > 0:
+        yield partition
+
+
+def compute_partial(extractor, raw_data, indicators, reference_date):
+    """
+    Entry point of the worker processes of ProfessorIndexExtractor.evaluate (see partial_index).
+    """
+    return extractor.partial_index(raw_data, indicators, reference_date)
+
+
 class ProfessorIndexExtractor(object):
 
     ABSTRACTS_IN_CONFERENCES = 'Resumos Publicados em Conferências'
     CHAPTERS = 'Capítulos de Livros Publicados na Área'
     CHAPTERS_IN_OTHER_AREAS = 'Capítulos de Livros Publicados em Outras Áreas'
-    COMPUTER_SCIENCE = 'ciência da computação'
     COURSEWARE = 'Produções Didáticas'
     EDUCATION = 'Formação Acadêmica'
     EDUCATIONAL_INSTITUTION = 'Instituição de Ensino'
@@ -68,6 +387,7 @@ class ProfessorIndexExtractor(object):
     HIGHER_EDUCATION_EXPERIENCE = 'Ensino Superior'
     PATENTS = 'Patentes'
     PRIMARY_EDUCATION_EXPERIENCE = 'Ensino Básico'
+    PRODUCTIONS_WITHOUT_YEAR = 'Produções sem Ano Preenchido'
     PUBLICATIONS_WITHOUT_AREAS = 'Publicações sem Áreas do Conhecimento Preenchidas'
     PROFESSIONAL_EXPERIENCE = 'Experiência Profissional'
     REGISTERED_SOFTWARE = 'Software Registrado'
@@ -77,6 +397,28 @@ class ProfessorIndexExtractor(object):
     UPDATE = 'Atualização'
     EMPLOYMENT_RELATIONSHIP = 'Vínculo Empregatício'
 
+    # templates of the log and inconsistency messages, keyed by event code; citations of publications use
+    # the CITATION code and are rendered by publication_to_str
+    MESSAGES = {
+        'missing_undergraduate': 'A graduação não está enumerada nas formações.',
+        'outdated_cv': 'O CV precisa ser atualizado. Última atualização ocorreu há mais de um mês.',
+        'duplicated_institution': 'Há duplicidade na relação de experiência profissional no {}.',
+        'institution_not_found': 'O {} não consta como primeiro item na experiência de trabalho.',
+        'missing_workload': 'A carga horária semanal não está preenchida.',
+        'incomplete_admission_date': 'A data de admissão no {} precisa conter ano e mês.',
+        'no_higher_education': 'Não há nenhuma informação sobre disciplinas lecionadas no ensino superior.',
+        'no_primary_education': 'Não há nenhuma informação sobre disciplinas lecionadas no ensino básico.',
+        'year_only_period': 'A experiência profissional na empresa {} tem data de término ou '
+                            'fim alimentada apenas com o ano (início={}, término={})',
+        'open_experiences': 'Há mais de uma entrada na experiência profissional sem data de término. '
+                            'Garanta que essa informação está correta.',
+        'no_professional_experience': 'Não há experiência profissional fora da área de educação registrada.',
+        'degree': '{} em {} pelo {} entre {} e {}',
+        'postdoctoral_degree': '{} pelo {} entre {} e {}',
+    }
+
+    CITATION = 'citation'
+
     TITLE = {1: 'Graduação',
              2: 'Especialização',
              3: 'Mestrado',
@@ -84,67 +426,118 @@ class ProfessorIndexExtractor(object):
              5: 'Pós-doutorado',
              6: 'Livre-docente'}
 
-    def __init__(self):
-        self.df = {
-            NAME: [],
-            LATTES_URL: [],
-            DEGREE: [],
-            LAST_UPDATE: [],
-            WORK_REGIME: [],
-            ADMISSION_DATE: [],
-            SUBJECTS_TAUGHT: [],
-            EXTRA_ROOM_ACTIVITIES: [],
-            SUBJECTS_IN_OTHER_COURSES: [],
-            "xp_docencia_superior": [],
-            "xp_docencia_basica": [],
-            "xp_profissional": [],
-            "ch_semanal": [],
-            "qtd_disciplinas": [],
-            "artigo_periodico_areas": [],
-            "artigo_periodico_outras": [],
-            "livro_capitulo_area": [],
-            "livro_capitulo_outras": [],
-            "anais_completo": [],
-            "anais_resumo": [],
-            "traducao": [],
-            "propriedade_depositada": [],
-            "propriedade_registrada": [],
-            "relatorio_pesquisa": [],
-            "producao_tecnica": [],
-            "producao_didatica": []
-        }
+    # sections of the parsed CVs read by compute_index (see xml_parser.SECTIONS), to be used as the
+    # field projection of process_directory
+    FIELDS = plan_fields(execution_plan(INDICATORS, INTERMEDIATES))
+
+    # output columns of the publication indicators and the log groups of their entries
+    PUBLICATION_BUCKETS = [("artigo_periodico_areas", FULL_PAPERS),
+                           ("artigo_periodico_outras", FULL_PAPERS_IN_OTHER_AREAS),
+                           ("livro_capitulo_area", CHAPTERS),
+                           ("livro_capitulo_outras", CHAPTERS_IN_OTHER_AREAS),
+                           ("anais_completo", FULL_PAPERS_IN_CONFERENCES),
+                           ("anais_resumo", ABSTRACTS_IN_CONFERENCES)]
+
+    # output columns counting the productions of the evaluation window, computed for several reference
+    # years at once by compute_series, and the sections of the CV they read
+    WINDOW_COLUMNS = [column for column, _ in PUBLICATION_BUCKETS] + [
+        "traducao", "propriedade_depositada", "propriedade_registrada", "relatorio_pesquisa", "producao_tecnica",
+        "producao_didatica"]
+
+    SERIES_FIELDS = ('courseware', 'event_organization', 'name', 'patents', 'publications', 'scientific_reports',
+                     'software')
+
+    def __init__(self, config=DEFAULT_CONFIG, **settings):
+        """
+        The extractor keeps no state besides its configuration: every call returns its own IndexResult, so
+        an instance can serve concurrent calls.
+        :param config: the ExtractorConfig
+        :param settings: settings of ExtractorConfig replacing those of config, e.g. institution=...
+        """
+        self.config = config.replace(**settings) if len(settings) > 0 else config
+
+        self.intermediates = {i.name: i for i in self.config.intermediates}
+
+        self.area_classifier = AreaClassifier(self.config.taxonomy, self.config.areas)
 
-        self.inconsistencies = {}
+    @property
+    def institution(self):
+        return self.config.institution
 
-        self.logging = {}
+    @property
+    def indicators(self):
+        return list(self.config.indicators)
 
-    def add_inconsistencies(self, k, g, v):
+    def render_event(self, event):
+        if event.code == self.CITATION:
+            return publication_to_str(event.arguments[0])
+        return self.MESSAGES[event.code].format(*event.arguments)
 
-        if k not in self.inconsistencies:
-            self.inconsistencies[k] = dict()
+    @staticmethod
+    def professor_key(row):
+        """
+        Identifier keying the events of a CV: its lattes id, or its name when the CV has no lattes URL.
+        """
+        return lattes_id_from_url(row.get('lattes_url')) or row.get('name')
+
+    def add_inconsistencies(self, row, g, code, *arguments):
+        row.result.inconsistencies.add(self.professor_key(row), g, code, *arguments, name=row['name'])
+
+    def add_log(self, row, g, code, *arguments):
+        row.result.logging.add(self.professor_key(row), g, code, *arguments, name=row['name'])
+
+    def in_window(self, row, production):
+        """
+        Whether a production falls in the evaluation window, which ends at the reference year. Productions
+        without a year are never in it, and are reported as inconsistencies.
+        """
+        year = production['year']
+
+        if year is None:
+            self.add_inconsistencies(row, self.PRODUCTIONS_WITHOUT_YEAR, self.CITATION, production)
+            return False
+
+        return row.reference_date.year - self.config.window_years <= year <= row.reference_date.year
+
+    def in_area(self, publication):
+        """
+        Whether any of the knowledge areas of a publication is in the subtree of an evaluated area.
+        """
+        return self.area_classifier.any_matches(publication["areas"])
+
+    def new_result(self, indicators=None, reference_date=None):
+        """
+        Empty IndexResult for the given indicators, at the given reference date (by default the one of the
+        configuration).
+        """
+        columns = [indicator.name for indicator, output in self.plan(indicators) if output]
+        reference_date = reference_date if reference_date is not None else self.config.reference()
+        return IndexResult(columns, self.render_event, reference_date)
 
-        if g not in self.inconsistencies[k]:
-            self.inconsistencies[k][g] = [v]
-        elif v not in self.inconsistencies[k][g]:
-            self.inconsistencies[k][g].append(v)
+    def plan(self, indicators=None):
+        return execution_plan(self.indicators, self.intermediates.values(), indicators)
 
-    def add_log(self, k, g, v):
+    def fields(self, indicators=None):
+        """
+        Sections of the CV needed to compute the given indicators, to be used as the field projection of
+        process_directory.
+        """
+        return plan_fields(self.plan(indicators))
 
-        if k not in self.logging:
-            self.logging[k] = dict()
+    def get_name(self, row):
+        return row["name"]
 
-        if g not in self.logging[k]:
-            self.logging[k][g] = [v]
-        elif v not in self.logging[k][g]:
-            self.logging[k][g].append(v)
+    def get_lattes_url(self, row):
+        return row["lattes_url"]
 
     def get_higher_degree(self, row):
+        row = self.context(row)
+
         formation_list = [int(e["level_code"]) for e in row["education"]
                           if str(e["level_code"]).isdigit() and 1 <= int(e["level_code"]) <= 6]
 
         if 1 not in [e["level_code"] for e in row["education"]]:
-            self.add_inconsistencies(
-                row["name"], self.EDUCATION, "A graduação não está enumerada nas formações.")
+            self.add_inconsistencies(row, self.EDUCATION, 'missing_undergraduate')
 
         """
         {
@@ -166,11 +559,9 @@ class ProfessorIndexExtractor(object):
                 fim = e["end"]
 
                 if e["level_code"] != 5:
-                    log_message = "{} em {} pelo {} entre {} e {}".format(nivel, curso, instituicao, inicio, fim)
+                    self.add_log(row, self.EDUCATION, 'degree', nivel, curso, instituicao, inicio, fim)
                 else:
-                    log_message = "{} pelo {} entre {} e {}".format(nivel, instituicao, inicio, fim)
-
-                self.add_log(row["name"], self.EDUCATION, log_message)
+                    self.add_log(row, self.EDUCATION, 'postdoctoral_degree', nivel, instituicao, inicio, fim)
 
         index = max(formation_list) - 1
 
@@ -178,27 +569,43 @@ class ProfessorIndexExtractor(object):
 
     def get_last_update(self, row):
 
-        months = row["months_from_last_update"]
+        row = self.context(row)
+
+        last_update = row.get("last_update")
+
+        # counted up to the reference date; the months computed by the parser are used without the date
+        months = row["months_from_last_update"] if last_update is None else \
+            (row.reference_date.year - last_update.year) * 12 + row.reference_date.month - last_update.month
 
         if months > 0:
             if months >= 2:
-                self.add_inconsistencies(
-                    row["name"], self.UPDATE,
-                    "O CV precisa ser atualizado. Última atualização ocorreu há mais de um mês.")
+                self.add_inconsistencies(row, self.UPDATE, 'outdated_cv')
 
             return "Há " + str(months) + (" meses " if months != 1 else " mês ") + "atrás."
 
         else:
             return "Atualizado este mês"
 
-    def is_ifsp_first(self, row):
-        eps = sorted(row["professional_experience"], key=lambda d: d["order"] if d["order"] is not None else 99)
+    def context(self, row, result=None):
+        """
+        Context of a CV, linked to the given IndexResult. The indicator methods may be called directly on a
+        CV, in which case its events go to a new result and are discarded.
+        """
+        if isinstance(row, ProfessorContext):
+            return row
+        return ProfessorContext(row, self, result if result is not None else self.new_result())
+
+    def sort_experiences(self, row):
+        return sorted(row["professional_experience"], key=lambda d: d["order"] if d["order"] is not None else 99)
+
+    def resolve_home_institution(self, row):
+
+        row = self.context(row)
 
         count, first_index, first_entry = 0, None, None
 
-        for i, c in enumerate(eps):
-            company = c['company_name'].lower()
-            if "instituto" in company and "federal" in company and "paulo" in company and "de" in company:
+        for i, c in enumerate(row.value('sorted_experiences')):
+            if self.institution.matches(c):
                 count += 1
                 if first_index is None:
                     first_index = i
@@ -206,41 +613,59 @@ class ProfessorIndexExtractor(object):
 
         if count > 1:
             self.add_inconsistencies(
-                row["name"], self.EDUCATIONAL_INSTITUTION,
-                "Há duplicidade na relação de experiência profissional no IFSP.")
+                row, self.EDUCATIONAL_INSTITUTION, 'duplicated_institution', self.institution.acronym)
 
         if first_entry is None:
             self.add_inconsistencies(
-                row["name"], self.EDUCATIONAL_INSTITUTION,
-                "O IFSP não consta como primeiro item na experiência de trabalho.")
+                row, self.EDUCATIONAL_INSTITUTION, 'institution_not_found', self.institution.acronym)
 
         return first_entry
 
+    def is_ifsp_first(self, row):
+        return self.context(row).value('home_institution')
+
+    def teaching_of_current_year(self, row):
+        """
+        The (lowercased course, teaching entry) pairs of the current year at the evaluated institution.
+        """
+        row = self.context(row)
+
+        ep = self.is_ifsp_first(row)
+
+        if not ep:
+            return []
+
+        year = str(row.reference_date.year)
+
+        return [(t['course'].lower(), t) for t in ep['teaching'] if t['course'] and year in str(t['start'])]
+
     def get_work_regime(self, row):
 
+        row = self.context(row)
+
         ep = self.is_ifsp_first(row)
 
         if not ep:
             return None
 
         if ep["weekly_workload"] is None:
-            self.add_inconsistencies(
-                row["name"], self.EMPLOYMENT_RELATIONSHIP,
-                "A carga horária semanal não está preenchida.")
+            self.add_inconsistencies(row, self.EMPLOYMENT_RELATIONSHIP, 'missing_workload')
 
         if ep['exclusive_dedication'] and ep['weekly_workload'] == 40:
             return 'RDE'
 
         elif ep['weekly_workload'] is not None:
-            return ep['weekly_workload'] + ' H'
+            return '{} H'.format(ep['weekly_workload'])
 
     def get_admission_date(self, row):
+        row = self.context(row)
+
         ep = self.is_ifsp_first(row)
 
         if ep:
             if len(str(ep['start'])) < 6:
                 self.add_inconsistencies(
-                    row['name'], self.EMPLOYMENT_RELATIONSHIP, 'A data de admissão no IFSP precisa conter ano e mês.')
+                    row, self.EMPLOYMENT_RELATIONSHIP, 'incomplete_admission_date', self.institution.acronym)
             return ep['start']
 
         return None
@@ -249,19 +674,11 @@ class ProfessorIndexExtractor(object):
 
         result = []
 
-        ep = self.is_ifsp_first(row)
-
-        if ep:
-            for t in ep['teaching']:
-                if t['course']:
-                    course = t['course'].lower()
-                    # TODO remove this hardcoded condition
-                    if (
-                            'análise' in course or 'analise' in course) and \
-                            'sistema' in course and 'desenvolvimento' in course:
-                        if str(datetime.now().year) in str(t['start']):
-                            result = t['classes']
-                            break
+        for course, t in self.context(row).value('current_teaching'):
+            # TODO remove this hardcoded condition
+            if ('análise' in course or 'analise' in course) and 'sistema' in course and 'desenvolvimento' in course:
+                result = t['classes']
+                break
 
         return result
 
@@ -269,20 +686,14 @@ class ProfessorIndexExtractor(object):
         return None
 
     def get_classes_in_other_courses(self, row):
-        ep = self.is_ifsp_first(row)
 
         classes = []
 
-        if ep:
-            for t in ep['teaching']:
-                if t['course']:
-                    course = t['course'].lower()
-                    # TODO remove this hardcoded condition
-                    if not (
-                            ('análise' in course or 'analise' in course) and
-                            'sistema' in course and 'desenvolvimento' in course):
-                        if str(datetime.now().year) in str(t['start']):
-                            classes += t['classes']
+        for course, t in self.context(row).value('current_teaching'):
+            # TODO remove this hardcoded condition
+            if not (('análise' in course or 'analise' in course) and
+                    'sistema' in course and 'desenvolvimento' in course):
+                classes += t['classes']
 
         if len(classes) == 0:
             return None
@@ -291,82 +702,75 @@ class ProfessorIndexExtractor(object):
 
     def get_experience_in_higher_education(self, row):
 
-        months = set()
+        row = self.context(row)
+
+        intervals = []
 
         for professional_experience in row['professional_experience']:
             for teaching in professional_experience['teaching']:
                 if teaching['level'] == 'GRADUACAO':
-                    start, end = teaching['start'], teaching['end']
+                    start, end = month_ordinal(teaching['start']), month_ordinal(teaching['end'])
                     if start is not None and end is not None:
-                        months.update(pd.date_range('{1}-{0}-01'.format(*start.split('/')),
-                                                    '{1}-{0}-01'.format(*end.split('/')),
-                                                    freq='MS').strftime("%Y%m").tolist())
+                        intervals.append((start, end))
 
-        if len(months) == 0:
-            self.add_inconsistencies(
-                row['name'], self.HIGHER_EDUCATION_EXPERIENCE,
-                'Não há nenhuma informação sobre disciplinas lecionadas no ensino superior.')
+        months = covered_months(intervals)
 
-        return round(len(months) / 12.0, 2)
+        if months == 0:
+            self.add_inconsistencies(row, self.HIGHER_EDUCATION_EXPERIENCE, 'no_higher_education')
+
+        return round(months / 12.0, 2)
 
     def get_experience_in_primary_education(self, row):
 
-        months = set()
+        row = self.context(row)
+
+        intervals = []
 
         for professional_experience in row['professional_experience']:
             for teaching in professional_experience['teaching']:
                 if teaching['level'] == 'ENSINO-MEDIO':
-                    start, end = teaching['start'], teaching['end']
+                    start, end = month_ordinal(teaching['start']), month_ordinal(teaching['end'])
                     if start is not None and end is not None:
-                        months.update(pd.date_range('{1}-{0}-01'.format(*start.split('/')),
-                                                    '{1}-{0}-01'.format(*end.split('/')),
-                                                    freq='MS').strftime("%Y%m").tolist())
+                        intervals.append((start, end))
 
-        if len(months) == 0:
-            self.add_inconsistencies(
-                row['name'], self.PRIMARY_EDUCATION_EXPERIENCE,
-                'Não há nenhuma informação sobre disciplinas lecionadas no ensino básico.')
+        months = covered_months(intervals)
+
+        if months == 0:
+            self.add_inconsistencies(row, self.PRIMARY_EDUCATION_EXPERIENCE, 'no_primary_education')
 
-        return round(len(months) / 12.0, 2)
+        return round(months / 12.0, 2)
 
     def get_professional_experience(self, row):
 
-        months, count = set(), 0
+        row = self.context(row)
 
-        for professional_experience in row['professional_experience']:
+        intervals, count = [], 0
 
-            if 'teaching' is not professional_experience:
+        for professional_experience in row['professional_experience']:
 
-                start, end = professional_experience['start'], professional_experience['end']
+            start, end = professional_experience['start'], professional_experience['end']
 
-                if end is None:
-                    end = datetime.now().strftime('%m/%Y')
-                    count += 1
+            if end is None:
+                end = row.reference_date.strftime('%m/%Y')
+                count += 1
 
-                if start is not None and end is not None:
-                    if isinstance(start, int) or isinstance(end, int):
-                        self.add_inconsistencies(
-                            row['name'], self.PROFESSIONAL_EXPERIENCE,
-                            'A experiência profissional na empresa {} tem data de término ou '
-                            'fim alimentada apenas com o ano (início={}, término={})'.format(
-                                professional_experience['company_name'], start, end))
-                    else:
-                        months.update(pd.date_range('{1}-{0}-01'.format(*start.split('/')),
-                                                    '{1}-{0}-01'.format(*end.split('/')),
-                                                    freq='MS').strftime("%Y%m").tolist())
+            if start is not None and end is not None:
+                if isinstance(start, int) or isinstance(end, int):
+                    self.add_inconsistencies(
+                        row, self.PROFESSIONAL_EXPERIENCE, 'year_only_period',
+                        professional_experience['company_name'], start, end)
+                elif month_ordinal(start) is not None and month_ordinal(end) is not None:
+                    intervals.append((month_ordinal(start), month_ordinal(end)))
 
         if count > 1:
-            self.add_inconsistencies(
-                row['name'], self.PROFESSIONAL_EXPERIENCE,
-                'Há mais de uma entrada na experiência profissional sem data de término. '
-                'Garanta que essa informação está correta.')
+            self.add_inconsistencies(row, self.PROFESSIONAL_EXPERIENCE, 'open_experiences')
 
-        if len(months) == 0:
-            self.add_inconsistencies(
-                row['name'], self.PROFESSIONAL_EXPERIENCE,
-                'Não há experiência profissional fora da área de educação registrada.')
+        months = covered_months(intervals)
+
+        if months == 0:
+            self.add_inconsistencies(row, self.PROFESSIONAL_EXPERIENCE, 'no_professional_experience')
 
-        return round(len(months) / 12.0, 2)
+        return round(months / 12.0, 2)
 
     def get_weekly_workload(self, row):
         ep = self.is_ifsp_first(row)
@@ -376,261 +780,360 @@ class ProfessorIndexExtractor(object):
         classes = self.get_taught_subjects(row)
         return len(classes) if classes is not None else 0
 
-    def get_full_papers(self, row):
+    def classify_publications(self, row):
+        """
+        Visits every journal paper, book or chapter and conference paper of a CV once, assigning the
+        publications of the evaluation window to their indicator buckets: journal papers and books or
+        chapters in or out of the area, full papers or abstracts in conferences. The log entries are
+        written bucket by bucket after the pass, so they keep the order of PUBLICATION_BUCKETS.
+        :return: dictionary with the number of publications of each bucket, keyed by output column
+        """
+        buckets = {column: [] for column, _ in self.PUBLICATION_BUCKETS}
 
-        i = 0
+        row = self.context(row)
 
-        for j in row['publications']['journal_papers']:
+        publications = row['publications']
 
-            all_ = []
+        for section in ['journal_papers', 'books_and_chapters', 'conference_papers']:
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+            for j in publications[section]:
 
-            if j['year'] >= datetime.now().year - 3:
+                if self.in_window(row, j):
 
-                if len(all_) == 0:
-                    self.add_inconsistencies(
-                        row['name'], self.PUBLICATIONS_WITHOUT_AREAS,
-                        publication_to_str(j))
+                    if len(j["areas"]) == 0:
+                        self.add_inconsistencies(row, self.PUBLICATIONS_WITHOUT_AREAS, self.CITATION, j)
 
-                # FIXME add full computer science tree
-                if self.COMPUTER_SCIENCE in all_:
-                    i += 1
-                    self.add_log(row['name'], self.FULL_PAPERS, publication_to_str(j))
+                    buckets[self.publication_column(row, section, j)].append(j)
 
-        return i
+        for column, group in self.PUBLICATION_BUCKETS:
+            for j in buckets[column]:
+                self.add_log(row, group, self.CITATION, j)
+
+        return {column: len(items) for column, items in buckets.items()}
+
+    def publication_column(self, row, section, publication):
+        """
+        Output column counting a journal paper, book or chapter or conference paper.
+        """
+        if section == 'conference_papers':
+            return "anais_completo" if publication["type"] == "full" else "anais_resumo"
+
+        if section == 'journal_papers':
+            return "artigo_periodico_areas" if self.in_area(publication) else "artigo_periodico_outras"
+
+        return "livro_capitulo_area" if self.in_area(publication) else "livro_capitulo_outras"
+
+    def get_full_papers(self, row):
+        return self.context(row).value('publication_counts')["artigo_periodico_areas"]
 
     def get_full_papers_in_other_areas(self, row):
+        return self.context(row).value('publication_counts')["artigo_periodico_outras"]
+
+    def get_chapters(self, row):
+        return self.context(row).value('publication_counts')["livro_capitulo_area"]
+
+    def get_chapters_in_other_areas(self, row):
+        return self.context(row).value('publication_counts')["livro_capitulo_outras"]
+
+    def get_full_paper_in_conference_proceedings(self, row):
+        return self.context(row).value('publication_counts')["anais_completo"]
+
+    def get_abstracts_in_conference_proceedings(self, row):
+        return self.context(row).value('publication_counts')["anais_resumo"]
+
+    def get_deposited_property(self, row):
+        row = self.context(row)
+
         i = 0
 
-        for j in row['publications']['journal_papers']:
+        for j in row['patents']:
+            if self.in_window(row, j):
+                i += 1
+                self.add_log(row, self.PATENTS, self.CITATION, j)
 
-            all_ = []
+        return i
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+    def get_registered_property(self, row):
 
-            if j['year'] >= datetime.now().year - 3:
+        row = self.context(row)
 
-                if len(all_) == 0:
-                    self.add_inconsistencies(
-                        row['name'], self.PUBLICATIONS_WITHOUT_AREAS,
-                        publication_to_str(j))
+        i = 0
 
-                # FIXME add full computer science tree
-                if self.COMPUTER_SCIENCE not in all_:
+        for j in row['software']:
+            if self.in_window(row, j):
+                if j['registered']:
                     i += 1
-                    self.add_log(row['name'], self.FULL_PAPERS_IN_OTHER_AREAS, publication_to_str(j))
+                    self.add_log(row, self.REGISTERED_SOFTWARE, self.CITATION, j)
 
         return i
 
-    def get_chapters(self, row):
+    def get_translations(self, row):
+        row = self.context(row)
+
         i = 0
 
-        for j in row['publications']['books_and_chapters']:
+        for j in row['publications']['translations']:
+            if self.in_window(row, j):
+                i += 1
+                self.add_log(row, self.TRANSLATIONS, self.CITATION, j)
 
-            all_ = []
+        return i
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+    def get_scientific_reports(self, row):
 
-            if j['year'] >= datetime.now().year - 3:
+        row = self.context(row)
 
-                if len(all_) == 0:
-                    self.add_inconsistencies(
-                        row['name'], self.PUBLICATIONS_WITHOUT_AREAS,
-                        publication_to_str(j))
+        i = 0
 
-                if self.COMPUTER_SCIENCE in all_:
-                    i += 1
-                    self.add_log(row['name'], self.CHAPTERS, publication_to_str(j))
+        for j in row['scientific_reports']:
+            if self.in_window(row, j):
+                i += 1
+                self.add_log(row, self.SCIENTIFIC_REPORTS, self.CITATION, j)
 
         return i
 
-    def get_chapters_in_other_areas(self, row):
+    def get_technical_productions(self, row):
+        row = self.context(row)
 
         i = 0
 
-        for j in row['publications']['books_and_chapters']:
+        for j in row['software']:
+            if self.in_window(row, j):
+                if not j['registered']:
+                    i += 1
+                    self.add_log(row, self.TECHNICAL_PRODUCTIONS, self.CITATION, j)
 
-            all_ = []
+        for j in row['event_organization']:
+            if self.in_window(row, j):
+                i += 1
+                self.add_log(row, self.TECHNICAL_PRODUCTIONS, self.CITATION, j)
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+        # add outras produções artisticas
 
-            if j['year'] >= datetime.now().year - 3:
+        return i
 
-                if len(all_) == 0:
-                    self.add_inconsistencies(
-                        row['name'], self.PUBLICATIONS_WITHOUT_AREAS,
-                        publication_to_str(j))
+    def get_didactic_production(self, row):
+        row = self.context(row)
 
-                if self.COMPUTER_SCIENCE not in all_:
-                    i += 1
-                    self.add_log(row['name'], self.CHAPTERS_IN_OTHER_AREAS, publication_to_str(j))
+        i = 0
+
+        for j in row['courseware']:
+            if self.in_window(row, j):
+                i += 1
+                self.add_log(row, self.COURSEWARE, self.CITATION, j)
+
+        # add outras produções artisticas
 
         return i
 
-    def get_full_paper_in_conference_proceedings(self, row):
-        i = 0
+    def dated_productions(self, row):
+        """
+        Years of the productions counted by each of the WINDOW_COLUMNS, regardless of the evaluation window,
+        selected as by the indicators of those columns.
+        :return: dictionary of lists of years keyed by column
+        """
+        row = self.context(row)
 
-        for j in row['publications']['conference_papers']:
+        years = {column: [] for column in self.WINDOW_COLUMNS}
 
-            all_ = []
+        publications = row['publications']
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+        for section in ['journal_papers', 'books_and_chapters', 'conference_papers']:
+            for j in publications[section]:
+                years[self.publication_column(row, section, j)].append(j['year'])
 
-            if j['year'] >= datetime.now().year - 3:
+        years["traducao"] = [j['year'] for j in publications['translations']]
+        years["propriedade_depositada"] = [j['year'] for j in row['patents']]
+        years["propriedade_registrada"] = [j['year'] for j in row['software'] if j['registered']]
+        years["relatorio_pesquisa"] = [j['year'] for j in row['scientific_reports']]
+        years["producao_tecnica"] = [j['year'] for j in row['software'] if not j['registered']] + \
+            [j['year'] for j in row['event_organization']]
+        years["producao_didatica"] = [j['year'] for j in row['courseware']]
 
-                if len(all_) == 0:
-                    self.add_inconsistencies(
-                        row['name'], self.PUBLICATIONS_WITHOUT_AREAS,
-                        publication_to_str(j))
+        return years
 
-                if j["type"] == "full":
-                    i += 1
-                    self.add_log(row['name'], self.FULL_PAPERS_IN_CONFERENCES, publication_to_str(j))
+    def compute_row(self, row, plan, result):
+        """
+        Computes the output columns of an execution plan (see plan) for a CV, reporting its events to the
+        given IndexResult.
+        :return: dictionary of values keyed by column
+        """
+        row = self.context(row, result)
 
-        return i
+        values = {}
 
-    def get_abstracts_in_conference_proceedings(self, row):
-        i = 0
+        for indicator, output in plan:
+            if output:
+                values[indicator.name] = getattr(self, indicator.method)(row)
+            else:
+                row.value(indicator.name)
+
+        return values
 
-        for j in row['publications']['conference_papers']:
+    def partial_index(self, raw_data, indicators=None, reference_date=None):
+        """
+        Computes the indicators of a partition of the CVs.
+        :return: a PartialIndex with the rows and the events reported for them
+        """
+        plan = self.plan(indicators)
 
-            all_ = []
+        result = self.new_result(indicators, reference_date)
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+        rows = [self.compute_row(row, plan, result) for row in raw_data]
 
-            if j['year'] >= datetime.now().year - 3:
+        return PartialIndex(rows, list(result.inconsistencies.iterate()), list(result.logging.iterate()))
 
-                if len(all_) == 0:
-                    self.add_inconsistencies(
-                        row['name'], self.PUBLICATIONS_WITHOUT_AREAS,
-                        publication_to_str(j))
+    def iterate_partials(self, raw_data, indicators=None, reference_date=None, workers=2, partition_size=100):
+        """
+        Computes consecutive partitions of the CVs in a pool of worker processes and yields their partial
+        results in input order. At most two partitions per worker are read ahead, so raw_data may be a
+        generator of any length.
+        :param raw_data: iterable of parsed CVs, which must be picklable
+        :param indicators: names of the output columns (see INDICATORS); None computes all of them
+        :param reference_date: the reference date shared by every partition
+        :param workers: number of worker processes
+        :param partition_size: number of CVs sent to a worker at a time
+        :return: a generator of PartialIndex
+        """
+        self.plan(indicators)
 
-                if j["type"] != "full":
-                    i += 1
-                    self.add_log(row['name'], self.ABSTRACTS_IN_CONFERENCES, publication_to_str(j))
+        reference_date = reference_date if reference_date is not None else self.config.reference()
 
-        return i
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
 
-    def get_deposited_property(self, row):
-        i = 0
+            for partition in partitions(raw_data, partition_size):
+                pending.append(executor.submit(compute_partial, self, partition, indicators, reference_date))
 
-        for j in row['patents']:
-            if j['year'] >= datetime.now().year - 3:
-                i += 1
-                self.add_log(row['name'], self.PATENTS, publication_to_str(j))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
 
-        return i
+            while len(pending) > 0:
+                yield pending.popleft().result()
 
-    def get_registered_property(self, row):
+    def compute_rows(self, raw_data, plan, indicators, result, workers, partition_size):
+        """
+        Yields the output rows of the CVs in input order, computed here or, with more than one worker, in
+        worker processes whose events are merged into the result.
+        """
+        if workers == 1:
+            for row in raw_data:
+                yield self.compute_row(row, plan, result)
+            return
 
-        i = 0
+        for partial in self.iterate_partials(raw_data, indicators, result.reference_date, workers, partition_size):
+            result.inconsistencies.merge(partial.inconsistencies)
+            result.logging.merge(partial.logging)
+            yield from partial.rows
 
-        for j in row['software']:
-            if j['year'] >= datetime.now().year - 3:
-                if j['registered']:
-                    i += 1
-                    self.add_log(row['name'], self.REGISTERED_SOFTWARE, publication_to_str(j))
+    def evaluate(self, raw_data, indicators=None, workers=1, partition_size=100):
+        """
+        Computes the indicators of every CV. Only the requested indicators and the intermediates they
+        require are computed, in dependency order, each intermediate once per CV.
+        :param raw_data: parsed CVs
+        :param indicators: names of the output columns (see INDICATORS); None computes all of them
+        :param workers: number of worker processes; 1 computes in the calling thread. The result does not
+        depend on the number of workers
+        :param partition_size: number of CVs sent to a worker at a time
+        :return: an IndexResult with the rows, inconsistencies and logs of these CVs only
+        """
+        plan = self.plan(indicators)
 
-        return i
+        result = self.new_result(indicators)
 
-    def get_translations(self, row):
-        i = 0
+        result.rows.extend(self.compute_rows(raw_data, plan, indicators, result, workers, partition_size))
 
-        for j in row['publications']['translations']:
+        return result
 
-            all_ = []
+    def compute_index(self, raw_data, indicators=None, workers=1, partition_size=100):
+        """
+        Computes the indicators of every CV, as evaluate, without the inconsistencies and logs.
+        :return: a DataFrame with one row per CV and the requested columns, in the requested order
+        """
+        return self.evaluate(raw_data, indicators, workers, partition_size).index
 
-            for a in j["areas"]:
-                for b in a:
-                    all_.append(str(b).lower())
+    def iterate_index(self, raw_data, indicators=None, chunk_size=None, workers=1, partition_size=100,
+                      result=None):
+        """
+        Streaming counterpart of evaluate. CVs are read from raw_data one at a time, which may be a
+        generator (see xml_parser.iterate_directory), and the rows are yielded as they are computed instead
+        of being kept, so memory does not grow with the number of CVs.
+        :param raw_data: iterable of parsed CVs
+        :param indicators: names of the output columns (see INDICATORS); None computes all of them
+        :param chunk_size: number of rows of each yielded DataFrame; when None, rows are yielded as dictionaries
+        :param workers: number of worker processes, as in evaluate
+        :param partition_size: number of CVs sent to a worker at a time
+        :param result: IndexResult (see new_result) receiving the inconsistencies and logs; its rows are not
+        filled. When None, the events are discarded
+        :return: a generator of rows or of DataFrames with up to chunk_size rows (values kept as Python objects)
+        """
+        plan = self.plan(indicators)
 
-            if j['year'] >= datetime.now().year - 3:
-                i += 1
-                self.add_log(row['name'], self.TRANSLATIONS, publication_to_str(j))
+        columns = [indicator.name for indicator, output in plan if output]
 
-        return i
+        result = result if result is not None else self.new_result(indicators)
 
-    def get_scientific_reports(self, row):
+        chunk = []
 
-        i = 0
+        for values in self.compute_rows(raw_data, plan, indicators, result, workers, partition_size):
 
-        for j in row['scientific_reports']:
-            if j['year'] >= datetime.now().year - 3:
-                i += 1
-                self.add_log(row['name'], self.SCIENTIFIC_REPORTS, publication_to_str(j))
+            if chunk_size is None:
+                yield values
+                continue
 
-        return i
+            chunk.append(values)
 
-    def get_technical_productions(self, row):
-        i = 0
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns, dtype=object)
+                chunk = []
 
-        for j in row['software']:
-            if j['year'] >= datetime.now().year - 3:
-                if not j['registered']:
-                    i += 1
-                    self.add_log(row['name'], self.TECHNICAL_PRODUCTIONS, publication_to_str(j))
+        if len(chunk) > 0:
+            yield pd.DataFrame(chunk, columns=columns, dtype=object)
 
-        for j in row['event_organization']:
-            if j['year'] >= datetime.now().year - 3:
-                i += 1
-                self.add_log(row['name'], self.TECHNICAL_PRODUCTIONS, publication_to_str(j))
+    def compute_series(self, raw_data, years, columns=None):
+        """
+        Computes the window indicators (see WINDOW_COLUMNS) of every CV for several reference years in a
+        single pass: the productions of each CV are counted per year once, and the count of the window of
+        each reference year is the difference of two cumulative counts. The values are those compute_index
+        gives with a reference date in each year; logs and inconsistencies are not reported.
+        :param raw_data: parsed CVs (with the SERIES_FIELDS sections)
+        :param years: reference years
+        :param columns: window columns to compute; None computes all of them
+        :return: a DataFrame with one row per CV and reference year (nome, ano_referencia and the columns)
+        """
+        columns = list(self.WINDOW_COLUMNS) if columns is None else list(columns)
 
-        # add outras produções artisticas
+        unknown = [column for column in columns if column not in self.WINDOW_COLUMNS]
 
-        return i
+        if len(unknown) > 0:
+            raise ValueError('Not window indicators: {}'.format(', '.join(unknown)))
 
-    def get_didactic_production(self, row):
-        i = 0
+        years = sorted(set(years))
 
-        for j in row['courseware']:
-            if j['year'] >= datetime.now().year - 3:
-                i += 1
-                self.add_log(row['name'], self.COURSEWARE, publication_to_str(j))
+        window = self.config.window_years
 
-        # add outras produções artisticas
+        first, last = years[0] - window, years[-1]
 
-        return i
+        targets = np.array(years, dtype=np.int64) - first
+
+        data = {NAME: [], REFERENCE_YEAR: []}
+        data.update({column: [] for column in columns})
 
-    def compute_index(self, raw_data):
         for row in raw_data:
-            self.df[NAME].append(row["name"])
-            self.df[LATTES_URL].append(row["lattes_url"])
-            self.df[DEGREE].append(self.get_higher_degree(row))
-            self.df[LAST_UPDATE].append(self.get_last_update(row))
-            self.df[WORK_REGIME].append(self.get_work_regime(row))
-            self.df[ADMISSION_DATE].append(self.get_admission_date(row))
-            self.df[SUBJECTS_TAUGHT].append(self.get_taught_subjects(row))
-            self.df[EXTRA_ROOM_ACTIVITIES].append(self.get_extra_activities(row))
-            self.df[SUBJECTS_IN_OTHER_COURSES].append(self.get_classes_in_other_courses(row))
-            self.df["xp_docencia_superior"].append(self.get_experience_in_higher_education(row))
-            self.df["xp_docencia_basica"].append(self.get_experience_in_primary_education(row))
-            self.df["xp_profissional"].append(self.get_professional_experience(row))
-            self.df["ch_semanal"].append(self.get_weekly_workload(row))
-            self.df["qtd_disciplinas"].append(self.get_number_of_disciplines(row))
-            self.df["artigo_periodico_areas"].append(self.get_full_papers(row))
-            self.df["artigo_periodico_outras"].append(self.get_full_papers_in_other_areas(row))
-            self.df["livro_capitulo_area"].append(self.get_chapters(row))
-            self.df["livro_capitulo_outras"].append(self.get_chapters_in_other_areas(row))
-            self.df["anais_completo"].append(self.get_full_paper_in_conference_proceedings(row))
-            self.df["anais_resumo"].append(self.get_abstracts_in_conference_proceedings(row))
-            self.df["traducao"].append(self.get_translations(row))
-            self.df["propriedade_depositada"].append(self.get_deposited_property(row))
-            self.df["propriedade_registrada"].append(self.get_registered_property(row))
-            self.df["relatorio_pesquisa"].append(self.get_scientific_reports(row))
-            self.df["producao_tecnica"].append(self.get_technical_productions(row))
-            self.df["producao_didatica"].append(self.get_didactic_production(row))
-
-        return pd.DataFrame(self.df)
+
+            productions = self.dated_productions(row)
+
+            data[NAME].extend([row['name']] * len(years))
+            data[REFERENCE_YEAR].extend(years)
+
+            for column in columns:
+                offsets = np.array([y - first for y in productions[column] if y is not None and first <= y <= last],
+                                   dtype=np.int64)
+
+                # cumulative[k] is the number of productions of the years before first + k
+                cumulative = np.zeros(last - first + 2, dtype=np.int64)
+                cumulative[1:] = np.cumsum(np.bincount(offsets, minlength=last - first + 1))
+
+                data[column].extend((cumulative[targets + 1] - cumulative[targets - window]).tolist())
+
+        return pd.DataFrame(data)
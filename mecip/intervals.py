@@ -0,0 +1,94 @@
+import numpy as np
+
+
+def month_ordinal(value):
+    """
+    Converts a "MM/YYYY" value into the number of months since January of year 0.
+    :return: the ordinal, or None when the value is missing or does not carry both month and year
+    """
+    if not isinstance(value, str):
+        return None
+
+    month, _, year = value.partition('/')
+
+    if not (month.isdigit() and year.isdigit()) or not 1 <= int(month) <= 12:
+        return None
+
+    return int(year) * 12 + int(month) - 1
+
+
+def merge_intervals(intervals):
+    """
+    Unions closed month intervals by sorting them by start and merging the overlapping or adjacent ones.
+    Empty intervals (end before start) are dropped.
+    :param intervals: iterable of (start, end) month ordinals
+    :return: list of disjoint (start, end) intervals in increasing order
+    """
+    result = []
+
+    for start, end in sorted(i for i in intervals if i[1] >= i[0]):
+        if len(result) > 0 and start <= result[-1][1] + 1:
+            if end > result[-1][1]:
+                result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+
+    return result
+
+
+def covered_months(intervals):
+    """
+    Number of distinct months covered by closed month intervals, both ends included.
+    """
+    return sum(end - start + 1 for start, end in merge_intervals(intervals))
+
+
+def month_ordinals(values):
+    """
+    Batch counterpart of month_ordinal.
+    :param values: sequence of "MM/YYYY" values
+    :return: int64 array with -1 for the values without month and year
+    """
+    result = np.empty(len(values), dtype=np.int64)
+
+    for i, value in enumerate(values):
+        ordinal = month_ordinal(value)
+        result[i] = -1 if ordinal is None else ordinal
+
+    return result
+
+
+def batch_covered_months(owners, starts, ends, size):
+    """
+    Batch counterpart of covered_months computing the covered months of many owners (such as all
+    professors of a corpus) at once. Intervals are sorted by owner and start; the running maximum of the
+    previous ends of the same owner then tells how much of each interval is new, which is summed by owner.
+    :param owners: int array with the owner (0 to size - 1) of each interval
+    :param starts: int array of month ordinals, -1 when missing
+    :param ends: int array of month ordinals, -1 when missing
+    :param size: number of owners
+    :return: int64 array with the covered months of each owner
+    """
+    owners, starts, ends = np.asarray(owners, dtype=np.int64), np.asarray(starts), np.asarray(ends)
+
+    valid = (starts >= 0) & (ends >= starts)
+    owners, starts, ends = owners[valid], starts[valid], ends[valid]
+
+    if len(owners) == 0:
+        return np.zeros(size, dtype=np.int64)
+
+    order = np.lexsort((starts, owners))
+    owners, starts, ends = owners[order], starts[order], ends[order]
+
+    # shifting every owner above the ordinals of the previous ones keeps the running maximum within owners
+    offset = (ends.max() + 2) * owners
+    reached = np.maximum.accumulate(ends + offset) - offset
+
+    previous = np.empty_like(reached)
+    previous[0] = -1
+    previous[1:] = reached[:-1]
+    previous[1:][owners[1:] != owners[:-1]] = -1
+
+    new = np.clip(ends - np.maximum(starts, previous + 1) + 1, 0, None)
+
+    return np.bincount(owners, weights=new, minlength=size).astype(np.int64)
@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+
+from mecip.areas import normalize_area
+from mecip.corpus import lattes_id_from_url
+from mecip.corpus import table_items
+
+# sections of the parsed CVs whose titles are compared
+TITLE_SECTIONS = ['journal_papers', 'conference_papers', 'books_and_chapters']
+
+NEAR_DUPLICATE_COLUMNS = ['cluster', 'lattes_id', 'section', 'position', 'title', 'year']
+
+# the hash functions of the signatures are multiply-shift hashes, the high 32 bits of a * x + b computed
+# modulo 2 ** 64, which need no division
+SHIFT = np.uint64(32)
+
+# base of the polynomial hash of the characters of a shingle, and of the rows of a band
+HASH_BASE = 1000003
+
+# number of shingles hashed at a time, which bounds the memory to BLOCK_SIZE * num_perm integers
+BLOCK_SIZE = 8192
+
+# np.trapezoid is the name of np.trapz since numpy 2.0
+trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def shingle_hashes(titles, size):
+    """
+    Hashes of the character shingles of the titles, normalized by areas.normalize_area so accents, case and
+    punctuation do not matter. Titles shorter than size are a single shingle and empty titles have none.
+    :return: a tuple (hash of every shingle, position of its title), grouped by title
+    """
+    texts = [normalize_area(title) for title in titles]
+    texts = [text.ljust(size) if text else text for text in texts]
+
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    counts = np.maximum(lengths - size + 1, 0)
+
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), counts)
+
+    # position of every shingle in the joined text: start of its title plus its position in the title
+    starts = np.repeat(np.cumsum(lengths) - lengths - (np.cumsum(counts) - counts), counts) + \
+        np.arange(len(owners), dtype=np.int64)
+
+    hashes = np.zeros(len(owners), dtype=np.uint64)
+
+    for j in range(size):
+        hashes = hashes * np.uint64(HASH_BASE) + codes[starts + j]
+
+    return hashes, owners
+
+
+def lsh_parameters(threshold, num_perm, false_negative_weight=0.5):
+    """
+    Number of bands and of rows per band of the LSH index minimizing the weighted probabilities of false
+    positives (pairs below the threshold colliding in a band) and of false negatives (pairs above it
+    colliding in none), integrated over the similarity of the pairs. Bands may leave some hash functions
+    of the signatures unused.
+    :param false_negative_weight: weight of the false negatives, between 0 and 1; higher values favor recall
+    :return: a tuple (bands, rows)
+    """
+    similarity = np.linspace(0.0, 1.0, 201)
+    below = similarity <= threshold
+
+    def error(bands, rows):
+        collision = 1.0 - (1.0 - similarity ** rows) ** bands
+        false_positive = trapezoid(collision[below], similarity[below])
+        false_negative = trapezoid(1.0 - collision[~below], similarity[~below])
+        return (1.0 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+
+    return min(((num_perm // rows, rows) for rows in range(1, num_perm + 1)), key=lambda p: error(*p))
+
+
+class MinHasher(object):
+    """
+    MinHash signatures of titles: for each of num_perm random hash functions, the minimum hash of the
+    character shingles of the title. The fraction of equal positions of two signatures estimates the
+    Jaccard similarity of their shingle sets.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=3, seed=1):
+        rnd = np.random.default_rng(seed)
+
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rnd.integers(0, 1 << 64, size=(num_perm, 1), dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self.b = rnd.integers(0, 1 << 64, size=(num_perm, 1), dtype=np.uint64, endpoint=False)
+
+    def signatures(self, titles):
+        """
+        :return: a tuple (array of titles by num_perm signatures; mask of the titles with shingles)
+        """
+        hashes, owners = shingle_hashes(titles, self.shingle_size)
+
+        # hash functions by titles, so the minimum of the shingles of a title reduces contiguous memory
+        result = np.full((self.num_perm, len(titles)), 1 << 32, dtype=np.uint64)
+
+        for start in range(0, len(hashes), BLOCK_SIZE):
+
+            block = (self.a * hashes[start:start + BLOCK_SIZE] + self.b) >> SHIFT
+            block_owners = owners[start:start + BLOCK_SIZE]
+
+            # the minimum of every title in the block; a title split between blocks keeps the smallest one
+            first = np.flatnonzero(np.r_[True, block_owners[1:] != block_owners[:-1]])
+            columns = block_owners[first]
+
+            result[:, columns] = np.minimum(result[:, columns], np.minimum.reduceat(block, first, axis=1))
+
+        valid = np.zeros(len(titles), dtype=bool)
+        valid[owners] = True
+
+        return np.ascontiguousarray(result.T), valid
+
+
+def band_candidates(signatures, valid, bands, rows):
+    """
+    Pairs of titles whose signatures are equal in at least one band, found by grouping the hashes of
+    each band, so the cost grows with the number of titles and of colliding pairs instead of with the
+    number of pairs of titles; a large bucket costs its own pairs, not a pass over every title for each
+    of its members.
+    :return: an array of (i, j) pairs, i < j, without repetitions
+    """
+    ids = np.flatnonzero(valid)
+
+    found = []
+
+    for band in range(bands):
+
+        keys = np.zeros(len(ids), dtype=np.uint64)
+
+        for column in signatures[ids, band * rows:(band + 1) * rows].T:
+            keys = keys * np.uint64(HASH_BASE) + column
+
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        members = ids[order]
+
+        # titles of a bucket are contiguous once sorted, so its pairs are the sorted positions at distances
+        # 1, 2, ... holding the same bucket; a position whose bucket ends before distance d also ends before
+        # d + 1, so only the positions still paired are kept and the cost follows the number of pairs
+        same = np.flatnonzero(keys[1:] == keys[:-1])
+        distance = 1
+
+        while len(same) > 0:
+
+            found.append(np.stack([members[same], members[same + distance]], axis=1))
+
+            distance += 1
+            same = same[same + distance < len(keys)]
+            same = same[keys[same + distance] == keys[same]]
+
+    if len(found) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    pairs = np.concatenate(found)
+
+    return np.unique(np.sort(pairs, axis=1), axis=0)
+
+
+def connected_components(size, pairs):
+    """
+    Clusters of the nodes linked by the pairs (single linkage), with a union-find structure.
+    :return: lists of node positions, sorted, of the clusters with more than one node, ordered by first node
+    """
+    parent = list(range(size))
+
+    def root(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for i, j in pairs:
+        ri, rj = root(int(i)), root(int(j))
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    clusters = {}
+
+    for node in np.unique(pairs):
+        clusters.setdefault(root(int(node)), []).append(int(node))
+
+    return sorted(clusters.values())
+
+
+class NearDuplicateDetector(object):
+    """
+    Near-duplicate detection of titles with MinHash signatures and LSH banding. Candidate pairs are the
+    titles colliding in a band; they are kept when the similarity estimated by their signatures reaches the
+    threshold.
+    """
+
+    def __init__(self, threshold=0.6, num_perm=128, bands=None, shingle_size=3, seed=1):
+        """
+        :param threshold: minimum estimated Jaccard similarity of the shingles of near-duplicate titles
+        :param num_perm: number of hash functions of the signatures
+        :param bands: number of LSH bands, with num_perm // bands rows each; by default the one with the
+        fewest expected false positives and negatives (see lsh_parameters)
+        :param shingle_size: number of characters of the shingles
+        :param seed: seed of the hash functions
+        """
+        if bands is None:
+            bands, _ = lsh_parameters(threshold, num_perm)
+
+        if not 0 < bands <= num_perm:
+            raise ValueError('The number of bands must be between 1 and num_perm ({})'.format(num_perm))
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+
+    def similar_pairs(self, titles):
+        """
+        :return: a tuple (array of the (i, j) pairs of near-duplicate titles, their estimated similarity)
+        """
+        signatures, valid = self.hasher.signatures(titles)
+
+        pairs = band_candidates(signatures, valid, self.bands, self.rows)
+
+        similarity = np.concatenate([np.zeros(0)] + [
+            (signatures[block[:, 0]] == signatures[block[:, 1]]).mean(axis=1)
+            for block in np.array_split(pairs, max(1, len(pairs) // BLOCK_SIZE))])
+
+        selected = similarity >= self.threshold
+
+        return pairs[selected], similarity[selected]
+
+    def clusters(self, titles):
+        """
+        Groups of near-duplicate titles.
+        :return: lists of title positions (see connected_components)
+        """
+        titles = list(titles)
+
+        pairs, _ = self.similar_pairs(titles)
+
+        return connected_components(len(titles), pairs)
+
+
+def title_records(cvs):
+    """
+    Titles of the publications of the CVs, as (lattes_id, section, position in the section, title, year).
+    """
+    return [(lattes_id_from_url(cv.get('lattes_url')), section, position, publication.get('title'),
+             publication.get('year'))
+            for cv in cvs
+            for section in TITLE_SECTIONS
+            for position, (_, publication) in enumerate(table_items(cv, section))]
+
+
+def near_duplicates(cvs, detector=None):
+    """
+    Near-duplicate titles of the publications of the CVs (see TITLE_SECTIONS), both within each CV and
+    across the corpus, from a single computation of the signatures.
+    :param cvs: parsed CVs, either dictionaries or mecip.records.Curriculum instances
+    :param detector: the NearDuplicateDetector; by default one with the default thresholds
+    :return: a tuple (clusters of titles listed by the same professor, clusters across the corpus); each one
+    a DataFrame with the NEAR_DUPLICATE_COLUMNS, one row per title in a cluster
+    """
+    detector = detector if detector is not None else NearDuplicateDetector()
+
+    records = title_records(cvs)
+
+    pairs, _ = detector.similar_pairs([title for _, _, _, title, _ in records])
+
+    professors = np.array([lattes_id for lattes_id, _, _, _, _ in records], dtype=object)
+
+    own = pairs[professors[pairs[:, 0]] == professors[pairs[:, 1]]] if len(pairs) > 0 else pairs
+
+    def table(clusters):
+        return pd.DataFrame([(cluster,) + records[i] for cluster, members in enumerate(clusters) for i in members],
+                            columns=NEAR_DUPLICATE_COLUMNS)
+
+    return table(connected_components(len(records), own)), table(connected_components(len(records), pairs))
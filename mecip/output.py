@@ -0,0 +1,116 @@
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+
+class CsvChunkWriter(object):
+    """
+    Writes the DataFrame chunks yielded by ProfessorIndexExtractor.iterate_index to a CSV file as they
+    arrive. Without sort_by, every chunk is appended to the output right away. With sort_by, chunks are
+    buffered up to run_rows rows: when the whole output fits, it is sorted in memory and written on close;
+    otherwise every full buffer is sorted and written to a temporary run file, and the runs are merged into
+    the output on close (external merge sort), so memory stays bounded by run_rows.
+    """
+
+    def __init__(self, file_path, sort_by=None, run_rows=100000, sep=',', encoding='iso-8859-1'):
+        self.file_path = file_path
+        self.sort_by = sort_by
+        self.run_rows = run_rows
+        self.sep = sep
+        self.encoding = encoding
+
+        self.buffer, self.buffered_rows = [], 0
+        self.runs, self.run_directory = [], None
+        self.header_written = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard_runs()
+
+    def to_csv(self, df, file_path, append):
+        df.to_csv(file_path, mode='a' if append else 'w', header=not append, index=False, sep=self.sep,
+                  encoding=self.encoding, lineterminator='\n')
+
+    def sorted(self, chunks):
+        return pd.concat(chunks, ignore_index=True).sort_values(self.sort_by, kind='mergesort')
+
+    def write(self, chunk):
+
+        if self.sort_by is None:
+            self.to_csv(chunk, self.file_path, append=self.header_written)
+            self.header_written = True
+            return
+
+        self.buffer.append(chunk)
+        self.buffered_rows += len(chunk)
+
+        if self.buffered_rows >= self.run_rows:
+            self.spill()
+
+    def spill(self):
+        """
+        Sorts the buffered chunks and writes them to a new run file.
+        """
+        if self.run_directory is None:
+            self.run_directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(self.file_path)))
+
+        run_path = os.path.join(self.run_directory, '{:06d}.csv'.format(len(self.runs)))
+
+        self.to_csv(self.sorted(self.buffer), run_path, append=False)
+
+        self.runs.append(run_path)
+        self.buffer, self.buffered_rows = [], 0
+
+    def merge_runs(self):
+        """
+        Merges the sorted run files into the output with a k-way merge, reading one row of each run at a time.
+        """
+        files = [open(run, mode='r', encoding=self.encoding, newline='') for run in self.runs]
+
+        try:
+            readers = [csv.reader(file, delimiter=self.sep) for file in files]
+
+            header = [next(reader) for reader in readers][0]
+
+            key = header.index(self.sort_by)
+
+            with open(self.file_path, mode='w', encoding=self.encoding, newline='') as output:
+                writer = csv.writer(output, delimiter=self.sep, lineterminator='\n')
+                writer.writerow(header)
+                writer.writerows(heapq.merge(*readers, key=lambda row: row[key]))
+        finally:
+            for file in files:
+                file.close()
+
+    def discard_runs(self):
+        if self.run_directory is not None:
+            shutil.rmtree(self.run_directory, ignore_errors=True)
+            self.runs, self.run_directory = [], None
+
+    def close(self):
+
+        if self.sort_by is None:
+            return
+
+        if len(self.runs) == 0:
+            if len(self.buffer) > 0:
+                self.to_csv(self.sorted(self.buffer), self.file_path, append=False)
+                self.buffer, self.buffered_rows = [], 0
+            return
+
+        if len(self.buffer) > 0:
+            self.spill()
+
+        try:
+            self.merge_runs()
+        finally:
+            self.discard_runs()
@@ -0,0 +1,194 @@
+import sys
+
+
+class Record(object):
+    """
+    Compact record with a fixed set of fields stored in __slots__. Records also answer the mapping
+    protocol used with the parser dictionaries (record['year'], 'journal' in record, record.get(...)),
+    so code written for the dictionaries, such as ProfessorIndexExtractor, accepts both.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+
+        unknown = set(fields) - set(self.__slots__)
+
+        if len(unknown) > 0:
+            raise TypeError('{} has no fields {}'.format(type(self).__name__, sorted(unknown)))
+
+        for key in self.__slots__:
+            setattr(self, key, fields.get(key))
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(self[k] == other[k] for k in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __getstate__(self):
+        return tuple(getattr(self, key) for key in self.__slots__)
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(k, self[k]) for k in self.__slots__))
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def to_dict(self):
+        return {key: to_dict(value) for key, value in self.items()}
+
+
+class AcademicDegree(Record):
+    __slots__ = ('level_code', 'level', 'start', 'end', 'completed', 'course', 'institution')
+
+
+class JournalPaper(Record):
+    __slots__ = ('title', 'authors', 'areas', 'year', 'journal', 'start_page', 'end_page', 'volume', 'issn', 'doi')
+
+
+class Chapter(Record):
+    __slots__ = ('title', 'authors', 'areas', 'year', 'book', 'volume', 'start_page', 'end_page', 'publisher', 'doi',
+                 'type')
+
+
+class Book(Record):
+    __slots__ = ('title', 'authors', 'areas', 'year', 'publisher', 'volume', 'pages', 'doi', 'type')
+
+
+class ConferencePaper(Record):
+    __slots__ = ('title', 'authors', 'areas', 'year', 'conference', 'volume', 'country', 'type')
+
+
+class Publications(Record):
+    __slots__ = ('journal_papers', 'books_and_chapters', 'conference_papers', 'translations')
+
+
+class TeachingEntry(Record):
+    __slots__ = ('level', 'start', 'end', 'course', 'classes')
+
+
+class ResearchAndDevelopment(Record):
+    __slots__ = ('start', 'end', 'company_code', 'company_name', 'research_lines')
+
+
+class ProfessionalExperience(Record):
+    __slots__ = ('company_code', 'company_name', 'position', 'weekly_workload', 'start', 'end', 'exclusive_dedication',
+                 'order', 'teaching', 'research_and_development')
+
+
+class Patent(Record):
+    __slots__ = ('title', 'year', 'country', 'sponsor')
+
+
+class Software(Record):
+    __slots__ = ('title', 'year', 'registered', 'authors')
+
+
+class OrganizedEvent(Record):
+    __slots__ = ('title', 'year', 'authors')
+
+
+class ScientificReport(Record):
+    __slots__ = ('title', 'year', 'authors', 'project')
+
+
+class DidacticMaterial(Record):
+    __slots__ = ('authors', 'type', 'title', 'year', 'link')
+
+
+class Curriculum(Record):
+    __slots__ = ('name', 'lattes_url', 'last_update', 'months_from_last_update', 'professional_experience',
+                 'publications', 'education', 'patents', 'software', 'event_organization', 'scientific_reports',
+                 'courseware')
+
+
+def to_dict(value):
+    """
+    Converts records (at any depth) back to the dictionaries produced by extract_information.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+
+    if isinstance(value, list):
+        return [to_dict(v) for v in value]
+
+    return value
+
+
+def as_records(cv):
+    """
+    Converts the dictionary produced by extract_information into a Curriculum record. Values that
+    repeat across items (author names, venues, knowledge areas) are interned, so every occurrence
+    points to a single object. Sections left out of a field projection stay None.
+    """
+    areas = {}
+
+    def share(value):
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def publication(p):
+        return {
+            **p,
+            'authors': [share(a) for a in p['authors']],
+            'areas': [areas.setdefault(a, tuple(share(v) for v in a)) for a in p['areas']],
+            **{k: share(p[k]) for k in ('journal', 'conference', 'book', 'publisher', 'country') if k in p}
+        }
+
+    def experience(e):
+        return ProfessionalExperience(**{
+            **e,
+            'teaching': [TeachingEntry(**t) for t in e['teaching']],
+            'research_and_development': [ResearchAndDevelopment(**r) for r in e['research_and_development']]
+        })
+
+    def authored(record_type, items):
+        return [record_type(**{**i, 'authors': [share(a) for a in i['authors']]}) for i in items]
+
+    sections = {
+        'professional_experience': lambda items: [experience(e) for e in items],
+        'publications': lambda p: Publications(
+            journal_papers=[JournalPaper(**publication(j)) for j in p['journal_papers']],
+            books_and_chapters=[
+                Chapter(**publication(b)) if b['type'] == 'chapter' else Book(**publication(b))
+                for b in p['books_and_chapters']],
+            conference_papers=[ConferencePaper(**publication(c)) for c in p['conference_papers']],
+            translations=list(p['translations'])),
+        'education': lambda items: [AcademicDegree(**e) for e in items],
+        'patents': lambda items: [Patent(**p) for p in items],
+        'software': lambda items: authored(Software, items),
+        'event_organization': lambda items: authored(OrganizedEvent, items),
+        'scientific_reports': lambda items: authored(ScientificReport, items),
+        'courseware': lambda items: authored(DidacticMaterial, items)
+    }
+
+    return Curriculum(**{key: sections[key](value) if key in sections else value for key, value in cv.items()})
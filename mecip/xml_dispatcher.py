@@ -0,0 +1,274 @@
+from mecip.xml_parser import ACADEMIC_DEGREE
+from mecip.xml_parser import BOOK
+from mecip.xml_parser import BOOK_CHAPTER
+from mecip.xml_parser import CONFERENCE_PAPER
+from mecip.xml_parser import DIDACTIC_MATERIAL
+from mecip.xml_parser import JOURNAL_PAPER
+from mecip.xml_parser import ORGANIZED_EVENT
+from mecip.xml_parser import PATENT
+from mecip.xml_parser import PROFESSIONAL_EXPERIENCE
+from mecip.xml_parser import PUBLICATION_AREA
+from mecip.xml_parser import RESEARCH_AND_DEVELOPMENT
+from mecip.xml_parser import SCIENTIFIC_REPORT
+from mecip.xml_parser import SOFTWARE
+from mecip.xml_parser import TEACHING
+from mecip.xml_parser import academic_degree_from_fields
+from mecip.xml_parser import assemble_information
+from mecip.xml_parser import merge_period
+from mecip.xml_parser import projected_records
+from mecip.xml_parser import projection
+from mecip.xml_parser import record_prefixes
+from mecip.xml_parser import record_table
+from mecip.xml_parser import streaming_record
+
+
+def group_children(element):
+    """
+    Groups the child elements by tag in a single pass, keeping document order.
+    """
+    result = {}
+
+    for child in element:
+        if isinstance(child.tag, str):
+            if child.tag in result:
+                result[child.tag].append(child)
+            else:
+                result[child.tag] = [child]
+
+    return result
+
+
+def first_attribute(children, tag, name):
+    """
+    Equivalent to xpath_first(element, "tag/@name"): the attribute of the first child carrying it.
+    """
+    for child in children.get(tag, ()):
+        value = child.get(name)
+        if value is not None:
+            return value
+
+    return None
+
+
+def all_attributes(children, tag, name):
+    """
+    Equivalent to xpath_all(element, "tag/@name").
+    """
+    return [child.get(name) for child in children.get(tag, ()) if child.get(name) is not None]
+
+
+def dispatch_fields(element, children, fields):
+    """
+    Counterpart of xml_parser.extract_fields reading the schema attributes from element.attrib.
+    """
+    result = {}
+
+    attrib = element.attrib
+
+    for key, _, tag, attribute, converter in fields:
+        value = attrib.get(attribute) if tag is None else first_attribute(children, tag, attribute)
+        result[key] = converter(value) if value is not None else None
+
+    return result
+
+
+def publication_areas(children):
+    result = []
+
+    for areas in children.get('areas-do-conhecimento', ()):
+        for a in areas:
+            if isinstance(a.tag, str):
+                area = dispatch_fields(a, None, PUBLICATION_AREA)
+                result.append((area["big_area"], area["area"], area["sub_area"]))
+
+    return result
+
+
+def authors(children):
+    return [a for a in all_attributes(children, 'autores', 'nome-completo-do-autor') if a != ""]
+
+
+def academic_degree(e):
+    return academic_degree_from_fields(dispatch_fields(e, None, ACADEMIC_DEGREE))
+
+
+def journal_paper(e):
+    children = group_children(e)
+
+    result = dispatch_fields(e, children, JOURNAL_PAPER)
+    result["authors"] = authors(children)
+    result["areas"] = publication_areas(children)
+    return result
+
+
+def book_chapter(e):
+    children = group_children(e)
+
+    if "publicado" not in str(first_attribute(children, 'dados-basicos-do-capitulo', 'tipo') or "").lower():
+        return None
+
+    result = dispatch_fields(e, children, BOOK_CHAPTER)
+    result["authors"] = authors(children)
+    result["areas"] = publication_areas(children)
+    result["type"] = "chapter"
+    return result
+
+
+def book(e):
+    children = group_children(e)
+
+    if "publicado" not in str(first_attribute(children, 'dados-basicos-do-capitulo', 'tipo') or "").lower():
+        return None
+
+    result = dispatch_fields(e, children, BOOK)
+    result["authors"] = authors(children)
+    result["areas"] = publication_areas(children)
+    result["type"] = "book"
+    return result
+
+
+def conference_paper(e):
+    children = group_children(e)
+
+    result = dispatch_fields(e, children, CONFERENCE_PAPER)
+    result["authors"] = authors(children)
+    result["areas"] = publication_areas(children)
+    result["type"] = "abstract" if "resumo" in str(result.pop("nature")) else "full"
+    return result
+
+
+def teaching(t):
+    result = merge_period(dispatch_fields(t, None, TEACHING))
+    result["classes"] = [c.text for c in t if c.tag == 'disciplina' and c.text is not None]
+    return result
+
+
+def research_and_development(r):
+    result = merge_period(dispatch_fields(r, None, RESEARCH_AND_DEVELOPMENT))
+    result["research_lines"] = [
+        rl.get('titulo-da-linha-de-pesquisa') for rl in r
+        if rl.tag == 'linha-de-pesquisa' and rl.get('titulo-da-linha-de-pesquisa') is not None]
+    return result
+
+
+def professional_experience(e):
+    children = group_children(e)
+
+    if 'vinculos' not in children:
+        return None
+
+    result = merge_period(dispatch_fields(e, children, PROFESSIONAL_EXPERIENCE))
+    result["teaching"] = [
+        teaching(t) for activities in children.get('atividades-de-ensino', ()) for t in activities
+        if t.tag == 'ensino']
+    result["research_and_development"] = [
+        research_and_development(r)
+        for activities in children.get('atividades-de-pesquisa-e-desenvolvimento', ()) for r in activities
+        if r.tag == 'pesquisa-e-desenvolvimento']
+    return result
+
+
+def patent(e):
+    return dispatch_fields(e, group_children(e), PATENT)
+
+
+def software(e):
+    children = group_children(e)
+
+    result = dispatch_fields(e, children, SOFTWARE)
+    result["registered"] = any(
+        c.tag == 'registro-ou-patente' for d in children.get('detalhamento-do-software', ()) for c in d)
+    result["authors"] = authors(children)
+    return result
+
+
+def organized_event(e):
+    children = group_children(e)
+
+    result = dispatch_fields(e, children, ORGANIZED_EVENT)
+    result["authors"] = authors(children)
+    return result
+
+
+def scientific_report(e):
+    children = group_children(e)
+
+    result = dispatch_fields(e, children, SCIENTIFIC_REPORT)
+    result["authors"] = authors(children)
+    return result
+
+
+def didactic_material(e):
+    children = group_children(e)
+
+    result = dispatch_fields(e, children, DIDACTIC_MATERIAL)
+    result["authors"] = authors(children)
+    return result
+
+
+# record handlers reading attributes from element.attrib, for the paths of xml_parser.RECORD_SECTIONS
+RECORD_HANDLERS = record_table({
+    'education': academic_degree,
+    'professional_experience': professional_experience,
+    'journal_papers': journal_paper,
+    'chapters': book_chapter,
+    'books': book,
+    'conference_papers': conference_paper,
+    'patents': patent,
+    'software': software,
+    'event_organization': organized_event,
+    'scientific_reports': scientific_report,
+    'courseware': didactic_material,
+})
+
+RECORD_PREFIXES = record_prefixes(RECORD_HANDLERS)
+
+
+def walk(element, path, sections, handlers=RECORD_HANDLERS, prefixes=RECORD_PREFIXES):
+
+    for child in element:
+
+        if not isinstance(child.tag, str):
+            continue
+
+        child_path = path + (child.tag,)
+
+        handler = streaming_record(child_path, handlers)
+
+        if handler is not None:
+            key, extractor = handler
+            value = extractor(child)
+            if value is not None:
+                sections[key].append(value)
+
+        elif child_path in prefixes:
+            walk(child, child_path, sections, handlers, prefixes)
+
+
+def dispatch_information(element, fields=None):
+    """
+    Single-pass counterpart of extract_information. The tree is walked once from curriculo-vitae and
+    each record is routed by its tag path to a handler that reads attributes from element.attrib.
+    :param element: parsed Lattes document (as returned by lxml.html.fromstring)
+    :param fields: names of the sections to extract, as in extract_information
+    :return: a dictionary with the same shape of extract_information
+    """
+    cv = element if element.tag == 'curriculo-vitae' else next(element.iter('curriculo-vitae'))
+
+    fields = projection(fields)
+
+    handlers = projected_records(RECORD_HANDLERS, fields)
+
+    sections = {key: [] for key, _ in handlers.values()}
+
+    walk(cv, (), sections, handlers, record_prefixes(handlers))
+
+    general_data = next(child for child in cv if child.tag == 'dados-gerais' and 'nome-completo' in child.attrib)
+
+    header = {
+        'name': general_data.attrib['nome-completo'],
+        'lattes_id': cv.attrib['numero-identificador'],
+        'last_update': cv.attrib['data-atualizacao']
+    }
+
+    return assemble_information(header, sections, fields)
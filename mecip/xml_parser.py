@@ -1,11 +1,61 @@
 # -*- coding: iso-8859-1 -*-
 
 import io
+import os
+import re
 import zipfile
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from datetime import datetime, date
 from lxml import html, etree
 
+from mecip.records import as_records
+
+LATTES_ENCODING = 'iso-8859-1'
+
+LATTES_URL = "http://lattes.cnpq.br/"
+
+# version of the dictionary layout produced by the extractors, to be increased whenever it changes
+SCHEMA_VERSION = 3
+
+XML_DECLARATION_ENCODING = re.compile(br'^\s*<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._-]+)["\']')
+
+# one HTML parser per document encoding, reused across files
+HTML_PARSERS = {}
+
+# compiled XPath expressions shared by every extractor, keyed by the expression string
+XPATHS = {}
+
+
+def compiled_xpath(path):
+    """
+    Returns the compiled form of an XPath expression, compiling it only on its first use in the process.
+    """
+    try:
+        return XPATHS[path]
+    except KeyError:
+        XPATHS[path] = etree.XPath(path, smart_strings=False)
+        return XPATHS[path]
+
+
+def xpath_all(element, path):
+    """
+    Evaluates a (cached) XPath expression on the element.
+    :return: a list with every matched node or attribute value
+    """
+    return compiled_xpath(path)(element)
+
+
+def xpath_first(element, path):
+    """
+    Evaluates a (cached) XPath expression on the element.
+    :return: the first matched node or attribute value, or None when nothing matches
+    """
+    result = compiled_xpath(path)(element)
+    return result[0] if len(result) > 0 else None
+
 
 def diff_month(d1, d2):
     return (d1.year - d2.year) * 12 + d1.month - d2.month
@@ -20,7 +70,7 @@ def default_parser(component):
 
 def none_if_empty(value):
 
-    if value == "":
+    if value is None or value == "":
         return None
 
     if str(value).isdigit() and not str(value).startswith("0"):
@@ -52,192 +102,250 @@ def merge_month_year(month, year):
     return result
 
 
-def course_name(element):
-    try:
-        return none_if_empty(element.xpath("@nome-curso")[0])
-    except:
+def to_text(value):
+    return value if value != "" else None
+
+
+def to_int(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else None
+
+
+def to_flag(value):
+    return value == "SIM"
+
+
+def to_level(value):
+    value = value.strip()
+
+    if value.isdigit():
+        return int(value)
+
+    return value if value != "" else None
+
+
+def schema(*fields):
+    """
+    Builds the extraction schema of a record. Each field is a tuple (output key, child tag, attribute,
+    converter), where the child tag is None for attributes of the record element itself. The XPath of
+    every field is compiled here, once, and the converter turns the raw attribute value into the output
+    type; missing or empty attributes become None.
+    """
+    return [
+        (key, compiled_xpath('@' + attribute if tag is None else tag + '/@' + attribute), tag, attribute, converter)
+        for key, tag, attribute, converter in fields]
+
+
+def extract_fields(element, fields):
+    result = {}
+
+    for key, xpath, _, _, converter in fields:
+        values = xpath(element)
+        result[key] = converter(values[0]) if len(values) > 0 else None
+
+    return result
+
+
+COURSE_LEVEL = {
+    1: "undergraduate",
+    2: "specialization",
+    3: "master",
+    4: "phd",
+    5: "postdoctoral",
+    6: "lecturer",
+    7: "technical",
+    "C": "high_school"
+}
+
+ACADEMIC_DEGREE = schema(
+    ("level_code", None, "nivel", to_level),
+    ("start", None, "ano-de-inicio", to_int),
+    ("end", None, "ano-de-conclusao", to_int),
+    ("completed", None, "status-do-curso", to_text),
+    ("course", None, "nome-curso", to_text),
+    ("institution", None, "nome-instituicao", to_text),
+    ("title_year", None, "ano-de-obtencao-do-titulo", to_int),
+)
+
+
+def academic_degree_from_fields(degree):
+
+    level_code = degree["level_code"]
+
+    if level_code in ['X', 'B']:
         return None
 
+    title_year = degree.pop("title_year")
+
+    if level_code != 6:
+        degree["completed"] = degree["completed"] == "CONCLUIDO"
+    else:
+        degree["start"], degree["end"], degree["completed"] = title_year, title_year, True
+
+    degree["level"] = COURSE_LEVEL[level_code]
+
+    return degree
+
+
+def academic_degree(e):
+    return academic_degree_from_fields(extract_fields(e, ACADEMIC_DEGREE))
+
 
 def education(element):
     result = []
 
     xpath = "//curriculo-vitae/dados-gerais/formacao-academica-titulacao/*"
 
-    course_level = {
-        1: "undergraduate",
-        2: "specialization",
-        3: "master",
-        4: "phd",
-        5: "postdoctoral",
-        6: "lecturer",
-        7: "technical",
-        "C": "high_school"
-    }
+    for e in xpath_all(element, xpath):
 
-    for e in element.xpath(xpath):
+        degree = academic_degree(e)
 
-        level_code = none_if_empty(e.xpath("@nivel")[0])
+        if degree is not None:
+            result.append(degree)
 
-        try:
-            if level_code != 6:
-                start = none_if_empty(e.xpath("@ano-de-inicio")[0])
-            else:
-                start = none_if_empty(e.xpath("@ano-de-obtencao-do-titulo")[0])
-        except:
-            start = None
+    return result
 
-        try:
-            if level_code != 6:
-                end = none_if_empty(e.xpath("@ano-de-conclusao")[0])
-            else:
-                end = start
-        except:
-            end = None
 
-        try:
-            if level_code != 6:
-                completed = none_if_empty(e.xpath("@status-do-curso")[0]) == "CONCLUIDO"
-            else:
-                completed = True
-        except:
-            print(level_code, type(level_code))
-
-        if level_code not in ['X', 'B']:
-            result.append({
-                "level_code": level_code,
-                "level": course_level[level_code],
-                "start": start,
-                "end": end,
-                "completed": completed,
-                "course": course_name(e),
-                "institution": none_if_empty(e.xpath("@nome-instituicao")[0]),
-            })
+PUBLICATION_AREA = schema(
+    ("big_area", None, "nome-grande-area-do-conhecimento", to_text),
+    ("area", None, "nome-da-area-do-conhecimento", to_text),
+    ("sub_area", None, "nome-da-sub-area-do-conhecimento", to_text),
+)
+
+
+def extract_publication_areas(publication):
+    result = []
+
+    for a in xpath_all(publication, "areas-do-conhecimento/*"):
+        area = extract_fields(a, PUBLICATION_AREA)
+        result.append((area["big_area"], area["area"], area["sub_area"]))
 
     return result
 
 
-def doi(element):
-    try:
-        return none_if_empty(element.xpath("dados-basicos-do-artigo/@doi")[0])
-    except:
-        return None
+def extract_authors(element):
+    return [a for a in xpath_all(element, "autores/@nome-completo-do-autor") if a != ""]
 
 
-def extract_publication_areas(publication):
-    result = []
+JOURNAL_PAPER = schema(
+    ("title", "dados-basicos-do-artigo", "titulo-do-artigo", to_text),
+    ("year", "dados-basicos-do-artigo", "ano-do-artigo", to_int),
+    ("journal", "detalhamento-do-artigo", "titulo-do-periodico-ou-revista", to_text),
+    ("start_page", "detalhamento-do-artigo", "pagina-inicial", to_text),
+    ("end_page", "detalhamento-do-artigo", "pagina-final", to_text),
+    ("volume", "detalhamento-do-artigo", "volume", to_text),
+    ("issn", "detalhamento-do-artigo", "issn", to_text),
+    ("doi", "dados-basicos-do-artigo", "doi", to_text),
+)
 
-    for a in publication.xpath("areas-do-conhecimento/*"):
-        big_area = none_if_empty(a.xpath("@nome-grande-area-do-conhecimento")[0])
-        area = none_if_empty(a.xpath("@nome-da-area-do-conhecimento")[0])
-        sub_area = none_if_empty(a.xpath("@nome-da-sub-area-do-conhecimento")[0])
-        result.append((big_area, area, sub_area))
 
+def journal_paper(element):
+    result = extract_fields(element, JOURNAL_PAPER)
+    result["authors"] = extract_authors(element)
+    result["areas"] = extract_publication_areas(element)
     return result
 
 
 def journal_papers(element):
     xpath = "//curriculo-vitae/producao-bibliografica/artigos-publicados/artigo-publicado"
 
-    return [
-        {
-            "title": none_if_empty(journal_paper.xpath("dados-basicos-do-artigo/@titulo-do-artigo")[0]),
-            "authors": [a for a in journal_paper.xpath("autores/@nome-completo-do-autor")],
-            "areas": extract_publication_areas(journal_paper),
-            "year": none_if_empty(journal_paper.xpath("dados-basicos-do-artigo/@ano-do-artigo")[0]),
-            "journal": none_if_empty(journal_paper.xpath("detalhamento-do-artigo/@titulo-do-periodico-ou-revista")[0]),
-            "start_page": none_if_empty(journal_paper.xpath("detalhamento-do-artigo/@pagina-inicial")[0]),
-            "end_page": none_if_empty(journal_paper.xpath("detalhamento-do-artigo/@pagina-final")[0]),
-            "volume": none_if_empty(journal_paper.xpath("detalhamento-do-artigo/@volume")[0]),
-            "issn": none_if_empty(journal_paper.xpath("detalhamento-do-artigo/@issn")[0]),
-            "doi": doi(journal_paper),
-        } for journal_paper in element.xpath(xpath)]
+    return [journal_paper(e) for e in xpath_all(element, xpath)]
 
 
-def books_and_chapters(element):
-    result = []
+BOOK_CHAPTER = schema(
+    ("title", "dados-basicos-do-capitulo", "titulo-do-capitulo-do-livro", to_text),
+    ("year", "dados-basicos-do-capitulo", "ano", to_int),
+    ("book", "detalhamento-do-capitulo", "titulo-do-livro", to_text),
+    ("volume", "detalhamento-do-capitulo", "numero-de-volumes", to_int),
+    ("start_page", "detalhamento-do-capitulo", "pagina-inicial", to_text),
+    ("end_page", "detalhamento-do-capitulo", "pagina-final", to_text),
+    ("publisher", "detalhamento-do-capitulo", "nome-da-editora", to_text),
+    ("doi", "dados-basicos-do-capitulo", "doi", to_text),
+)
 
-    xpath = "//curriculo-vitae/producao-bibliografica/livros-e-capitulos/capitulos-de-livros-publicados/capitulo-de-livro-publicado"
 
-    for chapter in element.xpath(xpath):
-
-        try:
-            chapter_type = str(chapter.xpath("dados-basicos-do-capitulo/@tipo")[0]).lower()
-        except:
-            chapter_type = ""
-
-        if "publicado" in chapter_type:
-            result.append({
-                "title": none_if_empty(chapter.xpath("dados-basicos-do-capitulo/@titulo-do-capitulo-do-livro")[0]),
-                "authors": [none_if_empty(a) for a in chapter.xpath("autores/@nome-completo-do-autor")],
-                "areas": extract_publication_areas(chapter),
-                "year": none_if_empty(chapter.xpath("dados-basicos-do-capitulo/@ano")[0]),
-                "book": none_if_empty(chapter.xpath("detalhamento-do-capitulo/@titulo-do-livro")[0]),
-                "volume": none_if_empty(chapter.xpath("detalhamento-do-capitulo/@numero-de-volumes")[0]),
-                "start_page": none_if_empty(chapter.xpath("detalhamento-do-capitulo/@pagina-inicial")[0]),
-                "end_page": none_if_empty(chapter.xpath("detalhamento-do-capitulo/@pagina-final")[0]),
-                "publisher": none_if_empty(chapter.xpath("detalhamento-do-capitulo/@nome-da-editora")[0]),
-                "doi": doi(chapter),
-                "type": "chapter"
-            })
+def book_chapter(chapter):
 
-    xpath = "//curriculo-vitae/producao-bibliografica/livros-e-capitulos/livros-publicados-ou-organizados/livro-publicado-ou-organizado"
+    chapter_type = str(xpath_first(chapter, "dados-basicos-do-capitulo/@tipo") or "").lower()
 
-    for book in element.xpath(xpath):
-        try:
-            book_type = str(book.xpath("dados-basicos-do-capitulo/@tipo")[0]).lower()
-        except:
-            book_type = ""
-
-        if "publicado" in book_type:
-            result.append({
-                "title": none_if_empty(book.xpath("dados-basicos-do-livro/@titulo-do-livro")[0]),
-                "authors": [none_if_empty(a) for a in book.xpath("autores/@nome-completo-do-autor")],
-                "areas": extract_publication_areas(book),
-                "year": none_if_empty(book.xpath("dados-basicos-do-livro/@ano")[0]),
-                "publisher": none_if_empty(book.xpath("detalhamento-do-livro/@nome-da-editora")[0]),
-                "volume": none_if_empty(book.xpath("detalhamento-do-livro/@numero-de-volumes")[0]),
-                "pages": none_if_empty(book.xpath("detalhamento-do-livro/@numero-de-paginas")[0]),
-                "doi": doi(book),
-                "type": "book"
-            })
+    if "publicado" not in chapter_type:
+        return None
 
+    result = extract_fields(chapter, BOOK_CHAPTER)
+    result["authors"] = extract_authors(chapter)
+    result["areas"] = extract_publication_areas(chapter)
+    result["type"] = "chapter"
     return result
 
 
-def country(publication):
-    try:
-        return none_if_empty(publication.xpath("detalhamento-do-trabalho/@pais-do-evento")[0])
-    except:
+BOOK = schema(
+    ("title", "dados-basicos-do-livro", "titulo-do-livro", to_text),
+    ("year", "dados-basicos-do-livro", "ano", to_int),
+    ("publisher", "detalhamento-do-livro", "nome-da-editora", to_text),
+    ("volume", "detalhamento-do-livro", "numero-de-volumes", to_int),
+    ("pages", "detalhamento-do-livro", "numero-de-paginas", to_int),
+    ("doi", "dados-basicos-do-livro", "doi", to_text),
+)
+
+
+def book(element):
+
+    book_type = str(xpath_first(element, "dados-basicos-do-capitulo/@tipo") or "").lower()
+
+    if "publicado" not in book_type:
         return None
 
+    result = extract_fields(element, BOOK)
+    result["authors"] = extract_authors(element)
+    result["areas"] = extract_publication_areas(element)
+    result["type"] = "book"
+    return result
 
-def conference_papers(element):
-    xpath = "//curriculo-vitae/producao-bibliografica/trabalhos-em-eventos/trabalho-em-eventos"
 
+def books_and_chapters(element):
     result = []
 
-    for conference_paper in element.xpath(xpath):
+    xpath = "//curriculo-vitae/producao-bibliografica/livros-e-capitulos/capitulos-de-livros-publicados/capitulo-de-livro-publicado"
+
+    for e in xpath_all(element, xpath):
+        chapter = book_chapter(e)
+        if chapter is not None:
+            result.append(chapter)
+
+    xpath = "//curriculo-vitae/producao-bibliografica/livros-e-capitulos/livros-publicados-ou-organizados/livro-publicado-ou-organizado"
+
+    for e in xpath_all(element, xpath):
+        b = book(e)
+        if b is not None:
+            result.append(b)
+
+    return result
+
 
-        try:
-            conference_type = str(conference_paper.xpath("dados-basicos-do-trabalho/@natureza")[0])
-        except:
-            conference_type = ""
+CONFERENCE_PAPER = schema(
+    ("title", "dados-basicos-do-trabalho", "titulo-do-trabalho", to_text),
+    ("year", "dados-basicos-do-trabalho", "ano-do-trabalho", to_int),
+    ("conference", "detalhamento-do-trabalho", "nome-do-evento", to_text),
+    ("volume", "detalhamento-do-trabalho", "volume", to_text),
+    ("country", "detalhamento-do-trabalho", "pais-do-evento", to_text),
+    ("nature", "dados-basicos-do-trabalho", "natureza", to_text),
+)
 
-        result.append({
-            "title": none_if_empty(conference_paper.xpath("dados-basicos-do-trabalho/@titulo-do-trabalho")[0]),
-            "authors": [none_if_empty(a) for a in conference_paper.xpath("autores/@nome-completo-do-autor")],
-            "areas": extract_publication_areas(conference_paper),
-            "year": none_if_empty(conference_paper.xpath("dados-basicos-do-trabalho/@ano-do-trabalho")[0]),
-            "conference": none_if_empty(conference_paper.xpath("detalhamento-do-trabalho/@nome-do-evento")[0]),
-            "volume": none_if_empty(conference_paper.xpath("detalhamento-do-trabalho/@volume")[0]),
-            "country": country(conference_paper),
-            "type": "abstract" if "resumo" in str(conference_type) else "full"
-        })
 
+def conference_paper(element):
+    result = extract_fields(element, CONFERENCE_PAPER)
+    result["authors"] = extract_authors(element)
+    result["areas"] = extract_publication_areas(element)
+    result["type"] = "abstract" if "resumo" in str(result.pop("nature")) else "full"
     return result
 
 
+def conference_papers(element):
+    xpath = "//curriculo-vitae/producao-bibliografica/trabalhos-em-eventos/trabalho-em-eventos"
+
+    return [conference_paper(e) for e in xpath_all(element, xpath)]
+
+
 def publications(element):
     """
     [X] Artigos public. peridicos
@@ -255,77 +363,96 @@ def publications(element):
     }
 
 
+PROFESSIONAL_EXPERIENCE = schema(
+    ("company_code", None, "codigo-instituicao", str),
+    ("company_name", None, "nome-instituicao", str),
+    ("order", None, "sequencia-importancia", to_int),
+    ("position", "vinculos", "outro-enquadramento-funcional-informado", to_text),
+    ("weekly_workload", "vinculos", "carga-horaria-semanal", to_int),
+    ("exclusive_dedication", "vinculos", "flag-dedicacao-exclusiva", to_flag),
+    ("start_month", "vinculos", "mes-inicio", to_int),
+    ("start_year", "vinculos", "ano-inicio", to_int),
+    ("end_month", "vinculos", "mes-fim", to_int),
+    ("end_year", "vinculos", "ano-fim", to_int),
+)
+
+TEACHING = schema(
+    ("level", None, "tipo-ensino", to_text),
+    ("course", None, "nome-curso", to_text),
+    ("start_month", None, "mes-inicio", to_int),
+    ("start_year", None, "ano-inicio", to_int),
+    ("end_month", None, "mes-fim", to_int),
+    ("end_year", None, "ano-fim", to_int),
+)
+
+RESEARCH_AND_DEVELOPMENT = schema(
+    ("company_code", None, "codigo-orgao", to_text),
+    ("company_name", None, "nome-orgao", to_text),
+    ("start_month", None, "mes-inicio", to_int),
+    ("start_year", None, "ano-inicio", to_int),
+    ("end_month", None, "mes-fim", to_int),
+    ("end_year", None, "ano-fim", to_int),
+)
+
+
+def merge_period(fields):
+    """
+    Replaces the month and year fields of a record by the "MM/YYYY" start and end values.
+    """
+    fields["start"] = merge_month_year(fields.pop("start_month"), fields.pop("start_year"))
+    fields["end"] = merge_month_year(fields.pop("end_month"), fields.pop("end_year"))
+    return fields
+
+
+def teaching(t):
+    result = merge_period(extract_fields(t, TEACHING))
+    result["classes"] = [c for c in xpath_all(t, "disciplina/text()")]
+    return result
+
+
+def research_and_development(r):
+    result = merge_period(extract_fields(r, RESEARCH_AND_DEVELOPMENT))
+    result["research_lines"] = [rl for rl in xpath_all(r, "linha-de-pesquisa/@titulo-da-linha-de-pesquisa")]
+    return result
+
+
+def professional_experience(e):
+
+    # entries without an employment relationship are not experiences
+    if len(xpath_all(e, "vinculos")) == 0:
+        return None
+
+    result = merge_period(extract_fields(e, PROFESSIONAL_EXPERIENCE))
+    result["teaching"] = [teaching(t) for t in xpath_all(e, "atividades-de-ensino/ensino")]
+    result["research_and_development"] = [
+        research_and_development(r)
+        for r in xpath_all(e, "atividades-de-pesquisa-e-desenvolvimento/pesquisa-e-desenvolvimento")]
+    return result
+
+
 def professional_experiences(element):
     result = []
 
     xpath = '//curriculo-vitae/dados-gerais/atuacoes-profissionais/atuacao-profissional'
 
-    for e in element.xpath(xpath):
-
-        try:
-            order = int(e.xpath("@sequencia-importancia")[0])
-        except:
-            order = None
-
-        try:
-            position = e.xpath("vinculos/@outro-enquadramento-funcional-informado")[0]
-
-            start_month = none_if_empty(e.xpath("vinculos/@mes-inicio")[0])
-            start_year = none_if_empty(e.xpath("vinculos/@ano-inicio")[0])
-
-            end_month = none_if_empty(e.xpath("vinculos/@mes-fim")[0])
-            end_year = none_if_empty(e.xpath("vinculos/@ano-fim")[0])
-
-            weekly_workload = none_if_empty(e.xpath("vinculos/@carga-horaria-semanal")[0])
-
-            exclusive_dedication = none_if_empty(e.xpath("vinculos/@flag-dedicacao-exclusiva")[0])
-
-            teaching = [{
-                "level": none_if_empty(t.xpath("@tipo-ensino")[0]),
-                "start": merge_month_year(t.xpath("@mes-inicio")[0], t.xpath("@ano-inicio")[0]),
-                "end": merge_month_year(t.xpath("@mes-fim")[0], t.xpath("@ano-fim")[0]),
-                "course": none_if_empty(t.xpath("@nome-curso")[0]),
-                "classes": [none_if_empty(c) for c in t.xpath("disciplina/text()")]
-            } for t in e.xpath("atividades-de-ensino/ensino")]
-
-            research_and_development = [
-                {
-                    "start": merge_month_year(r.xpath("@mes-inicio")[0], r.xpath("@ano-inicio")[0]),
-                    "end": merge_month_year(r.xpath("@mes-fim")[0], r.xpath("@ano-fim")[0]),
-                    "company_code": none_if_empty(r.xpath("@codigo-orgao")[0]),
-                    "company_name": none_if_empty(r.xpath("@nome-orgao")[0]),
-                    "research_lines": [rl for rl in r.xpath("linha-de-pesquisa/@titulo-da-linha-de-pesquisa")]
-                } for r in e.xpath("atividades-de-pesquisa-e-desenvolvimento/pesquisa-e-desenvolvimento")
-            ]
-
-            result.append({
-                "company_code": e.xpath("@codigo-instituicao")[0],
-                "company_name": e.xpath("@nome-instituicao")[0],
-                "position": none_if_empty(position),
-                "weekly_workload": int(weekly_workload) if weekly_workload is not None else None,
-                "start": merge_month_year(start_month, start_year),
-                "end": merge_month_year(end_month, end_year),
-                "exclusive_dedication": exclusive_dedication == "SIM",
-                "order": order,
-                "teaching": teaching,
-                "research_and_development": research_and_development
-            })
-        except IndexError:
-            pass
+    for e in xpath_all(element, xpath):
+
+        experience = professional_experience(e)
+
+        if experience is not None:
+            result.append(experience)
 
     return result
 
 
 def name(element):
     xpath = '//curriculo-vitae/dados-gerais/@nome-completo'
-    return str(element.xpath(xpath)[0])
+    return str(xpath_all(element, xpath)[0])
 
 
-def last_update(element):
-    xpath = '//curriculo-vitae/@data-atualizacao'
-    extracted_date = str(element.xpath(xpath)[0])
+def parse_last_update(extracted_date):
 
-    last_update = datetime.strptime(extracted_date, '%d%m%Y')
+    last_update = datetime.strptime(str(extracted_date), '%d%m%Y')
 
     return {
         'last_update': last_update,
@@ -333,126 +460,539 @@ def last_update(element):
     }
 
 
+def last_update(element):
+    xpath = '//curriculo-vitae/@data-atualizacao'
+    return parse_last_update(xpath_all(element, xpath)[0])
+
+
+PATENT = schema(
+    ("title", "dados-basicos-da-patente", "titulo", to_text),
+    ("year", "dados-basicos-da-patente", "ano-desenvolvimento", to_int),
+    ("country", "dados-basicos-da-patente", "pais", to_text),
+    ("sponsor", "detalhamento-da-patente", "instituicao-financiadora", to_text),
+)
+
+
+def patent(p):
+    return extract_fields(p, PATENT)
+
+
 def patents(element):
     xpath = "//curriculo-vitae/producao-tecnica/patente"
 
-    result = []
+    return [patent(p) for p in xpath_all(element, xpath)]
+
 
-    for p in element.xpath(xpath):
-        try:
-            result.append({
-                "title": none_if_empty(p.xpath("dados-basicos-da-patente/@titulo")[0]),
-                "year": none_if_empty(p.xpath("dados-basicos-da-patente/@ano-desenvolvimento")[0]),
-                "country": none_if_empty(p.xpath("dados-basicos-da-patente/@pais")[0]),
-                "sponsor": none_if_empty(p.xpath("detalhamento-da-patente/@instituicao-financiadora")[0])
-            })
-        except:
-            print(etree.tostring(p))
+SOFTWARE = schema(
+    ("title", "dados-basicos-do-software", "titulo-do-software", str),
+    ("year", "dados-basicos-do-software", "ano", to_int),
+)
 
+
+def software(s):
+    result = extract_fields(s, SOFTWARE)
+    result["registered"] = len(xpath_all(s, "detalhamento-do-software/registro-ou-patente")) > 0
+    result["authors"] = extract_authors(s)
     return result
 
 
 def softwares(element):
     xpath = "//curriculo-vitae/producao-tecnica/software"
 
-    result = []
+    return [software(s) for s in xpath_all(element, xpath)]
+
+
+ORGANIZED_EVENT = schema(
+    ("title", "dados-basicos-da-organizacao-de-evento", "titulo", to_text),
+    ("year", "dados-basicos-da-organizacao-de-evento", "ano", to_int),
+)
 
-    for s in element.xpath(xpath):
-        result.append({
-            "title": s.xpath("dados-basicos-do-software/@titulo-do-software")[0],
-            "year": none_if_empty(s.xpath("dados-basicos-do-software/@ano")[0]),
-            "registered": len(s.xpath("detalhamento-do-software/registro-ou-patente")) > 0,
-            "authors": [none_if_empty(a) for a in s.xpath("autores/@nome-completo-do-autor")],
-        })
 
+def organized_event(e):
+    result = extract_fields(e, ORGANIZED_EVENT)
+    result["authors"] = extract_authors(e)
     return result
 
 
 def event_organization(element):
     xpath = "//curriculo-vitae/producao-tecnica/demais-tipos-de-producao-tecnica/organizacao-de-evento"
 
-    result = []
+    return [organized_event(e) for e in xpath_all(element, xpath)]
+
+
+SCIENTIFIC_REPORT = schema(
+    ("title", "dados-basicos-do-relatorio-de-pesquisa", "titulo", to_text),
+    ("year", "dados-basicos-do-relatorio-de-pesquisa", "ano", to_int),
+    ("project", "detalhamento-do-relatorio-de-pesquisa", "nome-do-projeto", str),
+)
 
-    for e in element.xpath(xpath):
-        result.append({
-            "title": none_if_empty(e.xpath("dados-basicos-da-organizacao-de-evento/@titulo")[0]),
-            "year": none_if_empty(e.xpath("dados-basicos-da-organizacao-de-evento/@ano")[0]),
-            "authors": [a for a in e.xpath("autores/@nome-completo-do-autor") if none_if_empty(a) is not None]
-        })
 
+def scientific_report(e):
+    result = extract_fields(e, SCIENTIFIC_REPORT)
+    result["authors"] = extract_authors(e)
     return result
 
 
 def scientific_reports(element):
     xpath = "//curriculo-vitae/producao-tecnica/demais-tipos-de-producao-tecnica/relatorio-de-pesquisa"
 
-    result = []
+    return [scientific_report(e) for e in xpath_all(element, xpath)]
+
 
-    for e in element.xpath(xpath):
-        result.append({
-            "title": none_if_empty(e.xpath("dados-basicos-do-relatorio-de-pesquisa/@titulo")[0]),
-            "year": none_if_empty(e.xpath("dados-basicos-do-relatorio-de-pesquisa/@ano")[0]),
-            "authors": [a for a in e.xpath("autores/@nome-completo-do-autor") if none_if_empty(a) is not None],
-            "project": e.xpath("detalhamento-do-relatorio-de-pesquisa/@nome-do-projeto")[0]
-        })
+DIDACTIC_MATERIAL = schema(
+    ("type", "dados-basicos-do-material-didatico-ou-instrucional", "natureza", to_text),
+    ("title", "dados-basicos-do-material-didatico-ou-instrucional", "titulo", to_text),
+    ("year", "dados-basicos-do-material-didatico-ou-instrucional", "ano", to_int),
+    ("link", "dados-basicos-do-material-didatico-ou-instrucional", "home-page-do-trabalho", to_text),
+)
 
+
+def didactic_material(e):
+    result = extract_fields(e, DIDACTIC_MATERIAL)
+    result["authors"] = extract_authors(e)
     return result
 
 
 def courseware(element):
     xpath = "//curriculo-vitae/producao-tecnica/demais-tipos-de-producao-tecnica/desenvolvimento-de-material-didatico-ou-instrucional"
 
-    result = []
+    return [didactic_material(e) for e in xpath_all(element, xpath)]
 
-    for e in element.xpath(xpath):
-        result.append({
-            'authors': [a for a in e.xpath("autores/@nome-completo-do-autor") if none_if_empty(a) is not None],
-            'type': none_if_empty(e.xpath('dados-basicos-do-material-didatico-ou-instrucional/@natureza')[0]),
-            'title': none_if_empty(e.xpath('dados-basicos-do-material-didatico-ou-instrucional/@titulo')[0]),
-            'year': none_if_empty(e.xpath('dados-basicos-do-material-didatico-ou-instrucional/@ano')[0]),
-            'link': none_if_empty(
-                e.xpath('dados-basicos-do-material-didatico-ou-instrucional/@home-page-do-trabalho')[0])
-        })
 
-    return result
+def lattes_url_from_id(lattes_id):
+
+    lattes_id = to_text(lattes_id)
+
+    return None if lattes_id is None else LATTES_URL + lattes_id
 
 
 def lattes_url(element):
 
     xpath = "//curriculo-vitae/@numero-identificador"
 
-    url = "http://lattes.cnpq.br/"
+    return lattes_url_from_id(xpath_all(element, xpath)[0])
+
+
+# sections of the dictionary produced by extract_information, in output order, and the functions
+# extracting them; last_update and months_from_last_update are always read together
+SECTIONS = {
+    'name': name,
+    'lattes_url': lattes_url,
+    'last_update': last_update,
+    'months_from_last_update': last_update,
+    'professional_experience': professional_experiences,
+    'publications': publications,
+    'education': education,
+    'patents': patents,
+    'software': softwares,
+    'event_organization': event_organization,
+    'scientific_reports': scientific_reports,
+    'courseware': courseware
+}
+
+
+def projection(fields=None):
+    """
+    Validates a field projection.
+    :param fields: names of the sections of extract_information to extract; None selects all of them
+    :return: the selected section names, in output order
+    """
+    if fields is None:
+        return list(SECTIONS)
+
+    unknown = set(fields) - set(SECTIONS)
+
+    if len(unknown) > 0:
+        raise ValueError('Unknown CV fields: {}'.format(', '.join(sorted(unknown))))
+
+    fields = set(fields)
+
+    if 'last_update' in fields or 'months_from_last_update' in fields:
+        fields.update(['last_update', 'months_from_last_update'])
+
+    return [key for key in SECTIONS if key in fields]
+
+
+def extract_information(element, fields=None):
+    """
+    Extracts the sections of a Lattes CV.
+    :param element: parsed Lattes document (as returned by lxml.html.fromstring)
+    :param fields: names of the sections to extract (see SECTIONS); None extracts all of them. The
+    sections left out are never parsed and are missing from the result.
+    """
+    result = {}
+
+    for key in projection(fields):
+        if key not in result:
+            if SECTIONS[key] is last_update:
+                result.update(last_update(element))
+            else:
+                result[key] = SECTIONS[key](element)
+
+    return result
+
+
+def assemble_information(header, sections, fields):
+    """
+    Builds the dictionary of extract_information from the record lists collected by the single-pass
+    engines (stream_information and xml_dispatcher.dispatch_information).
+    :param header: dictionary with the name, lattes_id and last_update attributes of the document
+    :param sections: record lists keyed by section, as in STREAMING_RECORDS
+    :param fields: the projection, as returned by projection
+    """
+    result = {}
+
+    for key in fields:
+        if key == 'name':
+            result['name'] = str(header['name'])
+        elif key == 'lattes_url':
+            result['lattes_url'] = lattes_url_from_id(header['lattes_id'])
+        elif key == 'last_update':
+            result.update(parse_last_update(header['last_update']))
+        elif key == 'publications':
+            result['publications'] = {
+                'journal_papers': sections['journal_papers'],
+                'books_and_chapters': sections['chapters'] + sections['books'],
+                'conference_papers': sections['conference_papers'],
+                'translations': [],
+            }
+        elif key in sections:
+            result[key] = sections[key]
+
+    return result
+
 
-    lattes_id = none_if_empty(element.xpath(xpath)[0])
+# sections of the record elements consumed by the single-pass engines (stream_information and
+# xml_dispatcher.dispatch_information), keyed by their tag path below curriculo-vitae; a trailing '*' matches
+# any child of the given parent
+RECORD_SECTIONS = {
+    ('dados-gerais', 'formacao-academica-titulacao', '*'): 'education',
+    ('dados-gerais', 'atuacoes-profissionais', 'atuacao-profissional'): 'professional_experience',
+    ('producao-bibliografica', 'artigos-publicados', 'artigo-publicado'): 'journal_papers',
+    ('producao-bibliografica', 'livros-e-capitulos', 'capitulos-de-livros-publicados', 'capitulo-de-livro-publicado'):
+        'chapters',
+    ('producao-bibliografica', 'livros-e-capitulos', 'livros-publicados-ou-organizados', 'livro-publicado-ou-organizado'):
+        'books',
+    ('producao-bibliografica', 'trabalhos-em-eventos', 'trabalho-em-eventos'): 'conference_papers',
+    ('producao-tecnica', 'patente'): 'patents',
+    ('producao-tecnica', 'software'): 'software',
+    ('producao-tecnica', 'demais-tipos-de-producao-tecnica', 'organizacao-de-evento'): 'event_organization',
+    ('producao-tecnica', 'demais-tipos-de-producao-tecnica', 'relatorio-de-pesquisa'): 'scientific_reports',
+    ('producao-tecnica', 'demais-tipos-de-producao-tecnica', 'desenvolvimento-de-material-didatico-ou-instrucional'):
+        'courseware',
+}
+
+
+def record_table(extractors):
+    """
+    Record table of a single-pass engine: the section and the extractor of every path of RECORD_SECTIONS.
+    :param extractors: the extractor of the records of every section
+    :return: a dictionary of (section, extractor) keyed by tag path
+    """
+    return {path: (key, extractors[key]) for path, key in RECORD_SECTIONS.items()}
 
-    return None if lattes_id is None else url + str(lattes_id)
 
+STREAMING_RECORDS = record_table({
+    'education': academic_degree,
+    'professional_experience': professional_experience,
+    'journal_papers': journal_paper,
+    'chapters': book_chapter,
+    'books': book,
+    'conference_papers': conference_paper,
+    'patents': patent,
+    'software': software,
+    'event_organization': organized_event,
+    'scientific_reports': scientific_report,
+    'courseware': didactic_material,
+})
+
+
+def record_prefixes(records):
+    """
+    Every proper prefix of the paths of a record table, so a walk never descends into unrelated sections.
+    """
+    return {path[:i] for path in records for i in range(1, len(path))}
 
-def extract_information(element):
+
+# record lists of the single-pass engines that make up the publications section
+PUBLICATION_RECORDS = {'journal_papers', 'chapters', 'books', 'conference_papers'}
+
+
+def projected_records(handlers, fields):
+    """
+    Keeps the entries of a record table (STREAMING_RECORDS or xml_dispatcher.RECORD_HANDLERS) whose
+    records belong to one of the projected sections.
+    """
     return {
-        'name': name(element),
-        "lattes_url": lattes_url(element),
-        **last_update(element),
-        'professional_experience': professional_experiences(element),
-        'publications': publications(element),
-        'education': education(element),
-        'patents': patents(element),
-        'software': softwares(element),
-        'event_organization': event_organization(element),
-        'scientific_reports': scientific_reports(element),
-        'courseware': courseware(element)
-    }
+        path: (key, extractor) for path, (key, extractor) in handlers.items()
+        if ('publications' if key in PUBLICATION_RECORDS else key) in fields}
+
+
+def streaming_record(path, records=STREAMING_RECORDS):
+
+    record = records.get(path)
+
+    if record is None and len(path) > 0:
+        record = records.get(path[:-1] + ('*',))
+
+    return record
+
+
+def stream_information(source, encoding=LATTES_ENCODING, fields=None):
+    """
+    Streaming counterpart of extract_information built on lxml.etree.iterparse. Each record is
+    extracted as soon as its end tag is read and then cleared, together with the siblings already
+    consumed, so the in-memory tree never holds more than one record at a time.
+    :param source: file path or binary file-like object with the Lattes XML
+    :param encoding: character encoding of the document
+    :param fields: names of the sections to extract, as in extract_information
+    :return: a dictionary with the same shape of extract_information
+    """
+    fields = projection(fields)
+
+    records = projected_records(STREAMING_RECORDS, fields)
+
+    sections = {key: [] for key, _ in records.values()}
+
+    header, path, root_depth, record, record_element = {}, [], None, None, None
+
+    for event, e in etree.iterparse(source, events=('start', 'end'), html=True, encoding=encoding):
+
+        if event == 'start':
+            path.append(e.tag)
+
+            if record is not None:
+                continue
+
+            if root_depth is None:
+                if e.tag == 'curriculo-vitae':
+                    root_depth = len(path)
+                    header['lattes_id'] = e.get('numero-identificador')
+                    header['last_update'] = e.get('data-atualizacao')
+                continue
+
+            relative_path = tuple(path[root_depth:])
+
+            if relative_path == ('dados-gerais',):
+                header['name'] = e.get('nome-completo')
 
+            record = streaming_record(relative_path, records)
 
-def process_file(file_path):
+            if record is not None:
+                record_element = e
 
+            continue
+
+        path.pop()
+
+        if e is record_element:
+            key, extractor = record
+            value = extractor(e)
+            if value is not None:
+                sections[key].append(value)
+            record, record_element = None, None
+
+        elif record is not None:
+            continue
+
+        e.clear()
+
+        parent = e.getparent()
+
+        while parent is not None and e.getprevious() is not None:
+            del parent[0]
+
+    return assemble_information(header, sections, fields)
+
+
+def declared_encoding(head, default=LATTES_ENCODING):
+    """
+    Reads the encoding from the XML declaration at the beginning of a document.
+    :param head: first bytes of the document
+    :param default: encoding assumed when the declaration does not state one
+    """
+    match = XML_DECLARATION_ENCODING.match(head)
+    return match.group(1).decode('ascii') if match is not None else default
+
+
+def html_parser(encoding):
+    if encoding not in HTML_PARSERS:
+        HTML_PARSERS[encoding] = html.HTMLParser(encoding=encoding)
+    return HTML_PARSERS[encoding]
+
+
+def process_stream(file, streaming=False, fields=None, engine=extract_information):
+    """
+    Parses a CV from a binary stream, which is handed to lxml as is. The HTML parser used by the
+    extractors ignores the XML declaration, so its encoding is read here and passed explicitly.
+    :param file: binary file-like object supporting peek (regular files and zip members)
+    :param streaming: whether to use the streaming engine
+    :param fields: names of the sections to extract, as in extract_information
+    :param engine: function building the CV from the parsed document, extract_information or the single-pass
+    xml_dispatcher.dispatch_information; not used by the streaming engine
+    """
+    encoding = declared_encoding(file.peek(256))
+
+    if streaming:
+        return stream_information(file, encoding=encoding, fields=fields)
+
+    return engine(html.parse(file, parser=html_parser(encoding)).getroot(), fields=fields)
+
+
+def process_file(file_path, streaming=False, records=False, fields=None, engine=extract_information):
+    """
+    Parses a Lattes CV, either a .xml file or a .zip with a curriculo.xml member.
+    :param streaming: whether to use the streaming engine
+    :param fields: names of the sections to extract, as in extract_information
+    :param records: whether to return a mecip.records.Curriculum instead of dictionaries
+    :param engine: function building the CV from the parsed document (see process_stream)
+    """
     if not str(file_path).endswith('.zip'):
-        with open(file_path, mode='r', encoding='iso-8859-1') as file:
-            content = file.read()
-            return extract_information(html.fromstring(bytes(content, encoding='iso-8859-1')))
+        with open(file_path, mode='rb') as file:
+            cv = process_stream(file, streaming=streaming, fields=fields, engine=engine)
     else:
-        archive = zipfile.ZipFile(file_path, 'r')
-        with archive.open('curriculo.xml', mode='r') as file:
-            content = io.TextIOWrapper(file, encoding='iso-8859-1').read()
-            return extract_information(html.fromstring(content.encode()))
+        with zipfile.ZipFile(file_path, 'r') as archive:
+            with archive.open('curriculo.xml', mode='r') as file:
+                cv = process_stream(file, streaming=streaming, fields=fields, engine=engine)
+
+    return as_records(cv) if records else cv
+
+
+def iterate_archive(archive, streaming=False, records=False, fields=None, engine=extract_information):
+    """
+    Iterates over every CV of an archive, such as a department export, without unpacking it to disk.
+    XML members are parsed straight from the compressed stream and zip members (one exported CV each)
+    are opened recursively in memory.
+    :param archive: path or binary file-like object of a zip archive
+    :param streaming: whether to use the streaming engine
+    :param records: whether to yield mecip.records.Curriculum instances instead of dictionaries
+    :param fields: names of the sections to extract, as in extract_information
+    :param engine: function building the CV from the parsed document (see process_stream)
+    :return: a generator of tuples (member name, parsed CV or None, error message or None)
+    """
+    with zipfile.ZipFile(archive, 'r') as z:
+
+        for member in z.infolist():
+
+            member_name = member.filename.lower()
+
+            if member.is_dir() or not member_name.endswith(('.xml', '.zip')):
+                continue
+
+            try:
+                with z.open(member, mode='r') as file:
+                    if member_name.endswith('.xml'):
+                        cv = process_stream(file, streaming=streaming, fields=fields, engine=engine)
+                        yield member.filename, as_records(cv) if records else cv, None
+                        continue
+
+                    content = io.BytesIO(file.read())
+
+                for nested_name, cv, error in iterate_archive(content, streaming, records, fields, engine):
+                    yield member.filename + '/' + nested_name, cv, error
+
+            except Exception as e:
+                yield member.filename, None, '{}: {}'.format(type(e).__name__, e)
+
+
+def process_archive(file_path, streaming=False, records=False, fields=None, engine=extract_information):
+    """
+    Parses every CV of an archive with many curriculo.xml members.
+    :return: a tuple (list of parsed CVs, list of (member name, error message) for the members that failed)
+    """
+    result, failures = [], []
+
+    for member_name, cv, error in iterate_archive(file_path, streaming, records, fields, engine):
+        if error is None:
+            result.append(cv)
+        else:
+            failures.append((member_name, error))
+
+    return result, failures
+
+
+def try_process_file(file_path, streaming=False, cache=None, records=False, fields=None, engine=extract_information):
+    """
+    Calls process_file (or cache.process_file, when a cache is given) catching any failure, so a broken
+    CV does not abort a batch.
+    :return: a tuple (parsed CV or None, error message or None)
+    """
+    try:
+        if cache is not None:
+            cv = cache.process_file(file_path, streaming=streaming, fields=fields, engine=engine)
+        else:
+            cv = process_file(file_path, streaming=streaming, fields=fields, engine=engine)
+
+        return as_records(cv) if records else cv, None
+    except Exception as e:
+        return None, '{}: {}'.format(type(e).__name__, e)
+
+
+def try_process_files(file_paths, streaming=False, cache=None, records=False, fields=None, engine=extract_information):
+    """
+    Calls try_process_file on a chunk of files, the unit of work sent to a worker process.
+    """
+    return [try_process_file(file_path, streaming, cache, records, fields, engine) for file_path in file_paths]
+
+
+def iterate_directory(path, workers=1, chunksize=1, streaming=False, cache=None, records=False, fields=None,
+                      engine=extract_information):
+    """
+    Parses every CV in a directory, yielding each result as soon as it is available, so parsing overlaps
+    with whatever consumes the generator. Files are processed in name order and yielded in that same
+    order regardless of the number of workers. The parameters are those of process_directory.
+    :return: a generator of tuples (file path, parsed CV or None, error message or None)
+    """
+    file_paths = [os.path.join(path, filename) for filename in sorted(os.listdir(path))]
+    file_paths = [file_path for file_path in file_paths if os.path.isfile(file_path)]
+
+    if workers == 1:
+        for file_path in file_paths:
+            yield (file_path,) + try_process_file(file_path, streaming, cache, records, fields, engine)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+
+            # at most two chunks per worker are parsed ahead of the consumer, so memory does not grow with
+            # the number of files
+            for start in range(0, len(file_paths), chunksize):
+                chunk = file_paths[start:start + chunksize]
+                pending.append((chunk, executor.submit(try_process_files, chunk, streaming, cache, records, fields,
+                                                       engine)))
+
+                if len(pending) >= 2 * workers:
+                    chunk, future = pending.popleft()
+                    for file_path, outcome in zip(chunk, future.result()):
+                        yield (file_path,) + outcome
+
+            while len(pending) > 0:
+                chunk, future = pending.popleft()
+                for file_path, outcome in zip(chunk, future.result()):
+                    yield (file_path,) + outcome
+
+
+def process_directory(path, workers=1, chunksize=1, streaming=False, cache=None, records=False, fields=None,
+                      engine=extract_information):
+    """
+    Parses every CV in a directory, optionally spreading the files over a pool of worker processes.
+    Files are processed in name order and results are returned in that same order regardless of the
+    number of workers.
+    :param path: directory with Lattes files (.xml or .zip)
+    :param workers: number of worker processes; 1 parses in the calling process
+    :param chunksize: number of files sent to a worker at a time
+    :param streaming: whether to use the streaming engine
+    :param cache: optional cache of parsed CVs (see mecip.cache.ParsedCVCache)
+    :param records: whether to return mecip.records.Curriculum instances instead of dictionaries
+    :param fields: names of the sections to extract, as in extract_information
+    :param engine: function building the CV from the parsed document (see process_stream)
+    :return: a tuple (list of parsed CVs, list of (file path, error message) for the files that failed)
+    """
+    result, failures = [], []
+
+    for file_path, cv, error in iterate_directory(path, workers, chunksize, streaming, cache, records, fields, engine):
+        if error is None:
+            result.append(cv)
+        else:
+            failures.append((file_path, error))
 
+    return result, failures
@@ -0,0 +1,38 @@
+import copy
+import os
+
+from mecip.xml_parser import process_file
+
+BASE_PATH = './resources/lattes'
+
+SAMPLE_CV = '1234567890123456.xml'
+
+
+def sample_cv():
+    """
+    The parsed fixture CV.
+    """
+    return process_file(os.path.join(BASE_PATH, SAMPLE_CV))
+
+
+def corpus(names, first_id=0):
+    """
+    Corpus of copies of the fixture CV, each one with its own name and Lattes id.
+    :param names: the names of the professors, or their number to name them Professor 0, Professor 1, ...
+    :param first_id: Lattes id of the first professor; the others follow it
+    :return: a list of parsed CVs
+    """
+    if isinstance(names, int):
+        names = ['Professor {}'.format(i) for i in range(names)]
+
+    cv = sample_cv()
+
+    result = []
+
+    for i, name in enumerate(names):
+        professor = copy.deepcopy(cv)
+        professor['name'] = name
+        professor['lattes_url'] = 'http://lattes.cnpq.br/{:016d}'.format(first_id + i)
+        result.append(professor)
+
+    return result
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from datetime import date
+
+from mecip.areas import AreaClassifier
+from mecip.areas import CNPQ_TAXONOMY
+from mecip.areas import load_taxonomy
+from mecip.areas import normalize_area
+from mecip.index_extractor import ProfessorIndexExtractor
+from mecip.xml_parser import process_directory
+
+
+class AreasTest(unittest.TestCase):
+
+    def test_resolution(self):
+
+        self.assertEqual('ciencias exatas e da terra', normalize_area('CIENCIAS_EXATAS_E_DA_TERRA'))
+        self.assertEqual(normalize_area('Lingüística, Letras e Artes'), normalize_area('LINGUISTICA_LETRAS_E_ARTES'))
+
+        computing = CNPQ_TAXONOMY.find('Ciência da Computação')
+
+        node = CNPQ_TAXONOMY.resolve(
+            ('CIENCIAS_EXATAS_E_DA_TERRA', 'Ciência da Computação', 'Sistemas de Computação'))
+        self.assertEqual('Sistemas de Computação', node.name)
+        self.assertIn(computing.key, node.ancestors)
+
+        # unknown sub-areas stay at the area, and areas are found by name under a wrong grande área
+        self.assertIs(computing, CNPQ_TAXONOMY.resolve(('CIENCIAS_EXATAS_E_DA_TERRA', 'CIÊNCIA DA COMPUTAÇÃO', 'X')))
+        self.assertIs(computing, CNPQ_TAXONOMY.resolve(('ENGENHARIAS', 'Ciencia da Computacao', '')))
+        self.assertIsNone(CNPQ_TAXONOMY.resolve(('', 'Alquimia', '')))
+
+        with self.assertRaises(ValueError):
+            CNPQ_TAXONOMY.find('Alquimia')
+
+        classifier = AreaClassifier(CNPQ_TAXONOMY, ['Ciências Exatas e da Terra'])
+
+        self.assertTrue(classifier.any_matches([('CIENCIAS_HUMANAS', 'Educação', ''),
+                                                ('CIENCIAS_EXATAS_E_DA_TERRA', 'Matemática', 'Álgebra')]))
+        self.assertFalse(classifier.any_matches([('CIENCIAS_HUMANAS', 'Educação', '')]))
+
+    def test_configured_area(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        reference_date = date(2026, 1, 1)
+
+        computing = ProfessorIndexExtractor(reference_date=reference_date).compute_index(raw_data)
+        education = ProfessorIndexExtractor(reference_date=reference_date,
+                                            areas=[('Ciências Humanas', 'Educação')]).compute_index(raw_data)
+
+        for column in ['artigo_periodico', 'livro_capitulo']:
+            areas = [c for c in computing.columns if c.startswith(column)]
+            self.assertEqual(computing[areas].sum(axis=1).tolist(), education[areas].sum(axis=1).tolist())
+
+        self.assertEqual(1, computing['livro_capitulo_area'][0])
+        self.assertEqual(0, education['livro_capitulo_area'][0])
+
+    def test_load_taxonomy(self):
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            file_path = os.path.join(directory, 'areas.csv')
+
+            with open(file_path, mode='w', encoding='utf-8') as file:
+                file.write('Engenharias;Engenharia Elétrica;Telecomunicações\nEngenharias;Engenharia Civil\n')
+
+            taxonomy = load_taxonomy(file_path)
+
+            self.assertEqual(4, len(taxonomy))
+            self.assertEqual(('engenharias', 'engenharia eletrica', 'telecomunicacoes'),
+                             taxonomy.find('telecomunicacoes').key)
+        finally:
+            shutil.rmtree(directory)
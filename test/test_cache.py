@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mecip.cache import ParsedCVCache
+from mecip.xml_parser import process_file
+
+
+class ParsedCVCacheTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cached_output_matches_parser(self):
+
+        cache = ParsedCVCache(self.directory)
+
+        for filename in os.listdir(self.BASE_PATH):
+            file_path = os.path.join(self.BASE_PATH, filename)
+
+            expected = process_file(file_path)
+
+            self.assertEqual(expected, cache.process_file(file_path))
+            self.assertEqual(1, len(cache.entries()))
+            self.assertEqual(expected, cache.process_file(file_path))
+
+    def test_eviction_keeps_cache_bounded(self):
+
+        cache = ParsedCVCache(self.directory, max_bytes=1024)
+
+        for i in range(10):
+            cache.put(cache.key(str(i).encode()), {'payload': os.urandom(300)})
+
+        self.assertLessEqual(cache.disk_usage(), 1024)
+        self.assertIsNotNone(cache.get(cache.key(b'9')))
+        self.assertIsNone(cache.get(cache.key(b'0')))
+
+    def test_overwritten_entries_keep_the_tracked_size(self):
+
+        cache = ParsedCVCache(self.directory)
+
+        cache.put(cache.key(b'a'), {'payload': os.urandom(300)})
+        cache.put(cache.key(b'b'), {'payload': os.urandom(300)})
+
+        for _ in range(5):
+            cache.put(cache.key(b'a'), {'payload': os.urandom(300)})
+
+        self.assertEqual(cache.disk_usage(), cache.size)
@@ -0,0 +1,67 @@
+import unittest
+
+from mecip.coauthorship import author_key
+from mecip.coauthorship import coauthorship_graph
+
+from fixtures import corpus
+from fixtures import sample_cv
+
+
+class CoauthorshipTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def corpus(self):
+        cv = sample_cv()
+
+        jose, ana, lucas = corpus(['José Carlos Silva', 'Ana Beatriz Pereira', 'Lucas Lima'], first_id=1)
+
+        # José Carlos Silva lists the conference paper of 2024 written with Maria, and a paper of his own with
+        # Ana Beatriz Pereira and an external co-author; Ana lists the journal paper of 2025 written with Maria
+        papers = jose['publications']['conference_papers']
+        papers[1] = dict(papers[1], title='Redes de sensores', year=2015,
+                         authors=['SILVA, JOSE CARLOS', 'Pereira, Ana Beatriz', 'Souza, Pedro'])
+        jose['publications']['journal_papers'] = []
+        jose['publications']['books_and_chapters'] = []
+
+        ana['publications'] = {'journal_papers': cv['publications']['journal_papers'][:1]}
+
+        # nobody writes with Lucas
+        lucas['publications'] = {'journal_papers': [dict(cv['publications']['journal_papers'][2],
+                                                         authors=['Lima, Lucas'])]}
+
+        return [cv, jose, ana, lucas]
+
+    def test_graph(self):
+
+        self.assertEqual(author_key('Silva, José Carlos'), author_key('JOSE CARLOS SILVA'))
+
+        graph = coauthorship_graph(self.corpus())
+
+        self.assertEqual(['Maria da Conceição Araújo', 'José Carlos Silva', 'Ana Beatriz Pereira', 'Lucas Lima',
+                          'Pedro Souza'], graph.names)
+        self.assertEqual(4, graph.professors)
+
+        collaborators = graph.collaborators(0)
+
+        self.assertEqual([1, 2], collaborators['author'].tolist())
+        self.assertEqual([1, 1], collaborators['publications'].tolist())
+
+        self.assertEqual([2], graph.collaborators(0, start=2025)['author'].tolist())
+        self.assertEqual([0, 2, 4], graph.collaborators(1)['author'].tolist())
+
+        counts = graph.collaboration_counts()
+
+        self.assertEqual([2, 2, 2, 0, 1], counts['publications'].tolist())
+        self.assertEqual([2, 3, 3, 0, 2], counts['collaborators'].tolist())
+
+        self.assertEqual([1, 1, 0, 0, 0], graph.collaboration_counts(2020, 2024)['publications'].tolist())
+
+        indptr, indices, weights = graph.adjacency()
+
+        self.assertEqual(graph.indptr.tolist()[-1], weights.sum())
+        self.assertEqual([1, 2], indices[indptr[0]:indptr[1]].tolist())
+
+        self.assertEqual([0, 0, 0, 3, 0], graph.components().tolist())
+        self.assertEqual([0, 0, 0, 3, 4], graph.components(start=2020).tolist())
+        self.assertEqual([0, 1, 1, 3, 1], graph.components(end=2020).tolist())
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mecip.corpus import TABLES
+from mecip.corpus import corpus_tables
+from mecip.corpus import load_corpus
+from mecip.corpus import save_corpus
+from mecip.xml_parser import process_directory
+from mecip.xml_parser import process_file
+
+
+class CorpusTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def test_tables_hold_every_record(self):
+
+        cvs, _ = process_directory(self.BASE_PATH)
+
+        tables = corpus_tables(cvs)
+
+        self.assertEqual(set(TABLES), set(tables))
+
+        for table, columns in TABLES.items():
+            self.assertEqual([column for column, _ in columns], list(tables[table].columns))
+
+        papers = tables['journal_papers']
+
+        self.assertEqual(sum(len(cv['publications']['journal_papers']) for cv in cvs), len(papers))
+        self.assertEqual('Int64', str(papers['year'].dtype))
+        self.assertEqual({'1234567890123456': 3}, papers.groupby('lattes_id').size().to_dict())
+
+        teaching = tables['teaching'].merge(tables['professional_experience'], on=['lattes_id', 'experience'],
+                                            suffixes=('', '_experience'))
+
+        expected = [(e['company_name'], t['course']) for cv in cvs for e in cv['professional_experience']
+                    for t in e['teaching']]
+
+        self.assertEqual(expected, list(zip(teaching['company_name'], teaching['course'])))
+
+    def test_records_and_persistence(self):
+
+        file_path = os.path.join(self.BASE_PATH, '1234567890123456.xml')
+
+        tables = corpus_tables([process_file(file_path)])
+        from_records = corpus_tables([process_file(file_path, records=True)])
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            save_corpus(tables, directory)
+            loaded = load_corpus(directory)
+        finally:
+            shutil.rmtree(directory)
+
+        for table in TABLES:
+            self.assertTrue(tables[table].equals(from_records[table]))
+            self.assertTrue(tables[table].equals(loaded[table]))
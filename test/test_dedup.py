@@ -0,0 +1,92 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+from datetime import date, datetime
+
+from mecip.dedup import PublicationIndex
+from mecip.dedup import build_index
+from mecip.dedup import column_selector
+from mecip.dedup import publication_key
+from mecip.index_extractor import ProfessorIndexExtractor
+
+from fixtures import corpus
+
+
+class DedupTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def test_keys(self):
+
+        self.assertEqual(('doi', '10.1000/abc'),
+                         publication_key('journal_papers', {'doi': 'https://doi.org/10.1000/ABC'}))
+        self.assertEqual(publication_key('conference_papers', {'title': 'Um estudo: sobre Programação', 'year': 2019,
+                                                               'conference': 'Congresso de Educação'}),
+                         publication_key('conference_papers', {'title': 'UM ESTUDO SOBRE PROGRAMACAO', 'year': 2019,
+                                                               'conference': 'congresso de educacao', 'doi': 'n/a'}))
+        self.assertIsNone(publication_key('translations', {'title': ' '}))
+
+    def test_counts(self):
+
+        cvs = corpus(3)
+
+        # the first professor lists the 2025 paper twice, the second one gives its DOI as a link
+        papers = cvs[0]['publications']['journal_papers']
+        papers.append(copy.deepcopy(papers[0]))
+        cvs[1]['publications']['journal_papers'][0]['doi'] = 'https://doi.org/10.1000/JBCS.2025.001'
+
+        index = build_index(cvs)
+
+        self.assertEqual(6, len(index))
+        self.assertEqual(6, len(index.duplicates()))
+
+        extractor = ProfessorIndexExtractor(reference_date=date(2026, 1, 1))
+
+        select = column_selector(extractor, 'artigo_periodico_areas')
+
+        counts = index.professor_counts(select)
+
+        self.assertEqual(extractor.compute_index(cvs)['artigo_periodico_areas'].tolist(), counts['listed'].tolist())
+        self.assertEqual([1, 1, 1], counts['distinct'].tolist())
+
+        groups = index.group_counts({'computação': ['{:016d}'.format(i) for i in range(3)],
+                                     'educação': ['0000000000000002']}, select)
+
+        self.assertEqual([4, 1], groups['listed'].tolist())
+        self.assertEqual([1, 1], groups['distinct'].tolist())
+
+        self.assertEqual([19, 6], index.group_counts({'todos': index.keys}).loc['todos'].tolist())
+
+    def test_incremental_update(self):
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            file_path = os.path.join(directory, 'publications.pkl')
+
+            cvs = corpus(4)
+
+            index = PublicationIndex.load(file_path)
+            self.assertEqual((['{:016d}'.format(i) for i in range(4)], [], []), index.update(cvs))
+            index.save(file_path)
+
+            # the second CV is updated, without its journal papers, and the last one leaves
+            updated = cvs[:3]
+            updated[1] = copy.deepcopy(updated[1])
+            updated[1]['last_update'] = datetime(2025, 12, 20)
+            updated[1]['publications']['journal_papers'] = []
+
+            index = PublicationIndex.load(file_path)
+            self.assertEqual(([], ['0000000000000001'], ['0000000000000003']), index.update(updated))
+
+            rebuilt = build_index(updated)
+
+            self.assertEqual({k: e.listings for k, e in rebuilt.entries.items()},
+                             {k: e.listings for k, e in index.entries.items()})
+            self.assertTrue(rebuilt.professor_counts().sort_index().equals(
+                index.professor_counts().sort_index()))
+        finally:
+            shutil.rmtree(directory)
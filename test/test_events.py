@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mecip.events import EventStore
+
+
+class EventStoreTest(unittest.TestCase):
+
+    def test_dedup_and_lazy_rendering(self):
+
+        rendered = []
+
+        def render(event):
+            rendered.append(event.code)
+            return event.code.format(*event.arguments)
+
+        publication = {'title': 'T', 'authors': ['A']}
+
+        store = EventStore(render)
+
+        self.assertTrue(store.add('Ana', 'Grupo', 'mensagem {}', 1))
+        self.assertFalse(store.add('Ana', 'Grupo', 'mensagem {}', 1))
+        self.assertTrue(store.add('Ana', 'Grupo', 'mensagem {}', 2))
+        self.assertTrue(store.add('Ana', 'Outro', 'citação {[title]}', publication))
+        self.assertFalse(store.add('Ana', 'Outro', 'citação {[title]}', publication))
+        # equal publications built separately, e.g. listed twice in a CV, are the same event
+        self.assertFalse(store.add('Ana', 'Outro', 'citação {[title]}', {'authors': ['A'], 'title': 'T'}))
+        self.assertTrue(store.add('Bia', 'Grupo', 'mensagem {}', 1))
+
+        self.assertEqual(4, len(store))
+        self.assertEqual([], rendered)
+
+        self.assertEqual({'Grupo': ['mensagem 1', 'mensagem 2'], 'Outro': ['citação T']}, store['Ana'])
+        self.assertEqual(['Ana', 'Bia'], list(store))
+
+    def test_professors_with_the_same_name(self):
+
+        store = EventStore(lambda event: event.code)
+        store.add('0001', 'Grupo', 'mensagem', name='Ana Silva')
+        store.add('0002', 'Grupo', 'mensagem', name='Ana Silva')
+        store.add('0003', 'Grupo', 'mensagem', name='Bia')
+
+        self.assertEqual(['0001', '0002', '0003'], store.keys())
+        self.assertEqual(['Ana Silva', 'Ana Silva', 'Bia'], store.to_frame()['name'].tolist())
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            store.write_text(directory, 'log.txt')
+
+            self.assertEqual(['Ana Silva 0001', 'Ana Silva 0002', 'Bia'], sorted(os.listdir(directory)))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_exports(self):
+
+        store = EventStore(lambda event: event.code.format(*event.arguments))
+        store.add('Ana', 'Grupo', 'linha {}\nsegunda', 1)
+        store.add('Ana', 'Grupo', 'mensagem')
+
+        self.assertEqual(['linha 1\nsegunda', 'mensagem'], store.to_frame()['message'].tolist())
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            store.write_jsonl(os.path.join(directory, 'events.jsonl'))
+            store.write_text(directory, 'log.txt')
+
+            with open(os.path.join(directory, 'events.jsonl'), encoding='utf-8') as file:
+                self.assertEqual(['Ana', 'Ana'], [json.loads(line)['professor'] for line in file])
+
+            with open(os.path.join(directory, 'Ana', 'log.txt'), encoding='iso-8859-1') as file:
+                self.assertEqual('Grupo\n   linha 1\n   segunda\n   mensagem\n\n', file.read())
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,119 @@
+import copy
+import shutil
+import tempfile
+import unittest
+
+from datetime import date, datetime
+
+from mecip.areas import AreaTaxonomy
+from mecip.areas import default_paths
+from mecip.incremental import ADDED, CHANGED, REMOVED
+from mecip.incremental import IndexStateStore
+from mecip.index_extractor import ProfessorIndexExtractor
+
+from fixtures import corpus
+
+
+class IncrementalTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_only_changed_cvs_are_recomputed(self):
+
+        extractor = ProfessorIndexExtractor(reference_date=date(2026, 1, 1))
+
+        store = IndexStateStore(self.directory)
+
+        cvs = corpus(4)
+
+        result, delta, recomputed = store.update(extractor, cvs)
+
+        self.assertEqual(4, recomputed)
+        self.assertEqual([ADDED] * 4, delta['situacao'].tolist())
+
+        result, delta, recomputed = store.update(extractor, cvs)
+
+        self.assertEqual(0, recomputed)
+        self.assertEqual(0, len(delta))
+
+        expected = extractor.evaluate(cvs)
+
+        self.assertTrue(expected.index.equals(result.index))
+        self.assertEqual(expected.logging.items(), result.logging.items())
+        self.assertEqual(expected.inconsistencies.items(), result.inconsistencies.items())
+
+        # the second CV is updated, without its journal papers, and the last one leaves
+        updated = cvs[:3]
+        updated[1] = copy.deepcopy(updated[1])
+        updated[1]['last_update'] = datetime(2025, 12, 20)
+        updated[1]['publications']['journal_papers'] = []
+
+        result, delta, recomputed = store.update(extractor, updated)
+
+        self.assertEqual(1, recomputed)
+        self.assertTrue(extractor.evaluate(updated).index.equals(result.index))
+        self.assertEqual([(CHANGED, 'Professor 1'), (REMOVED, 'Professor 3')],
+                         sorted(set(zip(delta['situacao'], delta['nome']))))
+        self.assertIn('artigo_periodico_outras', delta['coluna'].tolist())
+
+        # a new reference year moves the evaluation windows, so every CV is recomputed
+        later = ProfessorIndexExtractor(reference_date=date(2027, 1, 1))
+
+        result, delta, recomputed = store.update(later, updated)
+
+        self.assertEqual(3, recomputed)
+        self.assertTrue(later.evaluate(updated).index.equals(result.index))
+
+    def test_epoch(self):
+
+        store = IndexStateStore(self.directory)
+
+        cvs = corpus(2)
+
+        # a weekly run in the same month reuses every stored row, including the month-dependent columns
+        store.update(ProfessorIndexExtractor(reference_date=date(2026, 10, 18)), cvs)
+
+        later = ProfessorIndexExtractor(reference_date=date(2026, 10, 25))
+
+        result, _, recomputed = store.update(later, cvs)
+
+        self.assertEqual(0, recomputed)
+        self.assertTrue(later.evaluate(cvs).index.equals(result.index))
+
+        # without them, only the year of the reference date matters
+        indicators = ['nome', 'artigo_periodico_areas', 'xp_docencia_superior']
+
+        store.update(ProfessorIndexExtractor(reference_date=date(2026, 1, 1)), cvs, indicators)
+
+        later = ProfessorIndexExtractor(reference_date=date(2026, 12, 1))
+
+        result, _, recomputed = store.update(later, cvs, indicators)
+
+        self.assertEqual(0, recomputed)
+        self.assertTrue(later.evaluate(cvs, indicators).index.equals(result.index))
+
+        indicators = ['nome', 'xp_profissional']
+
+        # open experiences end at the reference month
+        store.update(ProfessorIndexExtractor(reference_date=date(2026, 1, 1)), cvs, indicators)
+
+        later = ProfessorIndexExtractor(reference_date=date(2026, 12, 1))
+
+        result, _, recomputed = store.update(later, cvs, indicators)
+
+        self.assertEqual(2, recomputed)
+        self.assertTrue(later.evaluate(cvs, indicators).index.equals(result.index))
+
+        # a new taxonomy changes the areas the publications resolve to
+        taxonomy = AreaTaxonomy(list(default_paths()) + [('Outros', 'Ciência de Dados')])
+
+        _, _, recomputed = store.update(ProfessorIndexExtractor(reference_date=date(2026, 12, 1), taxonomy=taxonomy),
+                                        cvs, indicators)
+
+        self.assertEqual(2, recomputed)
@@ -1,8 +1,14 @@
-import os
+import copy
 import unittest
 
-from mecip import process_file
-from mecip import ProfessorIndexExtractor
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from mecip.index_extractor import INTERMEDIATES
+from mecip.index_extractor import Indicator
+from mecip.index_extractor import Institution
+from mecip.index_extractor import ProfessorIndexExtractor
+from mecip.xml_parser import process_directory
 
 import pandas as pd
 
@@ -15,9 +21,177 @@ class IndexExtractorTest(unittest.TestCase):
 
         BASE_PATH = './resources/lattes'
 
-        raw_data = [process_file(os.path.join(BASE_PATH, filename)) for filename in os.listdir(BASE_PATH)]
+        raw_data, failures = process_directory(BASE_PATH)
+
+        self.assertEqual([], failures)
 
         pd.set_option('display.max_columns', None)
         pd.set_option('display.width', 1024)
         print(extractor.compute_index(raw_data))
 
+    def test_publication_classifier(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        extractor = ProfessorIndexExtractor()
+
+        context = extractor.context(raw_data[0])
+
+        counts = extractor.classify_publications(context)
+
+        self.assertEqual([column for column, _ in ProfessorIndexExtractor.PUBLICATION_BUCKETS], list(counts))
+        self.assertEqual(counts['artigo_periodico_areas'], extractor.get_full_papers(raw_data[0]))
+        self.assertEqual(counts['anais_completo'], extractor.get_full_paper_in_conference_proceedings(raw_data[0]))
+
+        logs = context.result.logging[extractor.professor_key(raw_data[0])]
+
+        for column, group in ProfessorIndexExtractor.PUBLICATION_BUCKETS:
+            self.assertEqual(counts[column], len(logs.get(group, [])))
+
+    def test_home_institution_is_resolved_once_per_row(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        calls = []
+
+        class CountingExtractor(ProfessorIndexExtractor):
+            def resolve_home_institution(self, row):
+                calls.append(row['name'])
+                return super().resolve_home_institution(row)
+
+        CountingExtractor().compute_index(raw_data)
+
+        self.assertEqual([cv['name'] for cv in raw_data], calls)
+
+    def test_configurable_institution(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        extractor = ProfessorIndexExtractor(institution=Institution('UNICAMP', keywords=['universidade', 'campinas']))
+
+        context = extractor.context(raw_data[0])
+
+        self.assertIsNone(extractor.get_weekly_workload(context))
+        inconsistencies = context.result.inconsistencies[extractor.professor_key(raw_data[0])]
+
+        self.assertIn('O UNICAMP não consta como primeiro item na experiência de trabalho.',
+                      inconsistencies[ProfessorIndexExtractor.EDUCATIONAL_INSTITUTION])
+
+    def test_work_regime(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        extractor = ProfessorIndexExtractor()
+
+        self.assertEqual('RDE', extractor.get_work_regime(raw_data[0]))
+
+        # a professor without exclusive dedication
+        cv = copy.deepcopy(raw_data[0])
+
+        for experience in cv['professional_experience']:
+            experience['exclusive_dedication'] = False
+            experience['weekly_workload'] = 20
+
+        self.assertEqual('20 H', extractor.get_work_regime(cv))
+        index = extractor.compute_index([cv], indicators=['regime_de_trabalho'])
+
+        self.assertEqual(['20 H'], index['regime_de_trabalho'].tolist())
+
+    def test_selected_indicators(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        full = ProfessorIndexExtractor().compute_index(raw_data)
+
+        extractor = ProfessorIndexExtractor()
+
+        columns = ['anais_completo', 'nome', 'regime_de_trabalho']
+
+        selected = extractor.compute_index(raw_data, indicators=columns)
+
+        self.assertTrue(full[columns].equals(selected))
+        self.assertEqual(('lattes_url', 'name', 'professional_experience', 'publications'), extractor.fields(columns))
+        self.assertEqual(['publication_counts', 'anais_completo', 'nome', 'sorted_experiences', 'home_institution',
+                          'regime_de_trabalho'], [i.name for i, _ in extractor.plan(columns)])
+
+        with self.assertRaises(ValueError):
+            extractor.compute_index(raw_data, indicators=['nome', 'unknown'])
+
+        with self.assertRaises(ValueError):
+            ProfessorIndexExtractor(intermediates=INTERMEDIATES + [
+                Indicator('sorted_experiences', 'sort_experiences', requires=['home_institution'])]).plan()
+
+    def test_parallel_matches_serial(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        raw_data = [copy.deepcopy(raw_data[0]) for _ in range(7)]
+
+        for i, cv in enumerate(raw_data):
+            cv['name'] = 'Professor {}'.format(i % 3)
+
+        extractor = ProfessorIndexExtractor()
+
+        serial = extractor.evaluate(raw_data)
+
+        parallel = extractor.evaluate(raw_data, workers=2, partition_size=2)
+
+        self.assertTrue(serial.index.equals(parallel.index))
+        self.assertEqual(serial.inconsistencies.items(), parallel.inconsistencies.items())
+        self.assertEqual(serial.logging.items(), parallel.logging.items())
+        self.assertGreater(len(parallel.logging), 0)
+
+        streamed = extractor.new_result()
+
+        rows = list(extractor.iterate_index(raw_data, workers=2, partition_size=3, result=streamed))
+
+        self.assertEqual(serial.index.to_dict('records'), rows)
+        self.assertEqual(serial.logging.items(), streamed.logging.items())
+
+    def test_reentrant_extractor(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        extractor = ProfessorIndexExtractor(reference_date=date(2026, 1, 1))
+
+        first, second = extractor.evaluate(raw_data), extractor.evaluate(raw_data)
+
+        self.assertEqual(len(raw_data), len(second.index))
+        self.assertTrue(first.index.equals(second.index))
+        self.assertEqual(first.logging.items(), second.logging.items())
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: extractor.evaluate(raw_data), range(8)))
+
+        for result in results:
+            self.assertTrue(first.index.equals(result.index))
+            self.assertEqual(first.inconsistencies.items(), result.inconsistencies.items())
+
+        with self.assertRaises(AttributeError):
+            extractor.config.window_years = 5
+
+        wider = ProfessorIndexExtractor(extractor.config.replace(window_years=30)).compute_index(raw_data)
+
+        self.assertEqual(1, first.index['artigo_periodico_outras'][0])
+        self.assertEqual(2, wider['artigo_periodico_outras'][0])
+        self.assertEqual(3, extractor.config.window_years)
+
+    def test_series_matches_reference_years(self):
+
+        raw_data, _ = process_directory('./resources/lattes')
+
+        years = [2018, 2020, 2024, 2025, 2026]
+
+        series = ProfessorIndexExtractor(window_years=2).compute_series(raw_data, years)
+
+        self.assertEqual(['nome', 'ano_referencia'] + ProfessorIndexExtractor.WINDOW_COLUMNS, list(series.columns))
+
+        for year in years:
+            index = ProfessorIndexExtractor(window_years=2, reference_date=date(year, 6, 1)).compute_index(raw_data)
+
+            values = series[series['ano_referencia'] == year]
+
+            self.assertEqual(index[ProfessorIndexExtractor.WINDOW_COLUMNS].values.tolist(),
+                             values[ProfessorIndexExtractor.WINDOW_COLUMNS].values.tolist())
+
+        self.assertEqual([0, 1, 1, 1, 1], series['anais_completo'].tolist())
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+import pandas as pd
+
+from mecip.intervals import batch_covered_months
+from mecip.intervals import covered_months
+from mecip.intervals import merge_intervals
+from mecip.intervals import month_ordinal
+from mecip.intervals import month_ordinals
+
+
+def date_range_months(periods):
+    months = set()
+
+    for start, end in periods:
+        months.update(pd.date_range('{1}-{0}-01'.format(*start.split('/')), '{1}-{0}-01'.format(*end.split('/')),
+                                    freq='MS').strftime("%Y%m").tolist())
+
+    return len(months)
+
+
+class IntervalsTest(unittest.TestCase):
+
+    def random_periods(self, rnd):
+        periods = []
+
+        for _ in range(rnd.randint(0, 8)):
+            start = (rnd.randint(1, 12), rnd.randint(1995, 2024))
+            end = (rnd.randint(1, 12), start[1] + rnd.randint(-1, 6))
+            periods.append(('{:02d}/{}'.format(*start), '{:02d}/{}'.format(*end)))
+
+        return periods
+
+    def test_month_ordinal(self):
+        self.assertEqual(2024 * 12 + 2, month_ordinal('03/2024'))
+        self.assertEqual(1, month_ordinal('01/2024') - month_ordinal('12/2023'))
+        self.assertIsNone(month_ordinal(2024))
+        self.assertIsNone(month_ordinal('13/2024'))
+        self.assertIsNone(month_ordinal(None))
+        self.assertEqual([(1, 10), (12, 15)], merge_intervals([(5, 10), (12, 13), (1, 4), (13, 15), (9, 8)]))
+
+    def test_union_matches_date_range(self):
+
+        rnd = random.Random(0)
+
+        professors = [self.random_periods(rnd) for _ in range(300)]
+
+        expected = [date_range_months(periods) for periods in professors]
+
+        self.assertEqual(expected, [
+            covered_months([(month_ordinal(s), month_ordinal(e)) for s, e in periods]) for periods in professors])
+
+        owners = [i for i, periods in enumerate(professors) for _ in periods]
+        starts = month_ordinals([s for periods in professors for s, _ in periods])
+        ends = month_ordinals([e for periods in professors for _, e in periods])
+
+        self.assertEqual(expected, batch_covered_months(owners, starts, ends, len(professors)).tolist())
@@ -0,0 +1,82 @@
+import itertools
+import unittest
+
+from mecip.minhash import MinHasher
+from mecip.minhash import NearDuplicateDetector
+from mecip.minhash import near_duplicates
+from mecip.minhash import shingle_hashes
+
+from fixtures import corpus
+
+TITLES = ['Escalonamento de tarefas em grades computacionais',
+          'ESCALONAMENTO DE TAREFAS EM GRADES COMPUTACIONAIS.',
+          'Escalonamento de tarefas em grades computacio',
+          'Predição de desempenho em nuvens híbridas',
+          'Predicao de Desempenho em Nuvens Hibridas',
+          'Um estudo sobre ensino de programação',
+          'Paralelismo em GPUs',
+          '',
+          None]
+
+
+class MinHashTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def test_signatures(self):
+
+        hashes, owners = shingle_hashes(['abcd', 'ab', ''], 3)
+
+        self.assertEqual([0, 0, 1], owners.tolist())
+        self.assertEqual(len(set(hashes.tolist())), 3)
+
+        signatures, valid = MinHasher(num_perm=64).signatures(TITLES)
+
+        self.assertEqual((len(TITLES), 64), signatures.shape)
+        self.assertEqual([True] * 7 + [False] * 2, valid.tolist())
+        self.assertEqual(signatures[3].tolist(), signatures[4].tolist())
+
+    def test_clusters(self):
+
+        detector = NearDuplicateDetector(threshold=0.6)
+
+        self.assertEqual([[0, 1, 2], [3, 4]], detector.clusters(TITLES))
+
+        # the LSH candidates give the pairs of an exhaustive comparison of the signatures
+        signatures, valid = detector.hasher.signatures(TITLES)
+
+        expected = [(i, j) for i, j in itertools.combinations(range(len(TITLES)), 2)
+                    if valid[i] and valid[j] and (signatures[i] == signatures[j]).mean() >= detector.threshold]
+
+        pairs, similarity = detector.similar_pairs(TITLES)
+
+        self.assertEqual(expected, [tuple(p) for p in pairs.tolist()])
+        self.assertTrue((similarity >= detector.threshold).all())
+
+        # a large bucket gives exactly its own pairs
+        copies = [TITLES[0]] * 200 + TITLES[3:]
+
+        pairs, _ = detector.similar_pairs(copies)
+
+        self.assertEqual(200 * 199 // 2 + 1, len(pairs))
+
+        with self.assertRaises(ValueError):
+            NearDuplicateDetector(num_perm=128, bands=130)
+
+    def test_near_duplicates(self):
+
+        cvs = corpus(3)
+
+        # the first professor lists a conference paper twice, without accents; the second one truncates it
+        papers = cvs[0]['publications']['conference_papers']
+        papers.append(dict(papers[1], title=papers[1]['title'].upper().replace('Ç', 'C').replace('Ã', 'A')))
+        cvs[1]['publications']['conference_papers'][1]['title'] = 'Um estudo sobre ensino de progr'
+
+        professor_clusters, corpus_clusters = near_duplicates(cvs)
+
+        self.assertEqual(['0000000000000000'] * 2, professor_clusters['lattes_id'].tolist())
+        self.assertEqual([('conference_papers', 1), ('conference_papers', 2)],
+                         list(zip(professor_clusters['section'], professor_clusters['position'])))
+
+        self.assertEqual(6, corpus_clusters['cluster'].nunique())
+        self.assertEqual(19, len(corpus_clusters))
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from mecip.index_extractor import ProfessorIndexExtractor
+from mecip.output import CsvChunkWriter
+from mecip.xml_parser import iterate_directory
+
+from fixtures import corpus
+
+
+class OutputTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def corpus(self, size):
+        return corpus(['Professor, "{}"'.format((i * 7919) % size) for i in range(size)])
+
+    def test_iterate_index_matches_compute_index(self):
+
+        cvs = [cv for _, cv, _ in iterate_directory(self.BASE_PATH)] + self.corpus(5)
+
+        expected = ProfessorIndexExtractor().compute_index(cvs)
+
+        extractor = ProfessorIndexExtractor()
+
+        chunks = list(extractor.iterate_index(iter(cvs), chunk_size=2))
+
+        self.assertEqual([2, 2, 2], [len(chunk) for chunk in chunks])
+        self.assertEqual(expected.astype(object).values.tolist(), pd.concat(chunks).values.tolist())
+        self.assertEqual(expected.to_dict('records'), list(ProfessorIndexExtractor().iterate_index(cvs)))
+
+    def test_external_merge_matches_in_memory_sort(self):
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            outputs = []
+
+            for run_rows in [1000, 7]:
+                file_path = os.path.join(directory, 'indices_{}.csv'.format(run_rows))
+
+                with CsvChunkWriter(file_path, sort_by='nome', run_rows=run_rows) as writer:
+                    for chunk in ProfessorIndexExtractor().iterate_index(self.corpus(40), chunk_size=3):
+                        writer.write(chunk)
+
+                with open(file_path, encoding='iso-8859-1') as file:
+                    outputs.append(file.read())
+
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual(['indices_1000.csv', 'indices_7.csv'], sorted(os.listdir(directory)))
+
+            names = pd.read_csv(os.path.join(directory, 'indices_7.csv'), encoding='iso-8859-1')['nome'].tolist()
+
+            self.assertEqual(40, len(names))
+            self.assertEqual(sorted(names), names)
+        finally:
+            shutil.rmtree(directory)
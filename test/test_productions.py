@@ -0,0 +1,57 @@
+import unittest
+
+from datetime import date
+
+from mecip.index_extractor import ProfessorIndexExtractor
+from mecip.productions import vectorized_window_counts
+
+from fixtures import corpus
+
+
+class ProductionsTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def test_vectorized_counts_match_row_wise_engine(self):
+
+        cvs = corpus(6)
+
+        for i, professor in enumerate(cvs):
+            for section in ['journal_papers', 'books_and_chapters', 'conference_papers']:
+                for j, publication in enumerate(professor['publications'][section]):
+                    publication['year'] -= (i + j) % 4
+            for software in professor['software']:
+                software['registered'] = i % 2 == 0
+
+        for reference_date, window_years in [(date(2026, 3, 1), 3), (date(2024, 1, 1), 1), (date(2030, 1, 1), 10)]:
+
+            extractor = ProfessorIndexExtractor(reference_date=reference_date, window_years=window_years)
+
+            expected = extractor.compute_index(cvs)[ProfessorIndexExtractor.WINDOW_COLUMNS]
+
+            self.assertEqual(expected.values.tolist(), vectorized_window_counts(extractor, cvs).values.tolist())
+
+    def test_productions_without_year(self):
+
+        cvs = corpus(3)
+
+        cvs[0]['publications']['journal_papers'][0]['year'] = None
+        cvs[2]['software'][0]['year'] = None
+
+        extractor = ProfessorIndexExtractor(reference_date=date(2026, 3, 1))
+
+        def missing(result):
+            return sorted((professor, event.arguments[0]['title'])
+                          for professor, groups in result.inconsistencies.events.items()
+                          for event in groups.get(extractor.PRODUCTIONS_WITHOUT_YEAR, []))
+
+        # both engines leave them out of the window and report them
+        expected = extractor.evaluate(cvs)
+
+        result = extractor.new_result()
+
+        counts = vectorized_window_counts(extractor, cvs, result)
+
+        self.assertEqual(expected.index[ProfessorIndexExtractor.WINDOW_COLUMNS].values.tolist(), counts.values.tolist())
+        self.assertEqual(2, len(missing(expected)))
+        self.assertEqual(missing(expected), missing(result))
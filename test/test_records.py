@@ -0,0 +1,35 @@
+import os
+import pickle
+import unittest
+
+from mecip.index_extractor import ProfessorIndexExtractor
+from mecip.records import Curriculum
+from mecip.records import JournalPaper
+from mecip.xml_parser import process_file
+
+
+class RecordsTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def test_records_round_trip(self):
+
+        for filename in os.listdir(self.BASE_PATH):
+            file_path = os.path.join(self.BASE_PATH, filename)
+
+            cv = process_file(file_path)
+            record = process_file(file_path, records=True)
+
+            self.assertIsInstance(record, Curriculum)
+            self.assertIsInstance(record['publications']['journal_papers'][0], JournalPaper)
+            self.assertEqual(cv, record.to_dict())
+            self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+
+    def test_extractor_accepts_records(self):
+
+        file_paths = [os.path.join(self.BASE_PATH, filename) for filename in os.listdir(self.BASE_PATH)]
+
+        from_dicts = ProfessorIndexExtractor().compute_index([process_file(f) for f in file_paths])
+        from_records = ProfessorIndexExtractor().compute_index([process_file(f, records=True) for f in file_paths])
+
+        self.assertTrue(from_dicts.equals(from_records))
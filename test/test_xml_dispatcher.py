@@ -0,0 +1,21 @@
+import os
+import unittest
+
+from lxml import html
+
+from mecip.xml_dispatcher import dispatch_information
+from mecip.xml_parser import LATTES_ENCODING
+from mecip.xml_parser import extract_information
+
+
+class XmlDispatcherTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def test_dispatcher_matches_xpath_extractors(self):
+
+        for filename in os.listdir(self.BASE_PATH):
+            with open(os.path.join(self.BASE_PATH, filename), mode='rb') as file:
+                tree = html.fromstring(file.read(), parser=html.HTMLParser(encoding=LATTES_ENCODING))
+
+            self.assertEqual(extract_information(tree), dispatch_information(tree))
@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from lxml import html
+
+from mecip.xml_dispatcher import dispatch_information
+from mecip.xml_parser import LATTES_ENCODING
+from mecip.xml_parser import extract_information
+from mecip.xml_parser import process_archive
+from mecip.xml_parser import process_directory
+from mecip.xml_parser import process_file
+from mecip.xml_parser import stream_information
+from mecip.index_extractor import ProfessorIndexExtractor
+
+
+class XmlParserTest(unittest.TestCase):
+
+    BASE_PATH = './resources/lattes'
+
+    def parse_tree(self, file_path):
+        with open(file_path, mode='rb') as file:
+            return extract_information(html.fromstring(file.read(), parser=html.HTMLParser(encoding=LATTES_ENCODING)))
+
+    def test_streaming_matches_tree(self):
+
+        for filename in os.listdir(self.BASE_PATH):
+            file_path = os.path.join(self.BASE_PATH, filename)
+            self.assertEqual(self.parse_tree(file_path), stream_information(file_path))
+
+    def test_process_directory_reports_failures_in_order(self):
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            for filename in os.listdir(self.BASE_PATH):
+                shutil.copy(os.path.join(self.BASE_PATH, filename), os.path.join(directory, 'a_' + filename))
+                shutil.copy(os.path.join(self.BASE_PATH, filename), os.path.join(directory, 'c_' + filename))
+
+            with open(os.path.join(directory, 'b_broken.xml'), mode='w') as file:
+                file.write('<curriculo-vitae/>')
+
+            serial, serial_failures = process_directory(directory)
+            parallel, parallel_failures = process_directory(directory, workers=2)
+
+            self.assertEqual(serial, parallel)
+            self.assertEqual(2 * len(os.listdir(self.BASE_PATH)), len(parallel))
+            self.assertEqual([os.path.join(directory, 'b_broken.xml')], [f for f, _ in parallel_failures])
+            self.assertEqual(serial_failures, parallel_failures)
+            self.assertEqual((serial, serial_failures), process_directory(directory, workers=2, chunksize=2))
+
+            dispatched, dispatched_failures = process_directory(directory, workers=2, chunksize=2,
+                                                                engine=dispatch_information)
+
+            self.assertEqual(serial, dispatched)
+            self.assertEqual([f for f, _ in serial_failures], [f for f, _ in dispatched_failures])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_plain_and_zipped_files_decode_declared_encoding(self):
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            for filename in os.listdir(self.BASE_PATH):
+                file_path = os.path.join(self.BASE_PATH, filename)
+                zip_path = os.path.join(directory, filename + '.zip')
+
+                with zipfile.ZipFile(zip_path, mode='w') as archive:
+                    archive.write(file_path, 'curriculo.xml')
+
+                expected = self.parse_tree(file_path)
+
+                for streaming in [False, True]:
+                    self.assertEqual(expected, process_file(file_path, streaming=streaming))
+                    self.assertEqual(expected, process_file(zip_path, streaming=streaming))
+
+                self.assertEqual(expected, process_file(file_path, engine=dispatch_information))
+                self.assertEqual(expected, process_file(zip_path, engine=dispatch_information))
+
+            self.assertEqual('Maria da Concei\u00e7\u00e3o Ara\u00fajo',
+                             process_file(os.path.join(self.BASE_PATH, '1234567890123456.xml'))['name'])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_process_archive_with_many_members(self):
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            file_path = os.path.join(self.BASE_PATH, '1234567890123456.xml')
+            nested_path = os.path.join(directory, 'nested.zip')
+            archive_path = os.path.join(directory, 'department.zip')
+
+            with zipfile.ZipFile(nested_path, mode='w') as archive:
+                archive.write(file_path, 'curriculo.xml')
+
+            with zipfile.ZipFile(archive_path, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.write(file_path, 'a/curriculo.xml')
+                archive.write(file_path, 'b/curriculo.xml')
+                archive.write(nested_path, 'c.zip')
+                archive.writestr('d/curriculo.xml', '<curriculo-vitae/>')
+                archive.writestr('readme.txt', 'not a CV')
+
+            result, failures = process_archive(archive_path)
+
+            self.assertEqual([self.parse_tree(file_path)] * 3, result)
+            self.assertEqual(['d/curriculo.xml'], [member for member, _ in failures])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_schema_types(self):
+
+        cv = process_file(os.path.join(self.BASE_PATH, '1234567890123456.xml'))
+
+        paper = cv['publications']['journal_papers'][1]
+
+        self.assertEqual(2024, paper['year'])
+        self.assertEqual('14132478', paper['issn'])
+        self.assertEqual('29', paper['volume'])
+        self.assertIsNone(paper['doi'])
+
+        experience = cv['professional_experience'][0]
+
+        self.assertEqual('02/2013', experience['start'])
+        self.assertIsNone(experience['end'])
+        self.assertEqual(40, experience['weekly_workload'])
+        self.assertTrue(experience['exclusive_dedication'])
+        self.assertEqual('12/2016', experience['teaching'][0]['end'])
+
+        self.assertEqual(['high_school'], [e['level'] for e in cv['education'] if e['level_code'] == 'C'])
+
+    def test_field_projection(self):
+
+        file_path = os.path.join(self.BASE_PATH, '1234567890123456.xml')
+
+        with open(file_path, mode='rb') as file:
+            tree = html.fromstring(file.read(), parser=html.HTMLParser(encoding=LATTES_ENCODING))
+
+        cv = extract_information(tree)
+
+        for fields in [['name', 'last_update'], ['publications', 'lattes_url'], ProfessorIndexExtractor.FIELDS]:
+
+            expected = {key: cv[key] for key in fields}
+            if 'last_update' in fields or 'months_from_last_update' in fields:
+                expected.update(last_update=cv['last_update'], months_from_last_update=cv['months_from_last_update'])
+
+            self.assertEqual(expected, extract_information(tree, fields=fields))
+            self.assertEqual(expected, dispatch_information(tree, fields=fields))
+            self.assertEqual(expected, stream_information(file_path, fields=fields))
+            self.assertEqual(expected, process_file(file_path, fields=fields))
+
+        record = process_file(file_path, records=True, fields=['name'])
+
+        self.assertEqual(cv['name'], record['name'])
+        self.assertIsNone(record['publications'])
+
+        with self.assertRaises(ValueError):
+            extract_information(tree, fields=['name', 'publication'])